@@ -0,0 +1,42 @@
+from celery import Celery
+from celery.signals import celeryd_after_setup
+import os
+
+celery = Celery(
+    "clipforge",
+    broker=os.getenv("CELERY_BROKER_URL", "redis://redis:6379/0"),
+    backend=os.getenv("CELERY_RESULT_BACKEND", "redis://redis:6379/0"),
+    include=["app.tasks.worker"],
+)
+
+# Configure Celery settings
+celery.conf.update(
+    task_serializer='json',
+    accept_content=['json'],
+    result_serializer='json',
+    timezone='UTC',
+    enable_utc=True,
+    task_track_started=True,
+    task_time_limit=3600,  # 1 hour max per task
+    task_soft_time_limit=3000,  # 50 minutes soft limit
+    # Each worker process splits the node's CPUs with the others (see
+    # media_executor), so a few wide processes rather than one per CPU
+    worker_concurrency=int(os.getenv("CELERY_WORKER_CONCURRENCY", "2")),
+    # Workers poll their queues in -Q order instead of round robin, so the
+    # renders queue is only read when the default queue is empty. A process
+    # prefetches one message at a time, so it can't sit on queued renders
+    # while new uploads wait.
+    broker_transport_options={'queue_order_strategy': 'priority'},
+    worker_prefetch_multiplier=1,
+)
+
+@celeryd_after_setup.connect
+def _record_pool_size(sender, instance, **kwargs):
+    # Runs in the parent before the pool forks, so every child sizes its
+    # media CPU budget from the real pool size, whether it came from -c,
+    # --autoscale or worker_concurrency
+    processes = getattr(instance, 'max_concurrency', None) or instance.concurrency or os.cpu_count() or 1
+    os.environ["MEDIA_WORKER_PROCESSES"] = str(processes)
+
+# Auto-discover tasks from the 'tasks' module
+celery.autodiscover_tasks(["app.tasks"])
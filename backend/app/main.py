@@ -1,2 +1,86 @@
-from app.routes.social_media import social_routerapp.include_router(social_router)from app.routes.social_media import social_router
+from fastapi import FastAPI, File, UploadFile, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
+from app.tasks.signatures import enqueue_process_video
+from app.tasks.asset_manifest import AssetManifest
+from app.tasks.media_probe import MediaProbeError, get_media_info
+import uuid
+import os
+import aiofiles
+from celery.result import AsyncResult
+from app.routes.social_media import social_router
+
+app = FastAPI(title="ClipForge AI")
 app.include_router(social_router)
+
+UPLOAD_DIR = "uploads"
+os.makedirs(UPLOAD_DIR, exist_ok=True)
+
+@app.get("/health")
+def health():
+    return {"status": "ok"}
+
+@app.post("/api/upload")
+async def upload_video(file: UploadFile = File(...)):
+    # Validate file type
+    if not file.content_type.startswith("video/"):
+        raise HTTPException(400, "File must be a video")
+    
+    # Generate unique filename
+    file_id = str(uuid.uuid4())
+    file_ext = os.path.splitext(file.filename)[1]
+    file_path = os.path.join(UPLOAD_DIR, f"{file_id}{file_ext}")
+    
+    # Save file
+    async with aiofiles.open(file_path, 'wb') as f:
+        content = await file.read()
+        await f.write(content)
+    
+    # Probe once here; the worker reads the cached result from the sidecar
+    try:
+        media = await run_in_threadpool(get_media_info, file_path)
+    except MediaProbeError:
+        media = None
+    if media is None or media.video is None:
+        os.remove(file_path)
+        raise HTTPException(400, "File is not a readable video")
+    if not media.has_audio:
+        # Highlights are picked from the transcript; a silent video has none
+        os.remove(file_path)
+        raise HTTPException(400, "Video has no audio track to transcribe")
+    
+    # Start processing task
+    task = enqueue_process_video(file_path)
+    
+    return {
+        "file_id": file_id,
+        "filename": file.filename,
+        "task_id": task.id,
+        "status": "processing",
+        "media": {
+            "duration": media.duration,
+            "width": media.display_size[0],
+            "height": media.display_size[1],
+            "fps": media.fps,
+            "has_audio": media.has_audio
+        }
+    }
+
+@app.get("/api/status/{task_id}")
+def get_status(task_id: str):
+    task_result = AsyncResult(task_id)
+    
+    result = {
+        "task_id": task_id,
+        "status": task_result.status,
+        "result": task_result.result if task_result.ready() else None
+    }
+    
+    return JSONResponse(content=result)
+
+@app.get("/api/assets/{video_id}")
+def get_assets(video_id: str):
+    # Current render tier (pending, preview, failed or final) and path of every clip asset
+    if os.path.basename(video_id) != video_id:
+        raise HTTPException(400, "Invalid video id")
+    return JSONResponse(content={"video_id": video_id, "assets": AssetManifest.for_video(video_id).load()})
@@ -0,0 +1,50 @@
+import os
+
+from app.tasks.media_executor import get_media_executor
+from app.tasks.process_supervisor import SupervisedProcessError
+
+PROXY_WIDTH = int(os.getenv("ANALYSIS_PROXY_WIDTH", "640"))
+PROXY_FPS = int(os.getenv("ANALYSIS_PROXY_FPS", "10"))
+
+
+class AnalysisProxy:
+    # A small, short-GOP copy of the upload's video for frame analysis.
+    # Every seek into it decodes at most a second of 640p frames, however
+    # large the original; only final renders and the chosen thumbnail frame
+    # read the original.
+    def __init__(self, output_dir="./proxies", width=None, fps=None, executor=None):
+        self.output_dir = output_dir
+        self.width = width or PROXY_WIDTH
+        self.fps = fps or PROXY_FPS
+        self.executor = executor or get_media_executor()
+        os.makedirs(output_dir, exist_ok=True)
+
+    def prepare(self, video_path, video_id):
+        output_dir = os.path.join(self.output_dir, video_id)
+        os.makedirs(output_dir, exist_ok=True)
+        proxy_path = os.path.join(output_dir, f"proxy_{self.width}w_{self.fps}fps.mp4")
+        if os.path.exists(proxy_path):
+            return proxy_path
+        proxy_tmp = proxy_path + ".tmp.mp4"
+        cmd = [
+            'ffmpeg', '-nostdin', '-i', video_path,
+            '-map', '0:V:0', '-an', '-sn',
+            # Same timeline as the original, so analysis timestamps apply to it unchanged
+            '-vf', f"fps={self.fps},scale=w='min(iw,{self.width})':h=-2",
+            '-c:v', 'libx264', '-preset', 'ultrafast', '-crf', '28', '-pix_fmt', 'yuv420p',
+            # One keyframe per second and no B-frames
+            '-g', str(self.fps), '-bf', '0',
+            '-movflags', '+faststart', '-y', proxy_tmp
+        ]
+        try:
+            self.executor.run(cmd)
+        except SupervisedProcessError as e:
+            if e.reason == 'cancelled':
+                raise
+            # The proxy is only an optimisation: on any failure (an audio-only
+            # upload, a timeout, the CPU limit) analysis reads the original
+            if os.path.exists(proxy_tmp):
+                os.remove(proxy_tmp)
+            return None
+        os.replace(proxy_tmp, proxy_path)
+        return proxy_path
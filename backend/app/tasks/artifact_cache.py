@@ -0,0 +1,177 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from dataclasses import asdict, is_dataclass
+
+from app.tasks.transcript_cache import file_content_hash
+
+# Bump when a change to rendering, thumbnail or caption code should stop
+# earlier artifacts from being reused
+CODE_VERSION = os.getenv("ARTIFACT_CODE_VERSION", "1")
+
+
+class LocalArtifactBackend:
+    # One directory per entry: the artifact files plus meta.json. Point
+    # several nodes at the same shared directory to share hits.
+    def __init__(self, root=None):
+        self.root = root or os.getenv("ARTIFACT_CACHE_DIR", "./artifacts")
+        os.makedirs(self.root, exist_ok=True)
+
+    def _entry_dir(self, key):
+        return os.path.join(self.root, key[:2], key)
+
+    def fetch(self, key, dests):
+        entry = self._entry_dir(key)
+        try:
+            with open(os.path.join(entry, 'meta.json'), 'r') as f:
+                meta = json.load(f)
+            for name, dest in dests.items():
+                _copy(os.path.join(entry, name), dest)
+            os.utime(entry)
+        except (OSError, ValueError):
+            return None
+        return meta
+
+    def store(self, key, files, meta):
+        entry = self._entry_dir(key)
+        tmp = os.path.join(self.root, f".tmp-{uuid.uuid4().hex}")
+        os.makedirs(tmp)
+        try:
+            for name, path in files.items():
+                _copy(path, os.path.join(tmp, name))
+            with open(os.path.join(tmp, 'meta.json'), 'w') as f:
+                json.dump(meta, f)
+            os.makedirs(os.path.dirname(entry), exist_ok=True)
+            os.rename(tmp, entry)
+        except OSError:
+            # Lost a race with another worker storing the same entry
+            shutil.rmtree(tmp, ignore_errors=True)
+
+    def entries(self):
+        # (key, size in bytes, last used) for every entry
+        for prefix in os.listdir(self.root):
+            prefix_dir = os.path.join(self.root, prefix)
+            if prefix.startswith('.') or not os.path.isdir(prefix_dir):
+                continue
+            for key in os.listdir(prefix_dir):
+                entry = os.path.join(prefix_dir, key)
+                try:
+                    size = sum(e.stat().st_size for e in os.scandir(entry) if e.is_file())
+                    yield key, size, os.stat(entry).st_mtime
+                except OSError:
+                    continue
+
+    def delete(self, key):
+        shutil.rmtree(self._entry_dir(key), ignore_errors=True)
+
+
+CACHE_BACKENDS = {
+    "local": LocalArtifactBackend,
+}
+
+
+def create_cache_backend(name=None, **kwargs):
+    name = name or os.getenv("ARTIFACT_CACHE_BACKEND", "local")
+    if name not in CACHE_BACKENDS:
+        raise ValueError(f"Unknown artifact cache backend '{name}'. Available: {sorted(CACHE_BACKENDS)}")
+    return CACHE_BACKENDS[name](**kwargs)
+
+
+def _copy(src, dest):
+    # Always a copy: outputs get rewritten in place (ffmpeg -y truncates its
+    # output), which would corrupt an entry that shared an inode with one.
+    # The copy is renamed into place so readers never see a partial file.
+    tmp = f"{dest}.{uuid.uuid4().hex}.tmp"
+    try:
+        shutil.copyfile(src, tmp)
+        os.replace(tmp, dest)
+    except OSError:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+class ArtifactCache:
+    def __init__(self, backend=None, quota_bytes=None, evict_interval=60.0):
+        self.backend = backend or create_cache_backend()
+        self.quota_bytes = quota_bytes or int(float(os.getenv("ARTIFACT_CACHE_QUOTA_GB", "20")) * 1024 ** 3)
+        self.evict_interval = evict_interval
+        self.hits = 0
+        self.misses = 0
+        self._last_evict = 0.0
+        self._lock = threading.Lock()
+
+    def make_key(self, video_path, kind, start=None, end=None, profile=None):
+        if is_dataclass(profile):
+            profile = asdict(profile)
+        raw = json.dumps({
+            'source': file_content_hash(video_path),
+            'kind': kind,
+            'start': None if start is None else round(start, 3),
+            'end': None if end is None else round(end, 3),
+            'profile': profile,
+            'version': CODE_VERSION
+        }, sort_keys=True, default=str)
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def fetch(self, key, dests):
+        # Materialises the cached files at dests ({name: path}) and returns
+        # the stored metadata, or None on a miss
+        meta = self.backend.fetch(key, dests)
+        with self._lock:
+            if meta is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return meta
+
+    def store(self, key, files, meta=None):
+        self.backend.store(key, files, meta or {})
+        self.evict()
+
+    def get_or_create(self, key, dests, create_fn):
+        # create_fn writes the files at dests and returns metadata, or None
+        # on failure; failures are never cached
+        meta = self.fetch(key, dests)
+        if meta is not None:
+            return meta
+        meta = create_fn()
+        if meta is not None:
+            self.store(key, dests, meta)
+        return meta
+
+    def evict(self, force=False):
+        # Drops least recently used entries until the cache fits its quota
+        now = time.time()
+        with self._lock:
+            if not force and now - self._last_evict < self.evict_interval:
+                return 0
+            self._last_evict = now
+        entries = sorted(self.backend.entries(), key=lambda entry: entry[2])
+        total = sum(size for _, size, _ in entries)
+        evicted = 0
+        for key, size, _ in entries:
+            if total <= self.quota_bytes:
+                break
+            self.backend.delete(key)
+            total -= size
+            evicted += 1
+        return evicted
+
+    def stats(self):
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses}
+
+
+_cache = None
+
+
+def get_artifact_cache():
+    global _cache
+    if _cache is None:
+        _cache = ArtifactCache()
+    return _cache
@@ -0,0 +1,67 @@
+import fcntl
+import json
+import os
+import threading
+import time
+
+# Render tiers an asset moves through, lowest first. "failed" means no
+# final is coming; a clip that had a preview keeps its path.
+TIERS = ("pending", "preview", "failed", "final")
+
+_locks = {}
+_locks_guard = threading.Lock()
+
+
+def manifest_path(video_id, clips_dir="./clips"):
+    return os.path.join(clips_dir, video_id, "assets.json")
+
+
+class AssetManifest:
+    def __init__(self, path):
+        self.path = path
+        with _locks_guard:
+            self._lock = _locks.setdefault(os.path.abspath(path), threading.Lock())
+
+    @classmethod
+    def for_video(cls, video_id, clips_dir="./clips"):
+        return cls(manifest_path(video_id, clips_dir))
+
+    def load(self):
+        try:
+            with open(self.path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def fail_unfinished(self, error):
+        # Everything not final yet will never get a final rendition
+        return self._modify(lambda current: {
+            name: {**entry, 'tier': 'failed', 'error': error}
+            for name, entry in current.items() if entry.get('tier') != 'final'
+        })
+
+    def update(self, assets):
+        # assets: {name: {"tier", "path", ...}}. A lower tier never replaces a
+        # higher one, so a late preview can't clobber a final rendition.
+        return self._modify(lambda current: assets)
+
+    def _modify(self, changes):
+        # changes maps the current manifest to the entries to write.
+        # process_video and render_finals run in different worker processes,
+        # so the read-modify-write holds an flock on a sidecar lock file as
+        # well as the in-process lock.
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with self._lock, open(f"{self.path}.lock", 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            current = self.load()
+            for name, entry in changes(current).items():
+                previous = current.get(name)
+                if previous and previous.get('tier') in TIERS and entry.get('tier') in TIERS and \
+                        TIERS.index(entry['tier']) < TIERS.index(previous['tier']):
+                    continue
+                current[name] = {**entry, 'updated': time.time()}
+            tmp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(current, f)
+            os.replace(tmp_path, self.path)
+            return current
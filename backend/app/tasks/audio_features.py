@@ -0,0 +1,106 @@
+import os
+
+import numpy as np
+
+from app.tasks.audio_ingest import SAMPLE_RATE, load_pcm
+
+# Columns of the per-second feature array
+LOUDNESS, PITCH_VARIANCE, SPEECH_RATE = range(3)
+
+PITCH_FRAME = 640                     # 40 ms frames for pitch tracking
+ENVELOPE_HOP = 160                    # 10 ms hops for the syllable envelope
+MIN_LAG = SAMPLE_RATE // 400          # 400 Hz upper pitch bound
+MAX_LAG = SAMPLE_RATE // 70           # 70 Hz lower pitch bound
+
+
+def _block_features(x):
+    # x is a whole number of seconds of 16 kHz mono audio
+    seconds = len(x) // SAMPLE_RATE
+    per_second = x.reshape(seconds, SAMPLE_RATE)
+
+    rms = np.sqrt(np.mean(per_second * per_second, axis=1))
+    loudness = 20 * np.log10(rms + 1e-6)
+
+    # Autocorrelation pitch per 40 ms frame, computed for all frames at once
+    frames = x.reshape(-1, PITCH_FRAME)
+    spectrum = np.fft.rfft(frames, n=PITCH_FRAME * 2, axis=1)
+    autocorr = np.fft.irfft(spectrum * np.conj(spectrum), axis=1)[:, :MAX_LAG + 1]
+    lags = np.argmax(autocorr[:, MIN_LAG:], axis=1) + MIN_LAG
+    energy = autocorr[:, 0]
+    peak = autocorr[np.arange(len(frames)), lags]
+    voiced = (energy > 1e-4) & (peak > 0.3 * energy)
+    semitones = 12 * np.log2(SAMPLE_RATE / lags / 100.0)
+    voiced = voiced.reshape(seconds, -1)
+    semitones = semitones.reshape(seconds, -1)
+    counts = voiced.sum(axis=1)
+    safe = np.maximum(counts, 1)
+    mean = (semitones * voiced).sum(axis=1) / safe
+    variance = (voiced * (semitones - mean[:, None]) ** 2).sum(axis=1) / safe
+    variance[counts < 3] = 0.0
+
+    # Speech rate as the count of energy-envelope peaks per second, a cheap
+    # proxy for syllable nuclei
+    hops = x.reshape(-1, ENVELOPE_HOP)
+    envelope = 10 * np.log10(np.mean(hops * hops, axis=1) + 1e-10)
+    envelope = np.convolve(envelope, np.ones(5) / 5, mode='same')
+    is_peak = np.zeros(len(envelope), dtype=bool)
+    is_peak[1:-1] = (
+        (envelope[1:-1] > envelope[:-2])
+        & (envelope[1:-1] >= envelope[2:])
+        & (envelope[1:-1] > -35)
+    )
+    rate = is_peak.reshape(seconds, -1).sum(axis=1)
+
+    return np.stack([loudness, variance, rate], axis=1).astype(np.float32)
+
+
+def compute_features(pcm, block_seconds=60):
+    # Streams the memory-mapped PCM in fixed blocks, so a long recording is
+    # never materialised as a whole; only the per-second summary is kept.
+    total_seconds = int(np.ceil(len(pcm) / SAMPLE_RATE))
+    features = np.zeros((total_seconds, 3), dtype=np.float32)
+    block = block_seconds * SAMPLE_RATE
+    for offset in range(0, len(pcm), block):
+        x = np.asarray(pcm[offset:offset + block], dtype=np.float32)
+        padded = int(np.ceil(len(x) / SAMPLE_RATE)) * SAMPLE_RATE
+        if padded != len(x):
+            x = np.pad(x, (0, padded - len(x)))
+        first = offset // SAMPLE_RATE
+        block_features = _block_features(x)
+        features[first:first + len(block_features)] = block_features
+    return features
+
+
+def load_or_compute_features(pcm_path):
+    features_path = pcm_path + ".features.npy"
+    if os.path.exists(features_path):
+        return np.load(features_path)
+    features = compute_features(load_pcm(pcm_path))
+    np.save(features_path, features)
+    return features
+
+
+def excitement_curve(features, weights=(0.4, 0.4, 0.2)):
+    # Per-second excitement as a weighted sum of z-scored features
+    mean = features.mean(axis=0)
+    std = features.std(axis=0)
+    std[std == 0] = 1.0
+    z = (features - mean) / std
+    return z @ np.asarray(weights, dtype=np.float32)
+
+
+def blend_audio_scores(scored_segments, features, weight=10.0):
+    # Adds weight * mean excitement over each segment's seconds to its text score
+    if not scored_segments or features is None or len(features) == 0:
+        return scored_segments
+    curve = excitement_curve(features)
+    cumulative = np.concatenate(([0.0], np.cumsum(curve)))
+    starts = np.array([s["start"] for s in scored_segments])
+    ends = np.array([s["end"] for s in scored_segments])
+    first = np.clip(np.floor(starts).astype(np.int64), 0, len(curve) - 1)
+    last = np.clip(np.ceil(ends).astype(np.int64), first + 1, len(curve))
+    bonus = weight * (cumulative[last] - cumulative[first]) / (last - first)
+    return [
+        {**seg, "score": seg["score"] + float(b), "audio_score": float(b)}
+        for seg, b in zip(scored_segments, bonus)
+    ]
@@ -0,0 +1,61 @@
+import os
+
+import numpy as np
+
+from app.tasks.process_supervisor import get_supervisor
+
+SAMPLE_RATE = 16000
+
+
+def load_pcm(pcm_path, mode='r'):
+    # 16 kHz mono float32, the same layout whisper.load_audio produces
+    return np.memmap(pcm_path, dtype=np.float32, mode=mode)
+
+
+class AudioIngest:
+    def __init__(self, output_dir="./audio", aac_bitrate=None, loudness_target=None):
+        self.output_dir = output_dir
+        self.aac_bitrate = aac_bitrate or os.getenv("AUDIO_TARGET_BITRATE", "128k")
+        # Integrated loudness (LUFS) of the shared clip audio track
+        self.loudness_target = float(loudness_target or os.getenv("AUDIO_LOUDNESS_TARGET", "-14"))
+        os.makedirs(output_dir, exist_ok=True)
+
+    def prepare(self, video_path, video_id):
+        # The PCM (for analysis/transcription) is decoded first so loudness
+        # can be measured from it in one vectorised pass. The job's only AAC
+        # encode then applies that measurement as a plain linear gain, at the
+        # target bitrate, and every clip stream-copies the result.
+        from app.tasks.loudness import load_or_measure, normalisation_gain
+        output_dir = os.path.join(self.output_dir, video_id)
+        os.makedirs(output_dir, exist_ok=True)
+        pcm_path = os.path.join(output_dir, "audio_16k.f32")
+        aac_path = os.path.join(output_dir, f"audio_{self.aac_bitrate}_{self.loudness_target:g}lufs.m4a")
+        if not os.path.exists(pcm_path):
+            pcm_tmp = pcm_path + ".tmp"
+            cmd = [
+                'ffmpeg', '-nostdin', '-i', video_path,
+                '-map', '0:a:0', '-ac', '1', '-ar', str(SAMPLE_RATE),
+                '-f', 'f32le', '-y', pcm_tmp
+            ]
+            get_supervisor().run(cmd)
+            os.replace(pcm_tmp, pcm_path)
+        _, loudness = load_or_measure(pcm_path)
+        gain_db = normalisation_gain(loudness, self.loudness_target)
+        if not os.path.exists(aac_path):
+            aac_tmp = aac_path + ".tmp.m4a"
+            cmd = [
+                'ffmpeg', '-nostdin', '-i', video_path, '-vn',
+                '-map', '0:a:0', '-af', f'volume={gain_db}dB', '-c:a', 'aac', '-b:a', self.aac_bitrate,
+                '-movflags', '+faststart', '-y', aac_tmp
+            ]
+            get_supervisor().run(cmd)
+            os.replace(aac_tmp, aac_path)
+        samples = os.path.getsize(pcm_path) // 4
+        return {
+            'pcm_path': pcm_path,
+            'aac_path': aac_path,
+            'sample_rate': SAMPLE_RATE,
+            'samples': samples,
+            'duration': samples / SAMPLE_RATE,
+            'loudness': {**loudness, 'target_lufs': self.loudness_target, 'gain_db': gain_db}
+        }
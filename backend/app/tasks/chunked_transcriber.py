@@ -0,0 +1,280 @@
+import multiprocessing
+import os
+import re
+
+import numpy as np
+
+from app.tasks.audio_ingest import SAMPLE_RATE, load_pcm
+from app.tasks.media_executor import default_cpu_budget, worker_processes
+from app.tasks.media_probe import get_media_info
+from app.tasks.process_supervisor import get_supervisor
+from app.tasks.transcription_backends import create_backend
+
+# Rough resident size of one loaded model, used to size the process pool
+MODEL_MEMORY_MB = {
+    "tiny": 400,
+    "base": 600,
+    "small": 1200,
+    "medium": 3000,
+    "large": 6000,
+}
+
+# Share of the available memory the window pool may use; the rest is left
+# for the parent, ffmpeg and the page cache
+MEMORY_HEADROOM = 0.75
+
+_SILENCE_START = re.compile(rb"silence_start=(-?[\d.]+)")
+_SILENCE_END = re.compile(rb"silence_end=(-?[\d.]+)")
+
+
+def available_memory_mb():
+    # MemAvailable, capped by the container's cgroup limit when it has one
+    available = None
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    available = int(line.split()[1]) / 1024
+                    break
+    except OSError:
+        pass
+    if available is None:
+        available = os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    for limit_path, usage_path in (
+        ("/sys/fs/cgroup/memory.max", "/sys/fs/cgroup/memory.current"),
+        ("/sys/fs/cgroup/memory/memory.limit_in_bytes", "/sys/fs/cgroup/memory/memory.usage_in_bytes"),
+    ):
+        try:
+            with open(limit_path) as f:
+                limit = f.read().strip()
+            with open(usage_path) as f:
+                usage = int(f.read().strip())
+        except (OSError, ValueError):
+            continue
+        if limit.isdigit():
+            available = min(available, (int(limit) - usage) / (1024 * 1024))
+        break
+    return max(0.0, available)
+
+
+def default_memory_budget_mb():
+    # WHISPER_MAX_MEMORY_MB wins; otherwise split the node's available memory
+    # evenly between the Celery worker processes, as the CPU budget is
+    budget = int(os.getenv("WHISPER_MAX_MEMORY_MB", "0"))
+    if budget:
+        return budget
+    return max(1, int(available_memory_mb() * MEMORY_HEADROOM / worker_processes()))
+
+
+def detect_silences(video_path, noise_db=-35, min_silence=0.4):
+    # silencedetect streams the audio, so this never holds the track in
+    # memory. ametadata prints its events to stdout, where every line is
+    # read; stderr is only kept in part by the supervisor.
+    cmd = [
+        'ffmpeg', '-nostdin', '-nostats', '-v', 'error', '-i', video_path, '-vn',
+        '-af', f'silencedetect=n={noise_db}dB:d={min_silence},ametadata=mode=print:file=-',
+        '-f', 'null', '-'
+    ]
+    silences = []
+    start = None
+
+    def on_line(line):
+        nonlocal start
+        match = _SILENCE_START.search(line)
+        if match:
+            start = max(0.0, float(match.group(1)))
+            return
+        match = _SILENCE_END.search(line)
+        if match and start is not None:
+            silences.append((start, float(match.group(1))))
+            start = None
+
+    get_supervisor().run(cmd, on_stdout_line=on_line)
+    return silences
+
+
+def detect_silences_pcm(pcm, noise_db=-35, min_silence=0.4, frame_seconds=0.02,
+                        block_seconds=60):
+    # Same result shape as detect_silences, computed from the shared PCM in
+    # fixed-size blocks so only one block is paged in at a time.
+    frame = int(SAMPLE_RATE * frame_seconds)
+    block = frame * int(block_seconds / frame_seconds)
+    threshold = 10 ** (noise_db / 20)
+    quiet_frames = []
+    for offset in range(0, len(pcm) - frame + 1, block):
+        chunk = np.asarray(pcm[offset:offset + block])
+        usable = len(chunk) // frame * frame
+        frames = chunk[:usable].reshape(-1, frame)
+        quiet_frames.append(np.sqrt(np.mean(frames * frames, axis=1)) < threshold)
+    if not quiet_frames:
+        return []
+    quiet = np.concatenate(quiet_frames).astype(np.int8)
+    edges = np.diff(np.concatenate(([0], quiet, [0])))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    min_frames = int(min_silence / frame_seconds)
+    return [
+        (start * frame_seconds, end * frame_seconds)
+        for start, end in zip(starts, ends) if end - start >= min_frames
+    ]
+
+
+def plan_windows(duration, silences, chunk_seconds=600, overlap=2.0, search=30.0):
+    # Cut points land on the silence midpoint closest to each chunk target,
+    # falling back to the raw target when no silence is near enough.
+    midpoints = [(s + e) / 2 for s, e in silences]
+    cuts = [0.0]
+    while duration - cuts[-1] > chunk_seconds * 1.5:
+        target = cuts[-1] + chunk_seconds
+        nearby = [m for m in midpoints if abs(m - target) <= search and m > cuts[-1]]
+        cuts.append(min(nearby, key=lambda m: abs(m - target)) if nearby else target)
+    cuts.append(duration)
+    windows = []
+    for lo, hi in zip(cuts, cuts[1:]):
+        windows.append({
+            "start": max(0.0, lo - overlap),
+            "end": min(duration, hi + overlap),
+            "keep_from": lo,
+            "keep_to": hi
+        })
+    return windows
+
+
+def load_audio_window(video_path, start, duration):
+    # Only the requested window is decoded, which keeps per-worker memory flat
+    cmd = [
+        'ffmpeg', '-nostdin', '-ss', f'{start:.3f}', '-t', f'{duration:.3f}',
+        '-i', video_path, '-vn',
+        '-f', 's16le', '-ac', '1', '-acodec', 'pcm_s16le', '-ar', str(SAMPLE_RATE),
+        '-'
+    ]
+    chunks = []
+
+    def read(pipe):
+        for chunk in iter(lambda: pipe.read(1 << 20), b''):
+            chunks.append(chunk)
+
+    get_supervisor().run(cmd, stdout_reader=read)
+    return np.frombuffer(b''.join(chunks), np.int16).flatten().astype(np.float32) / 32768.0
+
+
+def stitch_segments(window_results):
+    # A window owns segments whose midpoint falls before its cut point and
+    # after the last segment already kept, so a sentence straddling a cut is
+    # taken from whichever window first sees it whole. Timestamps are then
+    # clamped so they never go backwards.
+    stitched = []
+    last_end = 0.0
+    for window, window_segments in window_results:
+        for seg in sorted(window_segments, key=lambda s: s["start"]):
+            midpoint = (seg["start"] + seg["end"]) / 2
+            if midpoint >= window["keep_to"] or (stitched and midpoint <= last_end):
+                continue
+            start = max(seg["start"], last_end)
+            end = max(seg["end"], start)
+            stitched.append({**seg, "id": len(stitched), "start": start, "end": end})
+            last_end = end
+    return stitched
+
+
+def pool_size(model_size, chunk_seconds, max_workers=None, max_memory_mb=None):
+    workers = max_workers or os.cpu_count() or 1
+    if max_memory_mb:
+        window_mb = chunk_seconds * SAMPLE_RATE * 4 / (1024 * 1024)
+        per_worker = MODEL_MEMORY_MB.get(model_size.split('.')[0], 1500) + window_mb
+        workers = min(workers, int(max_memory_mb // per_worker))
+    return max(1, workers)
+
+
+def window_pool(workers, initializer, initargs):
+    # Celery's prefork children are daemonic, and stdlib multiprocessing
+    # refuses to start processes from one; billiard (Celery's fork of it)
+    # does not. None means decode in-process.
+    if multiprocessing.current_process().daemon:
+        try:
+            import billiard
+        except ImportError:
+            return None
+        context = billiard.get_context("spawn")
+    else:
+        context = multiprocessing.get_context("spawn")
+    return context.Pool(workers, initializer=initializer, initargs=initargs)
+
+
+_worker_backend = None
+
+
+def _init_worker(backend, model_size, torch_threads):
+    global _worker_backend
+    import torch
+    torch.set_num_threads(torch_threads)
+    _worker_backend = create_backend(backend, model_size)
+
+
+def _transcribe_window(args):
+    return _decode_window(_worker_backend, args)
+
+
+def _decode_window(backend, args):
+    video_path, pcm_path, window, decode_options = args
+    if pcm_path:
+        pcm = load_pcm(pcm_path)
+        audio = np.array(pcm[int(window["start"] * SAMPLE_RATE):int(window["end"] * SAMPLE_RATE)])
+    else:
+        audio = load_audio_window(video_path, window["start"], window["end"] - window["start"])
+    result = backend.transcribe(audio, **decode_options)
+    segments = []
+    for seg in result["segments"]:
+        segments.append({
+            **seg,
+            "start": seg["start"] + window["start"],
+            "end": seg["end"] + window["start"]
+        })
+    return window, segments, result.get("language")
+
+
+class ChunkedTranscriber:
+    def __init__(self, model_size="base", backend="whisper", chunk_seconds=600, overlap=2.0,
+                 max_workers=None, max_memory_mb=None):
+        self.model_size = model_size
+        self.backend = backend
+        self.chunk_seconds = chunk_seconds
+        self.overlap = overlap
+        self.max_workers = max_workers
+        self.max_memory_mb = max_memory_mb
+
+    def should_chunk(self, duration):
+        return duration > self.chunk_seconds * 1.5
+
+    def transcribe(self, video_path, duration=None, pcm_path=None, cpu_budget=None, load_backend=None,
+                   **decode_options):
+        # load_backend() returns the caller's already-loaded backend, used
+        # when no window pool can be started
+        duration = duration if duration is not None else get_media_info(video_path).duration
+        silences = detect_silences_pcm(load_pcm(pcm_path)) if pcm_path else detect_silences(video_path)
+        windows = plan_windows(duration, silences,
+                               chunk_seconds=self.chunk_seconds, overlap=self.overlap)
+        cpu_budget = cpu_budget or default_cpu_budget()
+        max_memory_mb = self.max_memory_mb or default_memory_budget_mb()
+        workers = min(len(windows), cpu_budget, pool_size(self.model_size, self.chunk_seconds,
+                                                          self.max_workers, max_memory_mb))
+        torch_threads = max(1, cpu_budget // workers)
+        jobs = [(video_path, pcm_path, window, decode_options) for window in windows]
+        initargs = (self.backend, self.model_size, torch_threads)
+        pool = window_pool(workers, _init_worker, initargs)
+        if pool is None:
+            # Sequentially in this process, on the caller's model and its
+            # torch thread settings rather than a second, process-wide copy
+            backend = load_backend() if load_backend else create_backend(self.backend, self.model_size)
+            results = [_decode_window(backend, job) for job in jobs]
+        else:
+            with pool:
+                results = pool.map(_transcribe_window, jobs)
+        segments = stitch_segments([(window, segs) for window, segs, _ in results])
+        languages = [lang for _, _, lang in results if lang]
+        return {
+            "text": "".join(seg["text"] for seg in segments),
+            "segments": segments,
+            "language": max(set(languages), key=languages.count) if languages else None,
+            "chunks": len(windows)
+        }
@@ -1,105 +1,193 @@
-import subprocess
 import os
+from functools import partial
+from app.tasks.media_probe import get_media_info
+from app.tasks.render_planner import EncodeProfile, OutputSpec
+from app.tasks.media_executor import get_media_executor, with_threads
+from app.tasks.process_supervisor import get_supervisor
+
+TEASER_PROFILE = EncodeProfile(width=720, height=1280)
+STANDARD_PROFILE = EncodeProfile(video_bitrate='2000k', audio_bitrate='128k')
+# Explainers are padded by 30 s each side, so they would link neighbouring
+# highlights into one long shared decode
+EXPLAINER_PROFILE = EncodeProfile(video_bitrate='2500k', audio_bitrate='160k', shared_decode=False)
 
 class MultiLengthClipProcessor:
-    def __init__(self, output_dir="./clips"):
+    def __init__(self, output_dir="./clips", stream_copy=False, keyframe_tolerance=0.5, executor=None):
         self.output_dir = output_dir
+        self.executor = executor or get_media_executor()
+        self.stream_copy = stream_copy
+        self.keyframe_tolerance = keyframe_tolerance
     
-    def extract_teaser(self, video_path, start_time, end_time, output_path, clip_id):
-        try:
-            duration = min(end_time - start_time, 30)
-            peak_time = start_time + (duration / 2)
-            cmd = [
-                'ffmpeg', '-i', video_path,
-                '-ss', str(peak_time - 7.5),
-                '-t', '15',
-                '-c:v', 'libx264', '-c:a', 'aac',
-                '-vf', 'scale=720:1280:force_original_aspect_ratio=increase,crop=720:1280',
-                '-movflags', '+faststart',
-                '-y', output_path
-            ]
-            subprocess.run(cmd, check=True, capture_output=True)
-            return {
-                "success": True,
-                "path": output_path,
-                "duration": 15,
-                "type": "teaser"
-            }
-        except Exception as e:
-            return {"success": False, "error": str(e)}
+    def _inputs(self, video_path, start, duration, audio_path=None, copy=False):
+        # -ss before -i seeks the demuxer to the nearest keyframe instead of
+        # decoding from the start of the file, so cut cost no longer grows
+        # with the clip's offset into the video. A copy starts at a keyframe
+        # pts, passed at the probe's microsecond precision: a seek point even
+        # slightly before the keyframe makes -c copy start at the previous
+        # one and carry its whole GOP behind an edit list.
+        seek = ['-ss', f'{start:.6f}' if copy else f'{start:.3f}', '-t', f'{duration:.3f}']
+        args = [*seek, '-i', video_path]
+        if audio_path:
+            # The shared AAC intermediate is muxed in as a second input
+            args += [*seek, '-i', audio_path, '-map', '0:V:0', '-map', '1:a:0']
+        return args
     
-    def extract_standard(self, video_path, start_time, end_time, output_path):
+    def _audio_codec(self, audio_path, bitrate):
+        if audio_path:
+            return ['-c:a', 'copy']
+        return ['-c:a', 'aac', '-b:a', bitrate]
+    
+    def _copy_start(self, start, keyframes):
+        # A range that starts on (or within tolerance of) a keyframe can be
+        # cut losslessly without re-encoding
+        if not (self.stream_copy and keyframes):
+            return None
+        return keyframes.snap(start, self.keyframe_tolerance)
+    
+    def _within(self, start, duration, limit):
+        # Ranges never run past the end of the source
+        if limit is None:
+            return start, duration
+        return start, max(0, min(duration, limit - start))
+    
+    def _teaser_range(self, start_time, end_time, limit=None):
+        duration = min(end_time - start_time, 30)
+        peak_time = start_time + (duration / 2)
+        return self._within(max(0, peak_time - 7.5), 15, limit)
+    
+    def _standard_range(self, start_time, end_time, limit=None):
+        return self._within(start_time, min(end_time - start_time, 60), limit)
+    
+    def _explainer_range(self, start_time, end_time, limit=None):
+        extended_start = max(0, start_time - 30)
+        extended_end = min(end_time + 30, end_time + 90)
+        duration = extended_end - extended_start
+        if duration > 180:
+            duration = 180
+        return self._within(extended_start, duration, limit)
+    
+    def extract_standard(self, video_path, start_time, end_time, output_path, audio_path=None, keyframes=None):
         try:
-            duration = min(end_time - start_time, 60)
+            start_time, duration = self._standard_range(start_time, end_time, get_media_info(video_path).duration)
+            copy_start = self._copy_start(start_time, keyframes)
+            if copy_start is not None:
+                start_time = copy_start
+                video_codec = ['-c:v', 'copy']
+            else:
+                video_codec = ['-c:v', 'libx264', '-b:v', '2000k']
             cmd = [
-                'ffmpeg', '-i', video_path,
-                '-ss', str(start_time),
-                '-t', str(duration),
-                '-c:v', 'libx264', '-c:a', 'aac',
-                '-b:v', '2000k', '-b:a', '128k',
+                'ffmpeg',
+                *self._inputs(video_path, start_time, duration, audio_path, copy=copy_start is not None),
+                *video_codec, *self._audio_codec(audio_path, '128k'),
                 '-movflags', '+faststart',
                 '-y', output_path
             ]
-            subprocess.run(cmd, check=True, capture_output=True)
+            get_supervisor().run(with_threads(cmd, self.executor.job_threads))
             return {
                 "success": True,
                 "path": output_path,
                 "duration": duration,
-                "type": "standard"
+                "type": "standard",
+                "stream_copy": copy_start is not None
             }
         except Exception as e:
             return {"success": False, "error": str(e)}
     
-    def extract_explainer(self, video_path, start_time, end_time, output_path, transcript_snippet):
+    def extract_explainer(self, video_path, start_time, end_time, output_path, transcript_snippet, audio_path=None,
+                          keyframes=None):
         try:
-            extended_start = max(0, start_time - 30)
-            extended_end = min(end_time + 30, end_time + 90)
-            duration = extended_end - extended_start
-            if duration > 180:
-                duration = 180
-                extended_end = extended_start + 180
+            extended_start, duration = self._explainer_range(start_time, end_time,
+                                                             get_media_info(video_path).duration)
+            copy_start = self._copy_start(extended_start, keyframes)
+            if copy_start is not None:
+                extended_start = copy_start
+                video_codec = ['-c:v', 'copy']
+            else:
+                video_codec = ['-c:v', 'libx264', '-b:v', '2500k']
+            # After the snap, so the range matches what was actually cut
+            extended_end = extended_start + duration
             cmd = [
-                'ffmpeg', '-i', video_path,
-                '-ss', str(extended_start),
-                '-t', str(duration),
-                '-c:v', 'libx264', '-c:a', 'aac',
-                '-b:v', '2500k', '-b:a', '160k',
+                'ffmpeg',
+                *self._inputs(video_path, extended_start, duration, audio_path, copy=copy_start is not None),
+                *video_codec, *self._audio_codec(audio_path, '160k'),
                 '-movflags', '+faststart',
                 '-y', output_path
             ]
-            subprocess.run(cmd, check=True, capture_output=True)
+            get_supervisor().run(with_threads(cmd, self.executor.job_threads))
             return {
                 "success": True,
                 "path": output_path,
                 "duration": duration,
                 "type": "explainer",
                 "start": extended_start,
-                "end": extended_end
+                "end": extended_end,
+                "stream_copy": copy_start is not None
             }
         except Exception as e:
             return {"success": False, "error": str(e)}
     
-    def extract_all_lengths(self, video_path, clip_data, video_id):
+    def plan_lengths(self, video_path, clip_data, video_id, audio_path=None):
+        # Outputs for the render planner. Standard and explainer cuts that can
+        # be stream-copied from a keyframe are done here directly instead.
         output_dir = os.path.join(self.output_dir, video_id)
         os.makedirs(output_dir, exist_ok=True)
+        media = get_media_info(video_path)
+        keyframes = media.keyframe_index() if self.stream_copy else None
+        specs = []
+        copies = []
+        for clip in clip_data:
+            clip_id = clip['id']
+            start, end = clip['start_time'], clip['end_time']
+            ranges = {
+                'teaser': (self._teaser_range(start, end, media.duration), TEASER_PROFILE),
+                'standard': (self._standard_range(start, end, media.duration), STANDARD_PROFILE),
+                'explainer': (self._explainer_range(start, end, media.duration), EXPLAINER_PROFILE),
+            }
+            for length_type, ((range_start, duration), profile) in ranges.items():
+                path = os.path.join(output_dir, f"clip_{clip_id:03d}_{length_type}.mp4")
+                if length_type != 'teaser' and self._copy_start(range_start, keyframes) is not None:
+                    if length_type == 'standard':
+                        copy = partial(self.extract_standard, video_path, start, end, path)
+                    else:
+                        copy = partial(self.extract_explainer, video_path, start, end, path,
+                                       clip.get('text_snippet', ''))
+                    copies.append(((length_type, clip_id), copy))
+                    continue
+                specs.append(OutputSpec((length_type, clip_id), path, range_start, range_start + duration, profile))
+        outputs = self.executor.map(lambda copy: copy[1](audio_path=audio_path, keyframes=keyframes), copies,
+                                    threads=1)
+        copied = {key: output for (key, _), output in zip(copies, outputs)}
+        return specs, copied
+    
+    def collect_results(self, clip_data, rendered, copied=None, media=None):
+        copied = copied or {}
+        limit = media.duration if media else None
         results = []
         for clip in clip_data:
             clip_id = clip['id']
-            start = clip['start_time']
-            end = clip['end_time']
-            transcript = clip.get('text_snippet', '')
+            start, end = clip['start_time'], clip['end_time']
             clip_results = {"clip_id": clip_id, "lengths": {}}
-            teaser_path = os.path.join(output_dir, f"clip_{clip_id:03d}_teaser.mp4")
-            teaser = self.extract_teaser(video_path, start, end, teaser_path, clip_id)
-            if teaser['success']:
-                clip_results['lengths']['teaser'] = teaser
-            standard_path = os.path.join(output_dir, f"clip_{clip_id:03d}_standard.mp4")
-            standard = self.extract_standard(video_path, start, end, standard_path)
-            if standard['success']:
-                clip_results['lengths']['standard'] = standard
-            explainer_path = os.path.join(output_dir, f"clip_{clip_id:03d}_explainer.mp4")
-            explainer = self.extract_explainer(video_path, start, end, explainer_path, transcript)
-            if explainer['success']:
-                clip_results['lengths']['explainer'] = explainer
+            ranges = {
+                'teaser': self._teaser_range(start, end, limit),
+                'standard': self._standard_range(start, end, limit),
+                'explainer': self._explainer_range(start, end, limit),
+            }
+            for length_type, (range_start, duration) in ranges.items():
+                key = (length_type, clip_id)
+                if key in copied:
+                    if copied[key]['success']:
+                        clip_results['lengths'][length_type] = copied[key]
+                    continue
+                output = rendered.get(key, {'success': False})
+                if not output['success']:
+                    continue
+                clip_results['lengths'][length_type] = {
+                    "success": True,
+                    "path": output['path'],
+                    "duration": duration,
+                    "type": length_type
+                }
+                if length_type == 'explainer':
+                    clip_results['lengths'][length_type].update({"start": range_start, "end": range_start + duration})
             results.append(clip_results)
         return results
@@ -1,34 +1,62 @@
 import ffmpeg
 import os
-import subprocess
+from dataclasses import replace
+from app.tasks.render_planner import EncodeProfile, OutputSpec
+from app.tasks.media_executor import get_media_executor
+from app.tasks.media_probe import get_media_info
+from app.tasks.process_supervisor import SupervisedProcessError, get_supervisor
+
+MAIN_PROFILE = EncodeProfile(video_bitrate='2000k', audio_bitrate='128k')
+WEB_PROFILE = EncodeProfile(width=720, height=1280, video_bitrate='1000k', audio_bitrate='128k')
+PREVIEW_PROFILE = EncodeProfile(height=360, video_bitrate='400k', audio_bitrate='64k', preset='ultrafast')
 
 class ClipProcessor:
-    def __init__(self, output_dir="./clips"):
+    def __init__(self, output_dir="./clips", executor=None, cache=None):
         self.output_dir = output_dir
+        self.executor = executor or get_media_executor()
+        self.cache = cache
         os.makedirs(output_dir, exist_ok=True)
     
-    def extract_clip(self, video_path, start_time, end_time, output_path, clip_id):
-        try:
+    def _clip_range(self, start_time, end_time, limit=None):
+        duration = end_time - start_time
+        if duration < 60:
+            end_time = start_time + 60
+            duration = 60
+        if limit is not None and end_time > limit:
+            # Padding to 60 s must not run past the end of the source
+            end_time = max(start_time, limit)
             duration = end_time - start_time
-            if duration < 60:
-                end_time = start_time + 60
-                duration = 60
+        return start_time, end_time, duration
+    
+    def extract_clip(self, video_path, start_time, end_time, output_path, clip_id, audio_path=None):
+        try:
+            start_time, end_time, duration = self._clip_range(start_time, end_time,
+                                                              get_media_info(video_path).duration)
             start_str = self._format_time(start_time)
             duration_str = self._format_time(duration)
-            (
+            source = ffmpeg.input(video_path, ss=start_str, t=duration_str)
+            if audio_path:
+                # Stream-copy the shared AAC intermediate instead of re-encoding audio
+                audio = ffmpeg.input(audio_path, ss=start_str, t=duration_str).audio
+                streams = [source['V'], audio]
+                audio_options = {'acodec': 'copy'}
+            else:
+                streams = [source]
+                audio_options = {'acodec': 'aac', 'audio_bitrate': '128k'}
+            get_supervisor().run(
                 ffmpeg
-                .input(video_path, ss=start_str, t=duration_str)
                 .output(
+                    *streams,
                     output_path,
                     vcodec='libx264',
-                    acodec='aac',
                     video_bitrate='2000k',
-                    audio_bitrate='128k',
                     preset='fast',
-                    movflags='+faststart'
+                    movflags='+faststart',
+                    threads=self.executor.job_threads,
+                    **audio_options
                 )
                 .overwrite_output()
-                .run(capture_stdout=True, capture_stderr=True)
+                .compile()
             )
             web_path = output_path.replace('.mp4', '_web.mp4')
             self._create_web_version(output_path, web_path)
@@ -40,10 +68,10 @@ class ClipProcessor:
                 'start': start_time,
                 'end': end_time
             }
-        except ffmpeg.Error as e:
+        except SupervisedProcessError as e:
             return {
                 'success': False,
-                'error': e.stderr.decode(),
+                'error': e.stderr.decode(errors='replace') if e.stderr else str(e),
                 'path': None
             }
     
@@ -55,7 +83,7 @@ class ClipProcessor:
     
     def _create_web_version(self, input_path, output_path):
         try:
-            (
+            get_supervisor().run(
                 ffmpeg
                 .input(input_path)
                 .filter('scale', 720, 1280, force_original_aspect_ratio='increase')
@@ -63,55 +91,127 @@ class ClipProcessor:
                 .output(
                     output_path,
                     vcodec='libx264',
-                    acodec='aac',
+                    acodec='copy',
                     video_bitrate='1000k',
                     preset='fast',
-                    movflags='+faststart'
+                    movflags='+faststart',
+                    threads=self.executor.job_threads
                 )
                 .overwrite_output()
-                .run(capture_stdout=True, capture_stderr=True)
+                .compile()
             )
             return True
         except:
             try:
-                (
+                get_supervisor().run(
                     ffmpeg
                     .input(input_path)
                     .output(
                         output_path,
                         vcodec='libx264',
-                        acodec='aac',
+                        acodec='copy',
                         video_bitrate='1000k',
-                        preset='fast'
+                        preset='fast',
+                        threads=self.executor.job_threads
                     )
                     .overwrite_output()
-                    .run(capture_stdout=True, capture_stderr=True)
+                    .compile()
                 )
                 return True
             except:
                 return False
     
-    def extract_multiple_clips(self, video_path, clips, video_id):
+    def extract_multiple_clips(self, video_path, clips, video_id, audio_path=None):
         output_dir = os.path.join(self.output_dir, video_id)
         os.makedirs(output_dir, exist_ok=True)
-        results = []
-        for clip in clips:
+        def extract(clip):
             clip_id = clip['id']
             output_path = os.path.join(output_dir, f"clip_{clip_id:03d}.mp4")
-            result = self.extract_clip(
+            create = lambda: self.extract_clip(
                 video_path,
                 clip['start_time'],
                 clip['end_time'],
                 output_path,
-                clip_id
+                clip_id,
+                audio_path=audio_path
             )
-            result['clip_id'] = clip_id
-            result['metadata'] = {
-                'title': f"Clip {clip_id}",
-                'description': clip.get('text_snippet', '')[:100],
-                'duration': result.get('duration', 0),
-                'score': clip.get('ai_score', 0)
-            }
-            results.append(result)
+            if self.cache is None:
+                return self._with_metadata(create(), clip)
+            # Main and web copy are cached together as one entry
+            start_time, end_time, _ = self._clip_range(clip['start_time'], clip['end_time'],
+                                                       get_media_info(video_path).duration)
+            key = self.cache.make_key(video_path, 'clip', start_time, end_time,
+                                      {'audio': os.path.basename(audio_path) if audio_path else 'source'})
+            dests = {'clip.mp4': output_path, 'clip_web.mp4': output_path.replace('.mp4', '_web.mp4')}
+            result = self.cache.fetch(key, dests)
+            if result is not None:
+                return self._with_metadata({**result, 'path': output_path, 'web_path': dests['clip_web.mp4']}, clip)
+            result = create()
+            if result['success']:
+                self.cache.store(key, dests, result)
+            return self._with_metadata(result, clip)
+        return self.executor.map(extract, clips)
+    
+    def _with_metadata(self, result, clip):
+        clip_id = clip['id']
+        result['clip_id'] = clip_id
+        result['metadata'] = {
+            'title': f"Clip {clip_id}",
+            'description': clip.get('text_snippet', '')[:100],
+            'duration': result.get('duration', 0),
+            'score': clip.get('ai_score', 0)
+        }
+        return result
+    
+    def output_specs(self, clips, video_id, media=None):
+        # Outputs for the render planner: the main clip and its vertical web copy
+        output_dir = os.path.join(self.output_dir, video_id)
+        os.makedirs(output_dir, exist_ok=True)
+        limit = media.duration if media else None
+        specs = []
+        for clip in clips:
+            start_time, end_time, _ = self._clip_range(clip['start_time'], clip['end_time'], limit)
+            output_path = os.path.join(output_dir, f"clip_{clip['id']:03d}.mp4")
+            specs.append(OutputSpec(('clip', clip['id']), output_path, start_time, end_time, MAIN_PROFILE))
+            specs.append(OutputSpec(('clip_web', clip['id']), output_path.replace('.mp4', '_web.mp4'),
+                                    start_time, end_time, WEB_PROFILE))
+        return specs
+    
+    def preview_specs(self, clips, video_id, media=None):
+        # Low-resolution ultrafast stand-ins for the main clip, published
+        # while the final renditions are still queued. They keep the main
+        # clip's full frame and are only ever scaled down.
+        output_dir = os.path.join(self.output_dir, video_id)
+        os.makedirs(output_dir, exist_ok=True)
+        limit = media.duration if media else None
+        profile = PREVIEW_PROFILE
+        size = media.display_size if media else None
+        if size and size[1] < profile.height:
+            profile = replace(profile, height=size[1] - size[1] % 2)
+        specs = []
+        for clip in clips:
+            start_time, end_time, _ = self._clip_range(clip['start_time'], clip['end_time'], limit)
+            output_path = os.path.join(output_dir, f"clip_{clip['id']:03d}_preview.mp4")
+            specs.append(OutputSpec(('clip', clip['id']), output_path, start_time, end_time, profile))
+        return specs
+    
+    def collect_results(self, clips, rendered, media=None):
+        limit = media.duration if media else None
+        results = []
+        for clip in clips:
+            start_time, end_time, duration = self._clip_range(clip['start_time'], clip['end_time'], limit)
+            main = rendered.get(('clip', clip['id']), {'success': False, 'path': None})
+            web = rendered.get(('clip_web', clip['id']), {})
+            if main['success']:
+                result = {
+                    'success': True,
+                    'path': main['path'],
+                    'web_path': web.get('path') or main['path'],
+                    'duration': duration,
+                    'start': start_time,
+                    'end': end_time
+                }
+            else:
+                result = {'success': False, 'error': main.get('error'), 'path': None}
+            results.append(self._with_metadata(result, clip))
         return results
-	
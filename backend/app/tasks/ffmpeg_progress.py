@@ -0,0 +1,196 @@
+import json
+import os
+import socket
+import threading
+import time
+
+import numpy as np
+
+from app.tasks.process_supervisor import get_supervisor
+
+ENCODE_STATS_DIR = os.getenv("ENCODE_STATS_DIR", "./stats")
+
+
+def speed_summary(speeds):
+    samples = np.asarray(speeds, dtype=np.float64)
+    if not samples.size:
+        return {'samples': 0}
+    return {
+        'samples': int(samples.size),
+        'mean': round(float(samples.mean()), 3),
+        'p10': round(float(np.percentile(samples, 10)), 3),
+        'p50': round(float(np.percentile(samples, 50)), 3),
+        'p90': round(float(np.percentile(samples, 90)), 3)
+    }
+
+
+def with_progress(cmd):
+    # Machine-readable key=value blocks on stdout, ending in progress=...
+    return [cmd[0], '-progress', 'pipe:1', '-nostats', *cmd[1:]]
+
+
+def _parse_speed(value):
+    value = value.strip().rstrip('x')
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+def _parse_block(block):
+    out_us = block.get('out_time_us') or block.get('out_time_ms')
+    try:
+        out_time = max(0.0, int(out_us) / 1_000_000) if out_us not in (None, 'N/A') else None
+    except ValueError:
+        out_time = None
+    try:
+        fps = float(block.get('fps', 'nan'))
+    except ValueError:
+        fps = None
+    return {
+        'out_time': out_time,
+        'speed': _parse_speed(block.get('speed', 'N/A')),
+        'fps': fps if fps == fps else None,
+        'frame': int(block['frame']) if block.get('frame', '').isdigit() else None,
+        'done': block.get('progress') == 'end'
+    }
+
+
+def run_with_progress(cmd, on_progress=None, timeout=None):
+    # Like a supervised ffmpeg run, calling on_progress(sample) for every
+    # progress block ffmpeg writes
+    block = {}
+
+    def on_line(raw):
+        key, _, value = raw.decode(errors='replace').strip().partition('=')
+        block[key] = value
+        if key == 'progress':
+            if on_progress:
+                on_progress(_parse_block(block))
+            block.clear()
+    return get_supervisor().run(with_progress(cmd), timeout=timeout, on_stdout_line=on_line)
+
+
+class ProgressTracker:
+    def __init__(self, report=None, min_interval=1.0):
+        self.report = report
+        self.min_interval = min_interval
+        self.started = time.time()
+        self.jobs = {}
+        self.outputs = {}
+        self.speed_samples = []
+        self._last_report = 0.0
+        self._lock = threading.Lock()
+
+    def add(self, name, duration, outputs=()):
+        # outputs: (clip_id, output name, offset, duration) of every file the
+        # job produces, with the offset measured from the start of the job
+        with self._lock:
+            self.jobs[name] = {'duration': duration, 'out_time': 0.0, 'speed': None, 'fps': None, 'done': False}
+            for clip_id, output, offset, output_duration in outputs:
+                self.outputs.setdefault(clip_id, {})[output] = {
+                    'job': name, 'offset': offset, 'duration': output_duration
+                }
+
+    def callback(self, name):
+        return lambda sample: self.update(name, sample)
+
+    def update(self, name, sample):
+        with self._lock:
+            job = self.jobs[name]
+            if sample['out_time'] is not None:
+                job['out_time'] = min(sample['out_time'], job['duration'])
+            job['speed'] = sample['speed']
+            job['fps'] = sample['fps']
+            if sample['done']:
+                job['done'] = True
+                job['out_time'] = job['duration']
+            if sample['speed']:
+                self.speed_samples.append(sample['speed'])
+            now = time.time()
+            due = sample['done'] or now - self._last_report >= self.min_interval
+            if due:
+                self._last_report = now
+        if due and self.report:
+            self.report(self.snapshot())
+
+    def _clip_progress(self, outputs, throughput):
+        # A job decodes its range once, front to back, so an output is as far
+        # along as the job's position past the output's offset
+        done = 0.0
+        total = 0.0
+        remaining = 0.0
+        percents = {}
+        for output, entry in outputs.items():
+            job = self.jobs[entry['job']]
+            out_time = entry['duration'] if job['done'] else \
+                min(max(job['out_time'] - entry['offset'], 0.0), entry['duration'])
+            done += out_time
+            total += entry['duration']
+            percents[output] = round(100 * out_time / entry['duration'], 1) if entry['duration'] else 100.0
+            if not job['done']:
+                # Wall time until this job's decode reaches the output's end
+                speed = job['speed'] or throughput
+                left = entry['offset'] + entry['duration'] - job['out_time']
+                remaining = max(remaining, left / speed if speed else float('inf'))
+        return {
+            'percent': round(100 * done / total, 1) if total else 100.0,
+            'eta_seconds': round(remaining, 1) if remaining != float('inf') else None,
+            'outputs': percents
+        }
+
+    def snapshot(self):
+        with self._lock:
+            total = sum(job['duration'] for job in self.jobs.values())
+            done = sum(job['out_time'] for job in self.jobs.values())
+            elapsed = time.time() - self.started
+            # Media seconds finished per wall second so far, across all jobs
+            throughput = done / elapsed if elapsed > 0 else 0
+            return {
+                'percent': round(100 * done / total, 1) if total else 100.0,
+                'eta_seconds': round((total - done) / throughput, 1) if throughput > 0 else None,
+                'elapsed_seconds': round(elapsed, 1),
+                'jobs': {
+                    name: {
+                        **job,
+                        'percent': round(100 * job['out_time'] / job['duration'], 1) if job['duration'] else 100.0
+                    }
+                    for name, job in self.jobs.items()
+                },
+                'clips': {
+                    clip_id: self._clip_progress(outputs, throughput)
+                    for clip_id, outputs in sorted(self.outputs.items())
+                }
+            }
+
+    def speed_stats(self):
+        with self._lock:
+            return speed_summary(self.speed_samples)
+
+
+def record_speed_samples(samples, stats_dir=ENCODE_STATS_DIR, node=None):
+    # One JSON line per job, one file per node
+    node = node or socket.gethostname()
+    os.makedirs(stats_dir, exist_ok=True)
+    with open(os.path.join(stats_dir, f"{node}.jsonl"), 'a') as f:
+        f.write(json.dumps({'time': time.time(), 'node': node, 'speeds': samples}) + "\n")
+
+
+def node_throughput(stats_dir=ENCODE_STATS_DIR):
+    # Encode speed (x real time) percentiles per node from recorded samples
+    stats = {}
+    if not os.path.isdir(stats_dir):
+        return stats
+    for name in sorted(os.listdir(stats_dir)):
+        if not name.endswith('.jsonl'):
+            continue
+        speeds = []
+        with open(os.path.join(stats_dir, name)) as f:
+            for line in f:
+                try:
+                    speeds.extend(json.loads(line)['speeds'])
+                except (ValueError, KeyError):
+                    continue
+        if speeds:
+            stats[name[:-len('.jsonl')]] = speed_summary(speeds)
+    return stats
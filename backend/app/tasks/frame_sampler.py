@@ -0,0 +1,111 @@
+import os
+
+import numpy as np
+
+from app.tasks.media_executor import with_threads
+from app.tasks.media_probe import get_media_info
+from app.tasks.process_supervisor import get_supervisor
+
+SAMPLE_STEP = 0.5                                                   # seconds between candidate frames
+SAMPLE_WIDTH = int(os.getenv("THUMBNAIL_SAMPLE_WIDTH", "640"))      # decode width for scoring
+# Candidates further apart than this are read by separate seeks: decoding
+# through a long gap costs more than one seek to the next keyframe
+MAX_GAP = float(os.getenv("THUMBNAIL_SAMPLE_MAX_GAP", "10"))
+
+
+def grid_point(t):
+    return max(0, int(round(t / SAMPLE_STEP)))
+
+
+def _read_exactly(pipe, buffer):
+    view = memoryview(buffer)
+    filled = 0
+    while filled < len(buffer):
+        n = pipe.readinto(view[filled:])
+        if not n:
+            return False
+        filled += n
+    return True
+
+
+def _spans(grid_points, max_gap):
+    # Sorted grid indices -> runs that are each read in one forward pass
+    spans = []
+    for point in grid_points:
+        if spans and (point - spans[-1][-1]) * SAMPLE_STEP <= max_gap:
+            spans[-1].append(point)
+        else:
+            spans.append([point])
+    return spans
+
+
+class FrameSampler:
+    def __init__(self, width=SAMPLE_WIDTH, max_gap=MAX_GAP, skip_nonref=True, threads=1):
+        self.width = width
+        self.max_gap = max_gap
+        self.skip_nonref = skip_nonref
+        self.threads = threads
+
+    def _frame_size(self, video_path, width):
+        media = get_media_info(video_path)
+        if not media.display_size:
+            raise ValueError(f"{os.path.basename(video_path)} has no video stream")
+        src_width, src_height = media.display_size
+        duration = media.duration
+        if not width or width >= src_width:
+            return src_width, src_height, duration
+        # Even dimensions, as most scalers and pixel formats want
+        return width, max(2, int(round(src_height * width / src_width / 2)) * 2), duration
+
+    def sample(self, video_path, timestamps, on_frame):
+        # Calls on_frame(time, frame) for every requested timestamp, in time
+        # order. Timestamps are snapped to a SAMPLE_STEP grid and read in
+        # ascending order, one ffmpeg pass per run of nearby candidates,
+        # instead of a random seek per frame. frame is a BGR NumPy view
+        # into a reused buffer: copy it to keep it past the callback.
+        width, height, duration = self._frame_size(video_path, self.width)
+        last = int(duration / SAMPLE_STEP) if duration else None
+        points = sorted({grid_point(t) for t in timestamps})
+        if last is not None:
+            points = [p for p in points if p <= last]
+        for span in _spans(points, self.max_gap):
+            self._read_span(video_path, span, width, height, on_frame)
+        return len(points)
+
+    def _read_span(self, video_path, span, width, height, on_frame):
+        start = span[0] * SAMPLE_STEP
+        wanted = set(span)
+        filters = [f'fps={1 / SAMPLE_STEP:g}']
+        if self.width:
+            filters.append(f'scale={width}:{height}')
+        cmd = ['ffmpeg', '-nostdin', '-v', 'error']
+        if self.skip_nonref:
+            # B-frames nobody references are never decoded; fps= fills the
+            # grid from the nearest decoded frame
+            cmd += ['-skip_frame', 'noref']
+        cmd += [
+            '-ss', f'{start:.3f}', '-t', f'{(span[-1] - span[0] + 1) * SAMPLE_STEP:.3f}', '-i', video_path,
+            '-map', '0:V:0', '-an', '-vf', ','.join(filters),
+            '-f', 'rawvideo', '-pix_fmt', 'bgr24', 'pipe:1'
+        ]
+        buffer = bytearray(width * height * 3)
+        frame = np.frombuffer(buffer, dtype=np.uint8).reshape(height, width, 3)
+
+        def read(pipe):
+            point = span[0]
+            while point <= span[-1] and _read_exactly(pipe, buffer):
+                if point in wanted:
+                    on_frame(point * SAMPLE_STEP, frame)
+                point += 1
+            # Drain whatever the grid rounding left over
+            while pipe.read(65536):
+                pass
+
+        get_supervisor().run(with_threads(cmd, self.threads), stdout_reader=read)
+
+    def read_frame(self, video_path, time, width=None):
+        # One accurately seeked frame, at full resolution unless width is set
+        frames = []
+        sampler = FrameSampler(width=width, max_gap=0, skip_nonref=False, threads=self.threads)
+        sampler.sample(video_path, [time], lambda t, frame: frames.append(frame.copy()))
+        return frames[0] if frames else None
@@ -0,0 +1,106 @@
+from bisect import bisect_right
+from collections import deque
+
+
+def build_candidates(segments, min_duration=60, max_duration=120, max_gap=10):
+    # One candidate per starting segment: the longest run of following
+    # segments that stays under max_duration without a gap of max_gap or
+    # more. Ends are sorted, so the right edge is found by bisection.
+    segments = sorted(segments, key=lambda s: s["start"])
+    n = len(segments)
+    if n == 0:
+        return segments, []
+    starts = [s["start"] for s in segments]
+    ends = [s["end"] for s in segments]
+    scores = [s["score"] for s in segments]
+
+    run_end = [0] * n
+    run_end[-1] = n - 1
+    for i in range(n - 2, -1, -1):
+        run_end[i] = run_end[i + 1] if starts[i + 1] - ends[i] < max_gap else i
+
+    prefix = [0.0]
+    for score in scores:
+        prefix.append(prefix[-1] + score)
+
+    candidates = []
+    window_max = deque()
+    j_prev = -1
+    for i in range(n):
+        j = min(bisect_right(ends, starts[i] + max_duration) - 1, run_end[i])
+        while window_max and window_max[0] < i:
+            window_max.popleft()
+        for k in range(max(j_prev + 1, i), j + 1):
+            while window_max and scores[window_max[-1]] <= scores[k]:
+                window_max.pop()
+            window_max.append(k)
+        j_prev = j
+        if j < i or ends[j] - starts[i] < min_duration:
+            continue
+        candidates.append({
+            "first": i,
+            "last": j,
+            "start": starts[i],
+            "end": ends[j],
+            "weight": prefix[j + 1] - prefix[i],
+            "score": scores[window_max[0]]
+        })
+    return segments, candidates
+
+
+def schedule(candidates, max_clips=None):
+    # Weighted interval scheduling over candidates sorted by end time, with
+    # an optional cap on how many intervals are chosen. Predecessors come
+    # from bisection, so the whole pass is O(m log m + k * m).
+    if not candidates:
+        return []
+    candidates = sorted(candidates, key=lambda c: c["end"])
+    m = len(candidates)
+    ends = [c["end"] for c in candidates]
+    pred = [bisect_right(ends, c["start"]) for c in candidates]
+    limit = max_clips if max_clips is not None else m
+
+    previous = [0.0] * (m + 1)
+    layers = []
+    for _ in range(limit):
+        best = [0.0] * (m + 1)
+        took = [False] * (m + 1)
+        for c in range(1, m + 1):
+            with_c = candidates[c - 1]["weight"] + previous[pred[c - 1]]
+            if with_c > best[c - 1]:
+                best[c] = with_c
+                took[c] = True
+            else:
+                best[c] = best[c - 1]
+        if best[m] <= previous[m]:
+            break
+        layers.append(took)
+        previous = best
+
+    chosen = []
+    c = m
+    for took in reversed(layers):
+        while c > 0 and not took[c]:
+            c -= 1
+        if c == 0:
+            break
+        chosen.append(candidates[c - 1])
+        c = pred[c - 1]
+    chosen.reverse()
+    return chosen
+
+
+def select_highlights(segments, min_duration=60, max_duration=120, max_clips=5, max_gap=10):
+    segments, candidates = build_candidates(segments, min_duration, max_duration, max_gap)
+    clips = []
+    for cand in schedule(candidates, max_clips):
+        run = segments[cand["first"]:cand["last"] + 1]
+        clips.append({
+            "start": cand["start"],
+            "end": cand["end"],
+            "duration": cand["end"] - cand["start"],
+            "text": " ".join(seg["text"] for seg in run),
+            "score": cand["score"]
+        })
+    clips.sort(key=lambda c: c["score"], reverse=True)
+    return clips
@@ -0,0 +1,13 @@
+from bisect import bisect_right
+
+
+class KeyframeIndex:
+    # Keyframe timestamps come from the cached media probe (MediaInfo.keyframe_index)
+    def __init__(self, times):
+        self.times = sorted(times)
+
+    def snap(self, t, tolerance=0.5):
+        # Nearest keyframe within tolerance of t, or None
+        i = bisect_right(self.times, t)
+        nearby = [k for k in self.times[max(0, i - 1):i + 1] if abs(k - t) <= tolerance]
+        return min(nearby, key=lambda k: abs(k - t)) if nearby else None
@@ -0,0 +1,112 @@
+import json
+import os
+
+import numpy as np
+
+from app.tasks.audio_ingest import SAMPLE_RATE, load_pcm
+
+# ITU-R BS.1770 K-weighting, as the two 48 kHz biquads from the standard.
+# Their response is evaluated at the PCM's frequencies and applied to each
+# frame's power spectrum (Parseval), so no sample-by-sample IIR runs.
+_SHELF = ([1.53512485958697, -2.69169618940638, 1.19839281085285], [1.0, -1.69065929318241, 0.73248077421585])
+_HIGHPASS = ([1.0, -2.0, 1.0], [1.0, -1.99004745483398, 0.99007225036621])
+
+HOP = SAMPLE_RATE // 10               # 100 ms energy frames
+BLOCK_HOPS = 4                        # 400 ms gating blocks, 75% overlap
+ABSOLUTE_GATE = -70.0
+RELATIVE_GATE = -10.0
+
+
+def _k_weighting_power(n_fft):
+    freqs = np.fft.rfftfreq(n_fft, d=1.0 / SAMPLE_RATE)
+    z = np.exp(-2j * np.pi * freqs / 48000)
+    response = np.ones_like(z)
+    for b, a in (_SHELF, _HIGHPASS):
+        response *= np.polyval(b[::-1], z) / np.polyval(a[::-1], z)
+    return np.abs(response) ** 2
+
+
+def frame_energies(pcm, block_seconds=60):
+    # K-weighted mean square per 100 ms frame, streamed over the memmap
+    weights = _k_weighting_power(HOP)
+    n_frames = len(pcm) // HOP
+    energies = np.zeros(n_frames, dtype=np.float64)
+    block = block_seconds * SAMPLE_RATE
+    for offset in range(0, n_frames * HOP, block):
+        x = np.asarray(pcm[offset:min(offset + block, n_frames * HOP)], dtype=np.float64)
+        frames = x.reshape(-1, HOP)
+        power = np.abs(np.fft.rfft(frames, axis=1)) ** 2
+        power[:, 1:-1] *= 2  # one-sided spectrum
+        first = offset // HOP
+        energies[first:first + len(frames)] = (power @ weights) / (HOP * HOP)
+    return energies
+
+
+def _lufs(mean_square):
+    return -0.691 + 10 * np.log10(np.maximum(mean_square, 1e-12))
+
+
+def integrated_loudness(energies):
+    # Gated integrated loudness over 400 ms blocks built from the 100 ms frames
+    if len(energies) < BLOCK_HOPS:
+        return None
+    cumulative = np.concatenate(([0.0], np.cumsum(energies)))
+    blocks = (cumulative[BLOCK_HOPS:] - cumulative[:-BLOCK_HOPS]) / BLOCK_HOPS
+    blocks = blocks[_lufs(blocks) > ABSOLUTE_GATE]
+    if not len(blocks):
+        return None
+    relative = _lufs(blocks.mean()) + RELATIVE_GATE
+    gated = blocks[_lufs(blocks) > relative]
+    return float(_lufs(gated.mean()))
+
+
+def range_loudness(energies, start, end):
+    first = max(0, int(start * SAMPLE_RATE) // HOP)
+    last = min(len(energies), int(np.ceil(end * SAMPLE_RATE / HOP)))
+    return integrated_loudness(energies[first:last])
+
+
+def sample_peak_db(pcm, block_seconds=60):
+    block = block_seconds * SAMPLE_RATE
+    peak = 0.0
+    for offset in range(0, len(pcm), block):
+        chunk = np.asarray(pcm[offset:offset + block])
+        if len(chunk):
+            peak = max(peak, float(np.abs(chunk).max()))
+    return float(20 * np.log10(max(peak, 1e-9)))
+
+
+def measure(pcm):
+    energies = frame_energies(pcm)
+    return energies, {
+        'integrated_lufs': integrated_loudness(energies),
+        'peak_db': sample_peak_db(pcm)
+    }
+
+
+def load_or_measure(pcm_path):
+    # Measured once per video; the summary and the 100 ms energies are kept
+    # next to the PCM so later range measurements need no audio at all
+    summary_path = pcm_path + ".loudness.json"
+    energies_path = pcm_path + ".loudness.npy"
+    if os.path.exists(summary_path) and os.path.exists(energies_path):
+        with open(summary_path, 'r') as f:
+            return np.load(energies_path), json.load(f)
+    energies, summary = measure(load_pcm(pcm_path))
+    np.save(energies_path, energies)
+    tmp_path = f"{summary_path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(summary, f)
+    os.replace(tmp_path, summary_path)
+    return energies, summary
+
+
+def normalisation_gain(summary, target_lufs=-14.0, peak_ceiling_db=-1.5, max_gain_db=20.0):
+    # One linear gain for the whole track: reach the target unless that
+    # would push the peak over the ceiling. The 16 kHz PCM under-reads
+    # inter-sample peaks, hence the conservative ceiling.
+    if summary.get('integrated_lufs') is None:
+        return 0.0
+    gain = target_lufs - summary['integrated_lufs']
+    gain = min(gain, peak_ceiling_db - summary['peak_db'], max_gain_db)
+    return round(float(gain), 2)
@@ -0,0 +1,131 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from app.tasks.process_supervisor import get_supervisor
+
+
+def worker_processes():
+    # Pool size the Celery parent recorded before forking (see
+    # celery_app._record_pool_size); a process outside a worker has the node
+    return int(os.getenv("MEDIA_WORKER_PROCESSES", "0")) or 1
+
+
+def default_cpu_budget():
+    # MEDIA_CPU_BUDGET wins; otherwise split the node evenly between the
+    # Celery worker processes so they don't oversubscribe it together
+    budget = int(os.getenv("MEDIA_CPU_BUDGET", "0"))
+    if budget:
+        return budget
+    return max(1, (os.cpu_count() or 1) // worker_processes())
+
+
+def with_threads(cmd, threads):
+    # -threads is an output option, so it goes right before the output path
+    if not threads or cmd[0] != 'ffmpeg':
+        return cmd
+    return [*cmd[:-1], '-threads', str(threads), cmd[-1]]
+
+
+class MediaExecutor:
+    def __init__(self, cpu_budget=None, job_threads=None):
+        self.cpu_budget = cpu_budget or default_cpu_budget()
+        # Few threads per encode and many encodes in flight scales better
+        # than one wide encode, since x264 stops scaling well past ~4 threads
+        self.job_threads = min(self.cpu_budget, job_threads or int(os.getenv("FFMPEG_JOB_THREADS", "0"))
+                               or max(1, min(4, self.cpu_budget // 4)))
+        self._pool = ThreadPoolExecutor(max_workers=self.cpu_budget, thread_name_prefix="media")
+        self._cond = threading.Condition()
+        self._in_use = 0
+        self._running = 0
+        self._waiting = 0
+        self._completed = 0
+        self._busy_cpu_seconds = 0.0
+        self._started = time.time()
+        self._last_change = self._started
+
+    def _account(self):
+        now = time.time()
+        self._busy_cpu_seconds += self._in_use * (now - self._last_change)
+        self._last_change = now
+
+    @contextmanager
+    def reserve(self, threads=None):
+        # Blocks until `threads` CPUs of the budget are free and yields the
+        # number granted; requests larger than the budget get all of it
+        threads = max(1, min(threads or self.job_threads, self.cpu_budget))
+        with self._cond:
+            self._waiting += 1
+            while self._in_use + threads > self.cpu_budget:
+                self._cond.wait()
+            self._waiting -= 1
+            self._account()
+            self._in_use += threads
+            self._running += 1
+        try:
+            yield threads
+        finally:
+            with self._cond:
+                self._account()
+                self._in_use -= threads
+                self._running -= 1
+                self._completed += 1
+                self._cond.notify_all()
+
+    def call(self, fn, *args, threads=None, **kwargs):
+        with self.reserve(threads):
+            return fn(*args, **kwargs)
+
+    def run(self, cmd, threads=None):
+        with self.reserve(threads) as granted:
+            return get_supervisor().run(with_threads(cmd, granted))
+
+    def submit(self, fn, *args, threads=None, **kwargs):
+        with self._cond:
+            self._waiting += 1
+
+        def job():
+            with self._cond:
+                self._waiting -= 1
+            return self.call(fn, *args, threads=threads, **kwargs)
+        return self._pool.submit(job)
+
+    def spawn(self, fn, *args, **kwargs):
+        # Runs fn on the pool without reserving CPUs, for coordinating work
+        # that reserves its own share around each ffmpeg call
+        return self._pool.submit(fn, *args, **kwargs)
+
+    def map(self, fn, items, threads=None):
+        # Results come back in input order; the first exception is re-raised
+        futures = [self.submit(fn, item, threads=threads) for item in items]
+        return [future.result() for future in futures]
+
+    def metrics(self):
+        with self._cond:
+            self._account()
+            elapsed = max(self._last_change - self._started, 1e-9)
+            return {
+                "cpu_budget": self.cpu_budget,
+                "job_threads": self.job_threads,
+                "queue_depth": self._waiting,
+                "running": self._running,
+                "cpus_in_use": self._in_use,
+                "completed": self._completed,
+                "utilisation": round(self._in_use / self.cpu_budget, 3),
+                "avg_utilisation": round(self._busy_cpu_seconds / (elapsed * self.cpu_budget), 3)
+            }
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_media_executor():
+    # One executor per worker process, shared by every media processor
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = MediaExecutor()
+        return _executor
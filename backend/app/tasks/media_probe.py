@@ -0,0 +1,254 @@
+import json
+import os
+import threading
+from dataclasses import asdict, dataclass
+from typing import Optional, Tuple
+
+from app.tasks.keyframes import KeyframeIndex
+from app.tasks.process_supervisor import SupervisedProcessError, get_supervisor
+
+# Bump when MediaInfo changes fields, so older sidecars are re-probed
+PROBE_VERSION = 3
+PROBE_TIMEOUT = float(os.getenv("PROBE_TIMEOUT_SECONDS", "30"))
+
+
+class MediaProbeError(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class StreamInfo:
+    index: int
+    codec_type: str
+    codec_name: Optional[str] = None
+    profile: Optional[str] = None
+    pix_fmt: Optional[str] = None
+    width: Optional[int] = None
+    height: Optional[int] = None
+    fps: Optional[float] = None
+    rotation: int = 0
+    sample_rate: Optional[int] = None
+    channels: Optional[int] = None
+    duration: Optional[float] = None
+    bit_rate: Optional[int] = None
+    # Cover art: a still image muxed as a video stream
+    attached_pic: bool = False
+
+
+@dataclass(frozen=True)
+class MediaInfo:
+    path: str
+    size: int
+    mtime: float
+    duration: float
+    format_name: Optional[str] = None
+    bit_rate: Optional[int] = None
+    streams: Tuple[StreamInfo, ...] = ()
+
+    @property
+    def video(self):
+        return next((s for s in self.streams if s.codec_type == 'video' and not s.attached_pic), None)
+
+    @property
+    def audio(self):
+        return next((s for s in self.streams if s.codec_type == 'audio'), None)
+
+    @property
+    def has_audio(self):
+        return self.audio is not None
+
+    @property
+    def fps(self):
+        return self.video.fps if self.video else None
+
+    @property
+    def frame_count(self):
+        # From the average rate, so it holds for variable frame rate files too
+        return int(round(self.duration * self.fps)) if self.fps else 0
+
+    @property
+    def display_size(self):
+        # Decoded frames are auto-rotated, so a 90° phone video is portrait
+        if not self.video or not self.video.width:
+            return None
+        if self.video.rotation % 180:
+            return self.video.height, self.video.width
+        return self.video.width, self.video.height
+
+    def keyframe_index(self):
+        # Scanned on first use, not at probe time: only stream copy needs it
+        return KeyframeIndex(get_keyframes(self.path) if self.video else ())
+
+    def to_dict(self):
+        return {**asdict(self), 'version': PROBE_VERSION}
+
+    @classmethod
+    def from_dict(cls, data):
+        data = {k: v for k, v in data.items() if k != 'version'}
+        data['streams'] = tuple(StreamInfo(**s) for s in data['streams'])
+        return cls(**data)
+
+
+def _rate(value):
+    num, _, den = (value or '').partition('/')
+    try:
+        return float(num) / float(den or 1) if float(den or 1) else None
+    except ValueError:
+        return None
+
+
+def _number(value, kind=float):
+    try:
+        return kind(value) if value not in (None, '', 'N/A') else None
+    except ValueError:
+        return None
+
+
+def _rotation(stream):
+    for side_data in stream.get('side_data_list', []):
+        if 'rotation' in side_data:
+            return int(-float(side_data['rotation'])) % 360
+    return int(_number(stream.get('tags', {}).get('rotate'), float) or 0) % 360
+
+
+def _stream_info(stream):
+    fps = _rate(stream.get('avg_frame_rate')) or _rate(stream.get('r_frame_rate'))
+    return StreamInfo(
+        index=stream['index'],
+        codec_type=stream.get('codec_type'),
+        codec_name=stream.get('codec_name'),
+        profile=stream.get('profile'),
+        pix_fmt=stream.get('pix_fmt'),
+        width=stream.get('width'),
+        height=stream.get('height'),
+        fps=round(fps, 3) if fps and stream.get('codec_type') == 'video' else None,
+        rotation=_rotation(stream) if stream.get('codec_type') == 'video' else 0,
+        sample_rate=_number(stream.get('sample_rate'), int),
+        channels=stream.get('channels'),
+        duration=_number(stream.get('duration')),
+        bit_rate=_number(stream.get('bit_rate'), int),
+        attached_pic=bool(stream.get('disposition', {}).get('attached_pic'))
+    )
+
+
+def scan_keyframes(video_path):
+    # Packet flags come straight from the demuxer, so no frame is decoded,
+    # but every packet of the file is read. V skips cover art.
+    cmd = [
+        'ffprobe', '-v', 'error', '-select_streams', 'V:0',
+        '-show_entries', 'packet=pts_time,flags',
+        '-of', 'csv=p=0', video_path
+    ]
+    times = []
+
+    def on_line(line):
+        pts_time, _, flags = line.decode().partition(',')
+        if 'K' in flags and pts_time not in ('', 'N/A'):
+            times.append(float(pts_time))
+
+    try:
+        get_supervisor().run(cmd, on_stdout_line=on_line)
+    except SupervisedProcessError as e:
+        if e.reason != 'exit':
+            raise
+        raise MediaProbeError(f"Could not read packets of {os.path.basename(video_path)}") from e
+    return tuple(sorted(times))
+
+
+def probe_media(video_path):
+    # Container and streams only: cheap enough for the upload request. It
+    # runs supervised, so a file that makes ffprobe hang is killed after
+    # PROBE_TIMEOUT and rejected like any other unreadable upload.
+    cmd = ['ffprobe', '-v', 'error', '-show_format', '-show_streams', '-of', 'json', video_path]
+    try:
+        info = json.loads(get_supervisor().run(cmd, timeout=PROBE_TIMEOUT, capture_stdout=True).stdout)
+    except SupervisedProcessError as e:
+        if e.reason == 'cancelled':
+            raise
+        raise MediaProbeError(f"Could not probe {os.path.basename(video_path)}") from e
+    except ValueError as e:
+        raise MediaProbeError(f"Could not probe {os.path.basename(video_path)}") from e
+    fmt = info.get('format', {})
+    streams = tuple(_stream_info(s) for s in info.get('streams', []))
+    duration = _number(fmt.get('duration')) or max((s.duration or 0 for s in streams), default=0)
+    stat = os.stat(video_path)
+    return MediaInfo(
+        path=video_path,
+        size=stat.st_size,
+        mtime=stat.st_mtime,
+        duration=duration,
+        format_name=fmt.get('format_name'),
+        bit_rate=_number(fmt.get('bit_rate'), int),
+        streams=streams
+    )
+
+
+_memo = {}
+_keyframe_memo = {}
+_memo_lock = threading.Lock()
+
+
+def _read_sidecar(sidecar, stat):
+    # The cached dict, or None when missing, stale or unreadable
+    try:
+        with open(sidecar, 'r') as f:
+            cached = json.load(f)
+        if cached.get('version') == PROBE_VERSION and \
+                cached['size'] == stat.st_size and cached['mtime'] == stat.st_mtime:
+            return cached
+    except (OSError, ValueError, KeyError, TypeError, AttributeError):
+        pass
+    return None
+
+
+def _write_sidecar(sidecar, data):
+    tmp_path = f"{sidecar}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f)
+    os.replace(tmp_path, sidecar)
+
+
+def get_media_info(video_path):
+    # Probed once per upload: cached next to it in a sidecar (invalidated
+    # when the file changes) and in memory for the rest of the process
+    stat = os.stat(video_path)
+    memo_key = (os.path.abspath(video_path), stat.st_size, stat.st_mtime)
+    with _memo_lock:
+        if memo_key in _memo:
+            return _memo[memo_key]
+    sidecar = f"{video_path}.probe.json"
+    cached = _read_sidecar(sidecar, stat)
+    media = None
+    if cached is not None:
+        try:
+            media = MediaInfo.from_dict({**cached, 'path': video_path})
+        except (KeyError, TypeError):
+            pass
+    if media is None:
+        media = probe_media(video_path)
+        _write_sidecar(sidecar, media.to_dict())
+    with _memo_lock:
+        _memo[memo_key] = media
+    return media
+
+
+def get_keyframes(video_path):
+    # Keyframe timestamps of the first video stream, scanned in the worker
+    # the first time stream copy asks and cached like the probe
+    stat = os.stat(video_path)
+    memo_key = (os.path.abspath(video_path), stat.st_size, stat.st_mtime)
+    with _memo_lock:
+        if memo_key in _keyframe_memo:
+            return _keyframe_memo[memo_key]
+    sidecar = f"{video_path}.keyframes.json"
+    cached = _read_sidecar(sidecar, stat)
+    if cached is not None and isinstance(cached.get('keyframes'), list):
+        keyframes = tuple(cached['keyframes'])
+    else:
+        keyframes = scan_keyframes(video_path)
+        _write_sidecar(sidecar, {
+            'version': PROBE_VERSION, 'size': stat.st_size, 'mtime': stat.st_mtime, 'keyframes': keyframes
+        })
+    with _memo_lock:
+        _keyframe_memo[memo_key] = keyframes
+    return keyframes
@@ -0,0 +1,255 @@
+import os
+import re
+import resource
+import signal
+import subprocess
+import threading
+from collections import deque
+
+RUN_DIR = os.getenv("SUPERVISOR_RUN_DIR", "./run/media")
+DEFAULT_TIMEOUT = float(os.getenv("MEDIA_JOB_TIMEOUT_SECONDS", "1800"))
+DEFAULT_CPU_SECONDS = int(os.getenv("MEDIA_JOB_CPU_SECONDS", "0")) or None
+STDERR_LINES = int(os.getenv("MEDIA_JOB_STDERR_LINES", "200"))
+STDERR_LINE_BYTES = 4096
+KILL_GRACE_SECONDS = 5.0
+
+_LINE_BREAK = re.compile(rb'[\r\n]')
+
+
+class SupervisedProcessError(subprocess.CalledProcessError):
+    # reason: 'exit', 'timeout', 'cpu_limit' or 'cancelled'
+    def __init__(self, returncode, cmd, stderr=None, reason='exit'):
+        super().__init__(returncode, cmd, stderr=stderr)
+        self.reason = reason
+
+    def __str__(self):
+        if self.reason == 'exit':
+            return super().__str__()
+        return f"Command '{self.cmd[0]}' stopped ({self.reason})"
+
+
+def _read_lines(stream, on_line, max_line=None):
+    # Splits on \r as well as \n: ffmpeg redraws its stats line with \r, and
+    # one "line" would otherwise grow for the whole run. max_line keeps only
+    # the tail of longer lines, which is only safe for diagnostics.
+    partial = b''
+    for chunk in iter(lambda: stream.read1(65536), b''):
+        parts = _LINE_BREAK.split(partial + chunk)
+        partial = parts.pop()
+        if max_line:
+            partial = partial[-max_line:]
+        for part in parts:
+            if part:
+                on_line(part)
+    if partial:
+        on_line(partial)
+
+
+class ProcessSupervisor:
+    def __init__(self, run_dir=RUN_DIR, stderr_lines=STDERR_LINES):
+        self.run_dir = run_dir
+        self.stderr_lines = stderr_lines
+        self._active = {}
+        self._lock = threading.Lock()
+        self._cancelled = None
+        self.counters = {
+            'started': 0, 'completed': 0, 'failed': 0,
+            'timeouts': 0, 'cpu_limit_kills': 0, 'cancelled_kills': 0, 'orphans_reaped': 0
+        }
+        os.makedirs(run_dir, exist_ok=True)
+
+    def _count(self, name):
+        with self._lock:
+            self.counters[name] += 1
+
+    def _pid_file(self, pgid):
+        # <worker pid>.<process group> so a restarted worker can find the
+        # groups a dead one left behind
+        return os.path.join(self.run_dir, f"{os.getpid()}.{pgid}")
+
+    def run(self, cmd, timeout=None, cpu_seconds=None, on_stdout_line=None, capture_stdout=False,
+            stdout_reader=None):
+        # subprocess.run(cmd, check=True) with a wall-clock timeout, an
+        # RLIMIT_CPU cap and the last stderr_lines lines of stderr kept.
+        # stdout_reader(pipe) consumes raw stdout (e.g. video frames) on a
+        # reader thread; run() returns once it has finished.
+        if self._cancelled:
+            raise SupervisedProcessError(-signal.SIGKILL, cmd, reason='cancelled')
+        timeout = timeout or DEFAULT_TIMEOUT
+        cpu_seconds = cpu_seconds or DEFAULT_CPU_SECONDS
+        wants_stdout = on_stdout_line is not None or capture_stdout or stdout_reader is not None
+        proc = subprocess.Popen(
+            cmd, stdin=subprocess.DEVNULL, stderr=subprocess.PIPE,
+            stdout=subprocess.PIPE if wants_stdout else subprocess.DEVNULL,
+            # Own process group, so the whole tree can be signalled at once
+            start_new_session=True
+        )
+
+        stderr = deque(maxlen=self.stderr_lines)
+        stdout = []
+        reader_errors = []
+        readers = [threading.Thread(target=_read_lines, args=(proc.stderr, stderr.append, STDERR_LINE_BYTES),
+                                    daemon=True)]
+        consumer = None
+        if stdout_reader is not None:
+            def consume():
+                try:
+                    stdout_reader(proc.stdout)
+                except BaseException as e:
+                    # Nothing drains the pipe any more, so don't leave ffmpeg blocked on it
+                    reader_errors.append(e)
+                    self._kill_group(proc)
+            consumer = threading.Thread(target=consume, daemon=True)
+            readers.append(consumer)
+        elif on_stdout_line is not None:
+            readers.append(threading.Thread(target=_read_lines, args=(proc.stdout, on_stdout_line), daemon=True))
+        elif capture_stdout:
+            # Read whole, not line by line: captured output is parsed (e.g.
+            # ffprobe's JSON), so it must come back byte for byte
+            readers.append(threading.Thread(target=lambda: stdout.append(proc.stdout.read()), daemon=True))
+        for reader in readers:
+            reader.start()
+
+        reason = 'exit'
+        interrupted = False
+        try:
+            # Everything after Popen runs inside the try, so a failure here
+            # still kills the group. Registering under the lock that cancel()
+            # holds means the group is either killed there or seen here.
+            with self._lock:
+                self._active[proc.pid] = proc
+                self.counters['started'] += 1
+                cancelled = self._cancelled
+            if cancelled:
+                self._count('cancelled_kills')
+                self._kill_group(proc)
+            else:
+                if cpu_seconds:
+                    resource.prlimit(proc.pid, resource.RLIMIT_CPU, (cpu_seconds, cpu_seconds + 5))
+                with open(self._pid_file(proc.pid), 'w') as f:
+                    f.write(_start_time(proc.pid) or '')
+                proc.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            reason = 'timeout'
+            self._count('timeouts')
+            self._kill_group(proc)
+        except BaseException:
+            # e.g. SoftTimeLimitExceeded raised into the wait, or a failed
+            # prlimit or pid-file write: the group must not outlive its
+            # registration
+            interrupted = True
+            self._count('cancelled_kills')
+            self._kill_group(proc)
+            raise
+        finally:
+            for reader in readers:
+                wait_for_consumer = reader is consumer and not interrupted
+                reader.join(timeout=None if wait_for_consumer else KILL_GRACE_SECONDS)
+            with self._lock:
+                self._active.pop(proc.pid, None)
+            try:
+                os.remove(self._pid_file(proc.pid))
+            except OSError:
+                pass
+
+        if reason == 'exit' and self._cancelled and proc.returncode < 0:
+            reason = 'cancelled'
+        elif reason == 'exit' and proc.returncode in (-signal.SIGXCPU, -signal.SIGKILL) and cpu_seconds:
+            reason = 'cpu_limit'
+            self._count('cpu_limit_kills')
+        if reader_errors:
+            self._count('failed')
+            raise reader_errors[0]
+        error = b'\n'.join(stderr)
+        if reason != 'exit' or proc.returncode:
+            self._count('failed')
+            raise SupervisedProcessError(proc.returncode, cmd, stderr=error, reason=reason)
+        self._count('completed')
+        return subprocess.CompletedProcess(cmd, proc.returncode, stdout=b''.join(stdout), stderr=error)
+
+    def _kill_group(self, proc):
+        for sig in (signal.SIGTERM, signal.SIGKILL):
+            try:
+                os.killpg(proc.pid, sig)
+            except ProcessLookupError:
+                return
+            try:
+                proc.wait(timeout=KILL_GRACE_SECONDS)
+                return
+            except subprocess.TimeoutExpired:
+                continue
+
+    def cancel(self, reason='cancelled'):
+        # Kills every running process tree; runs started afterwards fail
+        # immediately until reset()
+        with self._lock:
+            self._cancelled = reason
+            active = list(self._active.values())
+        for proc in active:
+            self._count('cancelled_kills')
+            self._kill_group(proc)
+
+    def reset(self):
+        self._cancelled = None
+
+    def reap_orphans(self):
+        # Kills process groups recorded by worker processes that no longer exist
+        for name in os.listdir(self.run_dir):
+            owner, _, pgid = name.partition('.')
+            if not (owner.isdigit() and pgid.isdigit()) or _alive(int(owner)):
+                continue
+            try:
+                with open(os.path.join(self.run_dir, name)) as f:
+                    recorded = f.read().strip()
+            except OSError:
+                continue
+            # A live leader with another start time is an unrelated process
+            # that reused the pid. A dead leader's pgid is not reused while
+            # members of its group remain.
+            started = _start_time(int(pgid))
+            if started is None or started == recorded:
+                try:
+                    os.killpg(int(pgid), signal.SIGKILL)
+                    self._count('orphans_reaped')
+                except (ProcessLookupError, PermissionError):
+                    pass
+            try:
+                os.remove(os.path.join(self.run_dir, name))
+            except OSError:
+                pass
+
+    def metrics(self):
+        with self._lock:
+            return {**self.counters, 'active': len(self._active)}
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _start_time(pid):
+    # Clock ticks since boot at which pid started (field 22 of /proc/<pid>/stat)
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            stat = f.read()
+    except OSError:
+        return None
+    return stat.rsplit(')', 1)[1].split()[19]
+
+
+_supervisor = None
+_supervisor_lock = threading.Lock()
+
+
+def get_supervisor():
+    global _supervisor
+    with _supervisor_lock:
+        if _supervisor is None:
+            _supervisor = ProcessSupervisor()
+        return _supervisor
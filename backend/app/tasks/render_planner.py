@@ -0,0 +1,293 @@
+import os
+import subprocess
+from dataclasses import asdict, dataclass, field
+
+import ffmpeg
+
+from app.tasks.media_executor import get_media_executor, with_threads
+from app.tasks.media_probe import MediaProbeError, scan_keyframes
+from app.tasks.ffmpeg_progress import run_with_progress
+from app.tasks.process_supervisor import get_supervisor
+
+# Jobs share a decode only when their ranges coincide to within this many
+# seconds at both ends. A split graph whose trims start or end far apart
+# queues frames for the outputs that aren't consuming yet, without bound.
+DECODE_SKEW_SECONDS = float(os.getenv("RENDER_DECODE_SKEW_SECONDS", "2"))
+
+
+@dataclass(frozen=True)
+class EncodeProfile:
+    width: int = None
+    height: int = None
+    video_bitrate: str = None
+    audio_bitrate: str = '128k'
+    preset: str = 'fast'
+    # False gives every job of this profile a decode of its own
+    shared_decode: bool = True
+
+    @property
+    def crop(self):
+        return self.width is not None and self.height is not None
+
+
+@dataclass
+class OutputSpec:
+    key: tuple
+    path: str
+    start: float
+    end: float
+    profile: EncodeProfile
+
+    @property
+    def duration(self):
+        return self.end - self.start
+
+
+@dataclass
+class EncodeJob:
+    profile: EncodeProfile
+    start: float
+    end: float
+    outputs: list = field(default_factory=list)
+
+    @property
+    def duration(self):
+        return self.end - self.start
+
+
+def _merge_ranges(items, start_of, end_of, joins=None):
+    # Groups items whose [start, end) ranges overlap into union ranges.
+    # joins(group, item), when given, must also accept an item into a group.
+    groups = []
+    for item in sorted(items, key=start_of):
+        if groups and start_of(item) < groups[-1][1] and (joins is None or joins(groups[-1], item)):
+            groups[-1][1] = max(groups[-1][1], end_of(item))
+            groups[-1][2].append(item)
+        else:
+            groups.append([start_of(item), end_of(item), [item]])
+    return groups
+
+
+def _shares_decode(group, job, max_jobs):
+    first = group[2][0]
+    return (
+        len(group[2]) < max_jobs
+        and first.profile.shared_decode and job.profile.shared_decode
+        and abs(job.start - first.start) <= DECODE_SKEW_SECONDS
+        and abs(job.end - first.end) <= DECODE_SKEW_SECONDS
+    )
+
+
+class RenderPlanner:
+    def __init__(self, work_dir=None, executor=None):
+        self.work_dir = work_dir
+        self.executor = executor or get_media_executor()
+
+    def plan(self, specs, isolate=False):
+        # Encode jobs: one per overlapping union range of outputs sharing an
+        # encode profile. Identical specs collapse into the same job. With
+        # isolate every output gets its own encode and decode.
+        if isolate:
+            return [(spec.start, spec.end, [EncodeJob(spec.profile, spec.start, spec.end, [spec])]) for spec in specs]
+        by_profile = {}
+        for spec in specs:
+            by_profile.setdefault(spec.profile, []).append(spec)
+        jobs = []
+        for profile, profile_specs in by_profile.items():
+            for start, end, outputs in _merge_ranges(profile_specs, lambda s: s.start, lambda s: s.end):
+                jobs.append(EncodeJob(profile, start, end, outputs))
+        # Decode clusters: jobs of any profile whose ranges coincide with the
+        # cluster's first job share one decode, up to one encode per CPU of
+        # the budget
+        max_jobs = self.executor.cpu_budget
+        return _merge_ranges(jobs, lambda j: j.start, lambda j: j.end,
+                             lambda group, job: _shares_decode(group, job, max_jobs))
+
+    def _job_target(self, job, index, work_dir):
+        # Encode straight into an output that covers the whole union; other
+        # outputs are trimmed from it. Otherwise use a scratch intermediate.
+        for spec in job.outputs:
+            if spec.start == job.start and spec.end == job.end:
+                return spec.path, False
+        return os.path.join(work_dir, f"union_{index:03d}.mp4"), True
+
+    def _encode_cluster(self, video_path, cluster_start, cluster_end, jobs, targets, audio_path, threads=None,
+                        on_progress=None):
+        source = ffmpeg.input(video_path, ss=f"{cluster_start:.3f}", t=f"{cluster_end - cluster_start:.3f}")
+        video = source['V'].filter_multi_output('split')
+        source_audio = None if audio_path else source.audio.filter_multi_output('asplit')
+        outputs = []
+        for n, (job, target) in enumerate(zip(jobs, targets)):
+            rel_start = job.start - cluster_start
+            rel_end = job.end - cluster_start
+            stream = video[n].trim(start=rel_start, end=rel_end).setpts('PTS-STARTPTS')
+            if job.profile.crop:
+                stream = (
+                    stream
+                    .filter('scale', job.profile.width, job.profile.height, force_original_aspect_ratio='increase')
+                    .filter('crop', job.profile.width, job.profile.height)
+                )
+            elif job.profile.height:
+                # A height alone scales down and keeps the source's aspect ratio
+                stream = stream.filter('scale', -2, job.profile.height)
+            if audio_path:
+                streams = [stream, ffmpeg.input(audio_path, ss=f"{job.start:.3f}", t=f"{job.duration:.3f}").audio]
+                audio_options = {'acodec': 'copy'}
+            else:
+                audio = (
+                    source_audio[n]
+                    .filter('atrim', start=rel_start, end=rel_end)
+                    .filter('asetpts', 'PTS-STARTPTS')
+                )
+                streams = [stream, audio]
+                audio_options = {'acodec': 'aac', 'audio_bitrate': job.profile.audio_bitrate}
+            # Keyframes on every output boundary make the later trims exact stream copies
+            boundaries = sorted({round(s.start - job.start, 3) for s in job.outputs}
+                                | {round(s.end - job.start, 3) for s in job.outputs})
+            video_options = {'video_bitrate': job.profile.video_bitrate} if job.profile.video_bitrate else {}
+            outputs.append(ffmpeg.output(
+                *streams, target,
+                vcodec='libx264', preset=job.profile.preset,
+                force_key_frames=",".join(f"{b:.3f}" for b in boundaries),
+                movflags='+faststart', threads=threads, **video_options, **audio_options
+            ))
+        run_with_progress(ffmpeg.merge_outputs(*outputs).overwrite_output().compile(), on_progress)
+
+    def _trim_start(self, keyframes, offset):
+        # The encoder forces each boundary keyframe onto the first frame at or
+        # after the requested time. A copy must seek to that frame exactly:
+        # from any earlier point it starts at the previous keyframe and
+        # carries its whole GOP.
+        return next((k for k in keyframes if k >= offset - 1e-6), offset)
+
+    def _trim(self, source_path, offset, duration, output_path):
+        cmd = [
+            'ffmpeg', '-ss', f'{offset:.6f}', '-t', f'{duration:.3f}', '-i', source_path,
+            '-c', 'copy', '-movflags', '+faststart', '-y', output_path
+        ]
+        get_supervisor().run(with_threads(cmd, 1))
+
+    def _cluster_name(self, number, jobs):
+        clip_ids = sorted({spec.key[-1] for job in jobs for spec in job.outputs})
+        return f"{number}: clips {', '.join(str(clip_id) for clip_id in clip_ids)}"
+
+    def _render_cluster(self, video_path, cluster, index, work_dir, audio_path, on_progress=None):
+        cluster_start, cluster_end, jobs = cluster
+        results = {}
+        targets = []
+        scratch = []
+        for n, job in enumerate(jobs):
+            target, is_scratch = self._job_target(job, index + n, work_dir)
+            targets.append(target)
+            if is_scratch:
+                scratch.append(target)
+        try:
+            # One decode feeds every encode in the cluster, so the cluster
+            # holds a thread share of the CPU budget for each of its encodes.
+            # plan() keeps len(jobs) within the budget, so every encode gets
+            # at least one reserved thread.
+            with self.executor.reserve(self.executor.job_threads * len(jobs)) as granted:
+                self._encode_cluster(video_path, cluster_start, cluster_end, jobs, targets, audio_path,
+                                     threads=granted // len(jobs), on_progress=on_progress)
+            for job, target in zip(jobs, targets):
+                trims = [spec for spec in job.outputs if spec.path != target]
+                keyframes = scan_keyframes(target) if trims else ()
+                for spec in trims:
+                    offset = spec.start - job.start
+                    start = self._trim_start(keyframes, offset)
+                    with self.executor.reserve(1):
+                        self._trim(target, start, spec.duration - (start - offset), spec.path)
+                for spec in job.outputs:
+                    results[spec.key] = {'success': True, 'path': spec.path}
+            return results, True
+        except (ffmpeg.Error, subprocess.CalledProcessError, MediaProbeError) as e:
+            error = e.stderr.decode(errors='replace') if getattr(e, 'stderr', None) else str(e)
+            for job in jobs:
+                for spec in job.outputs:
+                    results.setdefault(spec.key, {'success': False, 'error': error, 'path': None})
+            return results, False
+        finally:
+            for path in scratch:
+                if os.path.exists(path):
+                    os.remove(path)
+
+    def _cache_key(self, cache, video_path, spec, audio_path):
+        profile = {**asdict(spec.profile), 'audio': os.path.basename(audio_path) if audio_path else 'source'}
+        return cache.make_key(video_path, 'render', spec.start, spec.end, profile)
+
+    def execute(self, video_path, specs, work_dir, audio_path=None, progress=None, cache=None, isolate=False):
+        # Clusters don't overlap, so they render concurrently within the
+        # shared executor's CPU budget. progress is an optional
+        # ProgressTracker fed by each cluster's encode; outputs found in the
+        # optional ArtifactCache are not planned at all.
+        work_dir = self.work_dir or os.path.join(work_dir, ".render")
+        os.makedirs(work_dir, exist_ok=True)
+        results = {}
+        cache_keys = {}
+        pending = specs
+        if cache is not None:
+            pending = []
+            for spec in specs:
+                cache_keys[spec.key] = self._cache_key(cache, video_path, spec, audio_path)
+                if cache.fetch(cache_keys[spec.key], {'output.mp4': spec.path}) is not None:
+                    results[spec.key] = {'success': True, 'path': spec.path, 'cached': True}
+                else:
+                    pending.append(spec)
+        clusters = self.plan(pending, isolate)
+        indexes = []
+        index = 0
+        for cluster in clusters:
+            indexes.append(index)
+            index += len(cluster[2])
+        callbacks = []
+        for number, (cluster_start, cluster_end, jobs) in enumerate(clusters, 1):
+            if progress is None:
+                callbacks.append(None)
+                continue
+            name = self._cluster_name(number, jobs)
+            progress.add(name, cluster_end - cluster_start, [
+                (spec.key[-1], spec.key[0], spec.start - cluster_start, spec.duration)
+                for job in jobs for spec in job.outputs
+            ])
+            callbacks.append(progress.callback(name))
+        futures = [
+            self.executor.spawn(self._render_cluster, video_path, cluster, first, work_dir, audio_path, callback)
+            for cluster, first, callback in zip(clusters, indexes, callbacks)
+        ]
+        encoded_seconds = 0.0
+        decoded_seconds = 0.0
+        # Only outputs of clusters that encoded count towards the savings;
+        # a failed cluster saved nothing
+        planned_seconds = 0.0
+        failed_outputs = 0
+        jobs_run = 0
+        for (cluster_start, cluster_end, jobs), future in zip(clusters, futures):
+            cluster_results, encoded = future.result()
+            results.update(cluster_results)
+            if encoded:
+                decoded_seconds += cluster_end - cluster_start
+                jobs_run += len(jobs)
+                encoded_seconds += sum(job.duration for job in jobs)
+                planned_seconds += sum(spec.duration for job in jobs for spec in job.outputs)
+            else:
+                failed_outputs += sum(len(job.outputs) for job in jobs)
+        if cache is not None:
+            for spec in pending:
+                if results[spec.key]['success']:
+                    cache.store(cache_keys[spec.key], {'output.mp4': spec.path})
+        try:
+            os.rmdir(work_dir)
+        except OSError:
+            pass
+        requested_seconds = sum(spec.duration for spec in specs)
+        report = {
+            'outputs': len(specs),
+            'cached_outputs': len(specs) - len(pending),
+            'failed_outputs': failed_outputs,
+            'encode_jobs': jobs_run,
+            'requested_encode_seconds': round(requested_seconds, 2),
+            'encoded_seconds': round(encoded_seconds, 2),
+            'saved_encode_seconds': round(planned_seconds - encoded_seconds, 2),
+            'decoded_seconds': round(decoded_seconds, 2)
+        }
+        return results, report
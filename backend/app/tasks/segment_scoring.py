@@ -0,0 +1,128 @@
+import itertools
+import json
+import os
+import threading
+
+import ahocorasick
+import numpy as np
+
+DEFAULT_KEYWORDS = {
+    "amazing": 10, "wow": 10, "important": 10, "key": 10, "secret": 10,
+    "breakthrough": 10, "incredible": 10, "game changer": 10,
+}
+DEFAULT_WEIGHTS = {
+    "question": 15,
+    "exclamation": 10,
+    "duration_divisor": 5,
+    "duration_cap": 20,
+    "min_duration": 5,
+}
+
+
+class SegmentScorer:
+    def __init__(self, keywords=None, weights=None):
+        keywords = {k.lower(): float(w) for k, w in (keywords or DEFAULT_KEYWORDS).items()}
+        self.weights = {**DEFAULT_WEIGHTS, **(weights or {})}
+        self.keywords = list(keywords)
+        self.keyword_weights = np.array([keywords[kw] for kw in self.keywords], dtype=np.float64)
+        self.keyword_lengths = np.array([len(kw) for kw in self.keywords], dtype=np.int64)
+        # One automaton for the whole dictionary. It reports every match,
+        # overlapping ones included ("key point" and "point"), in a single
+        # pass over the text.
+        self.automaton = None
+        if self.keywords:
+            self.automaton = ahocorasick.Automaton()
+            for i, kw in enumerate(self.keywords):
+                self.automaton.add_word(kw, i)
+            self.automaton.make_automaton()
+
+    @classmethod
+    def from_file(cls, path):
+        with open(path, 'r', encoding='utf-8') as f:
+            config = json.load(f)
+        return cls(config.get("keywords"), config.get("weights"))
+
+    def _keyword_scores(self, corpus, offsets):
+        # Scan every segment joined together once, map each match back to
+        # its segment by offset and count a keyword at most once per
+        # segment, as the substring scan did.
+        n = len(offsets)
+        hits = np.fromiter(itertools.chain.from_iterable(self.automaton.iter(corpus)), dtype=np.int64)
+        ends, keyword_ids = hits[0::2], hits[1::2]
+        segment_ids = np.searchsorted(offsets, ends - self.keyword_lengths[keyword_ids] + 1, side='right') - 1
+        pairs = np.unique(segment_ids * len(self.keywords) + keyword_ids)
+        return np.bincount(
+            pairs // len(self.keywords),
+            weights=self.keyword_weights[pairs % len(self.keywords)],
+            minlength=n,
+        )
+
+    def features(self, segments):
+        n = len(segments)
+        # Lowercased before joining so offsets hold even where lower() changes a length
+        texts = [seg["text"].replace("\n", " ").lower() for seg in segments]
+        starts = np.fromiter((seg["start"] for seg in segments), dtype=np.float64, count=n)
+        ends = np.fromiter((seg["end"] for seg in segments), dtype=np.float64, count=n)
+        lengths = np.fromiter((len(t) + 1 for t in texts), dtype=np.int64, count=n)
+        offsets = np.concatenate(([0], np.cumsum(lengths)[:-1])) if n else np.zeros(0, dtype=np.int64)
+        corpus = "\n".join(texts)
+
+        keyword_score = np.zeros(n)
+        if n and self.automaton is not None:
+            keyword_score = self._keyword_scores(corpus, offsets)
+
+        # A single character is cheaper to test with `in` than to match
+        has_question = np.fromiter(("?" in t for t in texts), dtype=bool, count=n)
+        has_exclamation = np.fromiter(("!" in t for t in texts), dtype=bool, count=n)
+
+        return {
+            "start": starts,
+            "end": ends,
+            "duration": ends - starts,
+            "keyword_score": keyword_score,
+            "has_question": has_question,
+            "has_exclamation": has_exclamation,
+        }
+
+    def score(self, segments):
+        f = self.features(segments)
+        w = self.weights
+        scores = (
+            f["keyword_score"]
+            + w["question"] * f["has_question"]
+            + w["exclamation"] * f["has_exclamation"]
+            + np.minimum(f["duration"] / w["duration_divisor"], w["duration_cap"])
+        )
+        return scores, f["duration"] >= w["min_duration"]
+
+    def score_segments(self, segments):
+        scores, keep = self.score(segments)
+        return [
+            {
+                "start": seg["start"],
+                "end": seg["end"],
+                "text": seg["text"],
+                "score": float(scores[i]),
+                "duration": seg["end"] - seg["start"]
+            }
+            for i, seg in enumerate(segments) if keep[i]
+        ]
+
+
+_scorers = {}
+_scorers_lock = threading.Lock()
+
+
+def get_scorer(tenant_id=None):
+    # Tenant dictionaries live in KEYWORD_WEIGHTS_DIR/<tenant>.json and are
+    # compiled once per process; unknown tenants get the defaults.
+    with _scorers_lock:
+        if tenant_id in _scorers:
+            return _scorers[tenant_id]
+    path = None
+    if tenant_id:
+        path = os.path.join(os.getenv("KEYWORD_WEIGHTS_DIR", "./keywords"), f"{os.path.basename(str(tenant_id))}.json")
+    scorer = SegmentScorer.from_file(path) if path and os.path.exists(path) else SegmentScorer()
+    with _scorers_lock:
+        _scorers[tenant_id] = scorer
+    return scorer
@@ -0,0 +1,21 @@
+from app.celery_app import celery
+
+# Task names are the contract between the API and the workers. This module
+# must stay import-light: it is loaded by every API process.
+PROCESS_VIDEO = "app.tasks.worker.process_video"
+RENDER_FINALS = "app.tasks.worker.render_finals"
+RENDER_QUEUE = "renders"
+
+def process_video_signature(video_path: str, tenant_id: str = None):
+    return celery.signature(PROCESS_VIDEO, args=(video_path,), kwargs={'tenant_id': tenant_id})
+
+def enqueue_process_video(video_path: str, tenant_id: str = None):
+    return process_video_signature(video_path, tenant_id).apply_async()
+
+def enqueue_render_finals(video_path: str, video_id: str, clip_data: list, aac_path: str = None):
+    # Final renditions go to their own queue, which workers only read when
+    # the default queue is empty (queue_order_strategy in celery_app), so
+    # they never hold up the analysis and preview stages of new uploads
+    return celery.signature(
+        RENDER_FINALS, args=(video_path, video_id, clip_data), kwargs={'aac_path': aac_path}
+    ).apply_async(queue=RENDER_QUEUE)
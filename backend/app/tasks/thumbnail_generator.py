@@ -1,97 +1,161 @@
 import cv2
 import os
+import threading
 import numpy as np
+from concurrent.futures import ThreadPoolExecutor
 from PIL import Image
+from app.tasks.media_executor import get_media_executor
+from app.tasks.frame_sampler import SAMPLE_STEP, SAMPLE_WIDTH, FrameSampler, grid_point
+from app.tasks.media_probe import get_media_info
+
+SCORE_WIDTH = int(os.getenv("THUMBNAIL_SCORE_WIDTH", "480"))     # face/sharpness analysis width
+SCORE_BATCH = 16
+SEARCH_WINDOW = float(os.getenv("THUMBNAIL_SEARCH_WINDOW", "10"))    # seconds either side of the target
+# Max differing bits (of 64) for two candidates to count as the same shot
+DUPLICATE_DISTANCE = int(os.getenv("THUMBNAIL_DUPLICATE_DISTANCE", "6"))
+
+def perceptual_hash(frame, size=8):
+    # dHash: brighter-than-right-neighbour bits of a (size+1)x(size) thumbnail
+    tiny = cv2.cvtColor(cv2.resize(frame, (size + 1, size), interpolation=cv2.INTER_AREA), cv2.COLOR_BGR2GRAY)
+    return np.packbits(tiny[:, 1:] > tiny[:, :-1])
+
+def hash_distance(a, b):
+    return int(np.unpackbits(a ^ b).sum())
 
 class ThumbnailGenerator:
-    def __init__(self):
-        self.face_cascade = cv2.CascadeClassifier(
-            cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
-        )
+    def __init__(self, executor=None, cache=None):
+        self.executor = executor or get_media_executor()
+        self.cache = cache
+        self._local = threading.local()
     
-    def extract_frames(self, video_path, num_frames=10):
-        cap = cv2.VideoCapture(video_path)
-        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-        frames = []
-        for i in range(num_frames):
-            frame_pos = int((i / num_frames) * total_frames)
-            cap.set(cv2.CAP_PROP_POS_FRAMES, frame_pos)
-            ret, frame = cap.read()
-            if ret:
-                frames.append({
-                    'frame': frame,
-                    'position': frame_pos,
-                    'time': frame_pos / cap.get(cv2.CAP_PROP_FPS)
-                })
-        cap.release()
-        return frames
+    @property
+    def face_cascade(self):
+        # CascadeClassifier isn't safe to share between threads
+        if not hasattr(self._local, 'face_cascade'):
+            self._local.face_cascade = cv2.CascadeClassifier(
+                cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
+            )
+        return self._local.face_cascade
     
-    def detect_faces(self, frame):
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    def prepare_frame(self, frame):
+        # The one colour conversion a frame gets: grayscale at SCORE_WIDTH,
+        # plus the factor that maps it back to the frame's coordinates
+        h, w = frame.shape[:2]
+        scale = min(1.0, SCORE_WIDTH / w)
+        if scale < 1.0:
+            frame = cv2.resize(frame, (int(w * scale), int(h * scale)), interpolation=cv2.INTER_AREA)
+        return cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY), scale
+    
+    def _faces(self, gray, scale):
         faces = self.face_cascade.detectMultiScale(
-            gray, scaleFactor=1.1, minNeighbors=5, minSize=(30,30)
+            gray, scaleFactor=1.1, minNeighbors=5, minSize=(max(24, int(30 * scale)),) * 2
         )
-        return faces
+        if len(faces) == 0:
+            return faces
+        return np.round(np.asarray(faces) / scale).astype(int)
     
-    def score_frame(self, frame):
+    def detect_faces(self, frame):
+        # Boxes in the frame's own coordinates
+        return self._faces(*self.prepare_frame(frame))
+    
+    def score_prepared(self, prepared):
+        gray, scale = prepared
         score = 0
-        h, w = frame.shape[:2]
-        faces = self.detect_faces(frame)
+        h, w = gray.shape[:2]
+        faces = self._faces(gray, scale)
         if len(faces) > 0:
             score += 50
             for (x,y,fw,fh) in faces:
-                face_size = (fw*fh)/(w*h)
+                face_size = (fw*fh)/(w*h/(scale*scale))
                 score += face_size * 30
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        sharpness = cv2.Laplacian(gray, cv2.CV_64F).var()
+        _, deviation = cv2.meanStdDev(cv2.Laplacian(gray, cv2.CV_16S))
+        sharpness = float(deviation[0][0]) ** 2
         score += min(sharpness/10, 20)
-        mean_brightness = np.mean(gray)
+        mean_brightness = cv2.mean(gray)[0]
         if 50 < mean_brightness < 200:
             score += 10
         return score
     
-    def generate_thumbnail(self, video_path, output_path, target_time=None):
-        cap = cv2.VideoCapture(video_path)
-        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-        fps = cap.get(cv2.CAP_PROP_FPS)
-        best_frame = None
-        best_score = -1
-        best_position = 0
+    def score_frame(self, frame):
+        return self.score_prepared(self.prepare_frame(frame))
+    
+    def score_frames(self, frames, threads=None):
+        # OpenCV drops the GIL, so a thread pool scores in parallel
+        prepared = [self.prepare_frame(frame) for frame in frames]
+        with ThreadPoolExecutor(max_workers=threads or self.executor.job_threads) as pool:
+            return list(pool.map(self.score_prepared, prepared))
+    
+    def candidate_times(self, target_time, duration):
         if target_time:
-            target_frame = int(target_time * fps)
-            search_range = int(fps * 5)
-            start_frame = max(0, target_frame - search_range)
-            end_frame = min(total_frames, target_frame + search_range)
-            for frame_pos in range(start_frame, end_frame, int(fps/2)):
-                cap.set(cv2.CAP_PROP_POS_FRAMES, frame_pos)
-                ret, frame = cap.read()
-                if ret:
-                    score = self.score_frame(frame)
-                    if score > best_score:
-                        best_score = score
-                        best_frame = frame.copy()
-                        best_position = frame_pos
-        else:
-            frames = self.extract_frames(video_path, num_frames=20)
-            for fd in frames:
-                score = self.score_frame(fd['frame'])
-                if score > best_score:
-                    best_score = score
-                    best_frame = fd['frame'].copy()
-                    best_position = fd['position']
-        cap.release()
-        if best_frame is not None:
-            best_frame = self.enhance_thumbnail(best_frame)
-            cv2.imwrite(output_path, best_frame)
-            self.create_web_thumbnail(best_frame, output_path.replace('.jpg', '_web.jpg'))
-            return {
-                'path': output_path,
-                'position': best_position,
-                'time': best_position / fps if fps>0 else 0,
-                'score': best_score,
-                'has_faces': best_score > 50
-            }
-        return None
+            # ±SEARCH_WINDOW around the target, every half second
+            steps = int(SEARCH_WINDOW / SAMPLE_STEP)
+            return [target_time + k * SAMPLE_STEP for k in range(-steps, steps)]
+        return [duration * i / 20 for i in range(20)]
+    
+    def select_frames(self, video_path, target_times):
+        # Best (score, time) for each target, scoring every candidate of every
+        # target in a single sorted pass over the video. A run of near-identical
+        # candidates is scored once and every member shares its score.
+        duration = get_media_info(video_path).duration if None in target_times else 0
+        owners = {}
+        for i, target_time in enumerate(target_times):
+            for t in self.candidate_times(target_time, duration):
+                owners.setdefault(grid_point(t), []).append(i)
+        groups = []
+        batches = []
+        batch = []
+        # The decode and the scoring pool run at the same time, so one
+        # reservation covers both: half of it decodes, the rest scores
+        with self.executor.reserve(max(2, self.executor.job_threads)) as threads, \
+                ThreadPoolExecutor(max_workers=max(1, threads - threads // 2)) as pool:
+            def collect(time, frame):
+                frame_hash = perceptual_hash(frame)
+                if groups and hash_distance(frame_hash, groups[-1][0]) <= DUPLICATE_DISTANCE:
+                    groups[-1][1].append(time)
+                    return
+                groups.append((frame_hash, [time]))
+                # The sampler reuses its buffer; the prepared copy is all that's kept
+                batch.append((len(groups) - 1, self.prepare_frame(frame)))
+                if len(batch) == SCORE_BATCH:
+                    batches.append(pool.submit(self._score_batch, batch[:]))
+                    batch.clear()
+            FrameSampler(threads=max(1, threads // 2)).sample(video_path, [p * SAMPLE_STEP for p in owners], collect)
+            if batch:
+                batches.append(pool.submit(self._score_batch, batch))
+            scored = [item for future in batches for item in future.result()]
+        best = [None] * len(target_times)
+        for group, frame_score in scored:
+            for time in groups[group][1]:
+                for i in owners.get(grid_point(time), ()):
+                    if best[i] is None or frame_score > best[i][0]:
+                        best[i] = (frame_score, time)
+        return best
+    
+    def _score_batch(self, batch):
+        return [(group, self.score_prepared(prepared)) for group, prepared in batch]
+    
+    def write_thumbnail(self, video_path, output_path, selected):
+        # Only the winning frame is decoded at full resolution
+        if selected is None:
+            return None
+        best_score, best_time = selected
+        best_frame = FrameSampler().read_frame(video_path, best_time)
+        if best_frame is None:
+            return None
+        best_frame = self.enhance_thumbnail(best_frame)
+        cv2.imwrite(output_path, best_frame)
+        self.create_web_thumbnail(best_frame, output_path.replace('.jpg', '_web.jpg'))
+        return {
+            'path': output_path,
+            'time': best_time,
+            'score': best_score,
+            'has_faces': best_score > 50
+        }
+    
+    def generate_thumbnail(self, video_path, output_path, target_time=None, proxy_path=None):
+        # Candidates are scored on the analysis proxy when there is one
+        selected = self.select_frames(proxy_path or video_path, [target_time])[0]
+        return self.write_thumbnail(video_path, output_path, selected)
     
     def enhance_thumbnail(self, frame):
         lab = cv2.cvtColor(frame, cv2.COLOR_BGR2LAB)
@@ -106,13 +170,46 @@ class ThumbnailGenerator:
         resized = cv2.resize(frame, size)
         cv2.imwrite(output_path, resized, [cv2.IMWRITE_JPEG_QUALITY, 85])
     
-    def generate_clip_thumbnails(self, video_path, clips, output_dir):
+    def selection_profile(self, proxy_path=None):
+        # Everything that changes which frame wins. The proxy's name carries
+        # its width and frame rate.
+        return {
+            'search_window': SEARCH_WINDOW,
+            'sample_width': SAMPLE_WIDTH,
+            'score_width': SCORE_WIDTH,
+            'duplicate_distance': DUPLICATE_DISTANCE,
+            'proxy': os.path.basename(proxy_path) if proxy_path else 'source',
+        }
+    
+    def generate_clip_thumbnails(self, video_path, clips, output_dir, proxy_path=None):
         os.makedirs(output_dir, exist_ok=True)
-        thumbnails = []
+        results = [None] * len(clips)
+        jobs = []
         for i, clip in enumerate(clips):
             target_time = (clip['start'] + clip['end']) / 2
             thumb_path = os.path.join(output_dir, f"thumb_clip_{i+1}.jpg")
-            result = self.generate_thumbnail(video_path, thumb_path, target_time=target_time)
+            key, dests = None, None
+            if self.cache is not None:
+                key = self.cache.make_key(video_path, 'thumbnail', target_time,
+                                          profile=self.selection_profile(proxy_path))
+                dests = {'thumb.jpg': thumb_path, 'thumb_web.jpg': thumb_path.replace('.jpg', '_web.jpg')}
+                meta = self.cache.fetch(key, dests)
+                if meta is not None:
+                    results[i] = {**meta, 'path': thumb_path}
+                    continue
+            jobs.append((i, target_time, thumb_path, key, dests))
+        if jobs:
+            selected = self.select_frames(proxy_path or video_path, [target_time for _, target_time, _, _, _ in jobs])
+            def write(job):
+                (i, _, thumb_path, key, dests), choice = job
+                result = self.write_thumbnail(video_path, thumb_path, choice)
+                if result and key is not None:
+                    self.cache.store(key, dests, result)
+                return result
+            for (i, *_), result in zip(jobs, self.executor.map(write, zip(jobs, selected), threads=1)):
+                results[i] = result
+        thumbnails = []
+        for i, result in enumerate(results):
             if result:
                 thumbnails.append({
                     'clip_id': i+1,
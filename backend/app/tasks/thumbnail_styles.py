@@ -1,15 +1,135 @@
+import hashlib
 import os
+import threading
+import time
 import openai
 import replicate
+from concurrent.futures import ThreadPoolExecutor
 from PIL import Image, ImageDraw, ImageFont, ImageFilter
 import requests
 from io import BytesIO
 
+class ImageProvider:
+    name = None
+    max_concurrency = 2
+    # Whether describe() is implemented; the stylist asks the first such provider
+    can_describe = False
+    
+    def describe(self, prompt: str) -> str:
+        raise NotImplementedError
+    
+    def generate(self, prompt: str) -> str:
+        # Returns a URL that download() fetches
+        raise NotImplementedError
+    
+    def download(self, url: str) -> Image.Image:
+        img_response = requests.get(url, timeout=60)
+        img_response.raise_for_status()
+        return Image.open(BytesIO(img_response.content))
+
+class OpenAIImageProvider(ImageProvider):
+    name = "openai"
+    max_concurrency = 4
+    can_describe = True
+    
+    def describe(self, prompt: str) -> str:
+        response = openai.ChatCompletion.create(
+            model="gpt-3.5-turbo",
+            messages=[
+                {"role": "system", "content": "You create detailed image descriptions for thumbnails."},
+                {"role": "user", "content": prompt}
+            ],
+            temperature=0.7,
+            max_tokens=150
+        )
+        return response.choices[0].message.content.strip()
+    
+    def generate(self, prompt: str) -> str:
+        response = openai.Image.create(
+            model="dall-e-3",
+            prompt=prompt[:1000],
+            size="1792x1024",
+            quality="hd",
+            n=1
+        )
+        return response.data[0].url
+
+class ReplicateImageProvider(ImageProvider):
+    name = "replicate"
+    max_concurrency = 2
+    
+    def generate(self, prompt: str) -> str:
+        output = replicate.run(
+            "stability-ai/stable-diffusion:db21e45d3f7023abc2a46ee38a23973f6dce16bb082a930b0c49861f96d1e5bf",
+            input={"prompt": prompt, "width": 1280, "height": 720, "num_outputs": 1}
+        )
+        return output[0]
+
+class StubImageProvider(ImageProvider):
+    # Offline stand-in with fixed latencies, for benchmarks and local runs
+    name = "stub"
+    max_concurrency = 4
+    can_describe = True
+    
+    def __init__(self, describe_latency=0.3, generate_latency=1.5, download_latency=0.2):
+        self.describe_latency = describe_latency
+        self.generate_latency = generate_latency
+        self.download_latency = download_latency
+    
+    def describe(self, prompt: str) -> str:
+        time.sleep(self.describe_latency)
+        return f"Stub scene {hashlib.sha256(prompt.encode('utf-8')).hexdigest()[:8]}"
+    
+    def generate(self, prompt: str) -> str:
+        time.sleep(self.generate_latency)
+        return "stub://" + hashlib.sha256(prompt.encode('utf-8')).hexdigest()[:6]
+    
+    def download(self, url: str) -> Image.Image:
+        time.sleep(self.download_latency)
+        return Image.new("RGB", (1792, 1024), "#" + url[len("stub://"):])
+
+IMAGE_PROVIDERS = {
+    "openai": OpenAIImageProvider,
+    "replicate": ReplicateImageProvider,
+    "stub": StubImageProvider,
+}
+
+def create_image_provider(name):
+    if name not in IMAGE_PROVIDERS:
+        raise ValueError(f"Unknown image provider '{name}'. Available: {sorted(IMAGE_PROVIDERS)}")
+    return IMAGE_PROVIDERS[name]()
+
+def _concurrency_limits(spec):
+    # "openai=4,replicate=2" -> {"openai": 4, "replicate": 2}
+    limits = {}
+    for item in (spec or "").split(","):
+        name, _, value = item.partition("=")
+        if name.strip() and value.strip().isdigit():
+            limits[name.strip()] = int(value)
+    return limits
+
 class ThumbnailStylist:
-    def __init__(self):
+    def __init__(self, providers=None, concurrency=None, max_workers=None):
         self.openai_key = os.getenv("OPENAI_API_KEY")
         self.replicate_token = os.getenv("REPLICATE_API_TOKEN")
         openai.api_key = self.openai_key
+        # Tried in order for each image; the first that can describe writes the descriptions
+        self.providers = providers or [
+            create_image_provider(name.strip())
+            for name in os.getenv("AI_THUMBNAIL_PROVIDERS", "openai,replicate").split(",")
+        ]
+        self.describer = next((provider for provider in self.providers if provider.can_describe), None)
+        limits = concurrency or _concurrency_limits(os.getenv("AI_THUMBNAIL_CONCURRENCY"))
+        # One semaphore per provider caps its requests in flight across all jobs
+        self._limits = {
+            provider.name: threading.BoundedSemaphore(limits.get(provider.name, provider.max_concurrency))
+            for provider in self.providers
+        }
+        self.max_workers = max_workers or int(os.getenv("AI_THUMBNAIL_WORKERS", "12"))
+    
+    def _call(self, provider, method, *args):
+        with self._limits[provider.name]:
+            return getattr(provider, method)(*args)
     
     def generate_context_description(self, transcript_snippet: str) -> str:
         prompt = f"""
@@ -22,19 +142,13 @@ class ThumbnailStylist:
         - Colors that would work well
         Return a single paragraph description.
         """
+        fallback = f"A scene about: {transcript_snippet[:100]}"
+        if self.describer is None:
+            return fallback
         try:
-            response = openai.ChatCompletion.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": "You create detailed image descriptions for thumbnails."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.7,
-                max_tokens=150
-            )
-            return response.choices[0].message.content.strip()
-        except:
-            return f"A scene about: {transcript_snippet[:100]}"
+            return self._call(self.describer, 'describe', prompt)
+        except Exception:
+            return fallback
     
     def apply_style_prompt(self, base_description: str, style: str) -> str:
         style_prompts = {
@@ -48,48 +162,44 @@ class ThumbnailStylist:
         }
         return f"{base_description}\n\n{style_prompts.get(style, style_prompts['cinematic'])}"
     
-    def generate_ai_thumbnail(self, transcript_snippet: str, style: str, output_path: str) -> bool:
-        context = self.generate_context_description(transcript_snippet)
+    def generate_ai_thumbnail(self, transcript_snippet: str, style: str, output_path: str, context: str = None) -> bool:
+        context = context or self.generate_context_description(transcript_snippet)
         full_prompt = self.apply_style_prompt(context, style)
         full_prompt += "\n\nLeave space at top and bottom for text overlay. Vertical orientation 1280x720."
-        try:
-            # Try DALL-E 3
-            response = openai.Image.create(
-                model="dall-e-3",
-                prompt=full_prompt[:1000],
-                size="1792x1024",
-                quality="hd",
-                n=1
-            )
-            image_url = response.data[0].url
-            img_response = requests.get(image_url)
-            img = Image.open(BytesIO(img_response.content))
-            img = img.resize((1280, 720), Image.Resampling.LANCZOS)
-            img = self.apply_style_postprocess(img, style)
-            img.save(output_path, "JPEG", quality=95)
-            web_path = output_path.replace('.jpg', '_web.jpg')
-            web_img = img.resize((640, 360), Image.Resampling.LANCZOS)
-            web_img.save(web_path, "JPEG", quality=85)
-            return True
-        except Exception as e:
-            print(f"DALL-E failed: {e}")
+        for provider in self.providers:
             try:
-                # Fallback to Replicate (Stable Diffusion)
-                import replicate
-                output = replicate.run(
-                    "stability-ai/stable-diffusion:db21e45d3f7023abc2a46ee38a23973f6dce16bb082a930b0c49861f96d1e5bf",
-                    input={"prompt": full_prompt, "width": 1280, "height": 720, "num_outputs": 1}
-                )
-                img_response = requests.get(output[0])
-                img = Image.open(BytesIO(img_response.content))
+                url = self._call(provider, 'generate', full_prompt)
+                img = self._call(provider, 'download', url)
+                img = img.convert("RGB").resize((1280, 720), Image.Resampling.LANCZOS)
+                img = self.apply_style_postprocess(img, style)
                 img.save(output_path, "JPEG", quality=95)
                 web_path = output_path.replace('.jpg', '_web.jpg')
                 web_img = img.resize((640, 360), Image.Resampling.LANCZOS)
                 web_img.save(web_path, "JPEG", quality=85)
                 return True
-            except Exception as e2:
-                print(f"Replicate also failed: {e2}")
-                return False
+            except Exception as e:
+                print(f"{provider.name} image generation failed: {e}")
+        return False
+    
+    def generate_ai_thumbnails(self, jobs):
+        # jobs: [(transcript_snippet, style, output_path)]. All jobs run at
+        # once on a thread pool, each provider held to its own limit; the
+        # results (success flags) come back in job order. Each distinct
+        # snippet is described once and shared by its styles.
+        if not jobs:
+            return []
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(jobs))) as pool:
+            # Descriptions are queued first, so an image job only ever waits
+            # on a description that is already running
+            contexts = {}
+            for snippet, _, _ in jobs:
+                if snippet not in contexts:
+                    contexts[snippet] = pool.submit(self.generate_context_description, snippet)
+            futures = [
+                pool.submit(lambda job: self.generate_ai_thumbnail(*job, context=contexts[job[0]].result()), job)
+                for job in jobs
+            ]
+            return [future.result() for future in futures]
     
     def apply_style_postprocess(self, img: Image, style: str) -> Image:
         if style == "watercolor":
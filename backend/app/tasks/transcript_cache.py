@@ -0,0 +1,91 @@
+import hashlib
+import json
+import os
+import threading
+
+HASH_BLOCK_SIZE = 1024 * 1024
+
+_hash_memo = {}
+_hash_lock = threading.Lock()
+
+
+def file_content_hash(path):
+    # Hashes are memoised on (path, size, mtime) so repeated lookups for the
+    # same upload only read the file once per process.
+    stat = os.stat(path)
+    memo_key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    with _hash_lock:
+        cached = _hash_memo.get(memo_key)
+    if cached:
+        return cached
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b''):
+            digest.update(block)
+    content_hash = digest.hexdigest()
+    with _hash_lock:
+        _hash_memo[memo_key] = content_hash
+    return content_hash
+
+
+class TranscriptCache:
+    def __init__(self, cache_dir=None, max_memory_entries=8):
+        self.cache_dir = cache_dir or os.getenv("TRANSCRIPT_CACHE_DIR", "./transcripts")
+        self.max_memory_entries = max_memory_entries
+        self._memory = {}
+        self._lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def make_key(self, video_path, model_size, decode_options=None):
+        options = json.dumps(decode_options or {}, sort_keys=True, default=str)
+        raw = f"{file_content_hash(video_path)}|{model_size}|{options}"
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def _disk_path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, key):
+        with self._lock:
+            if key in self._memory:
+                result = self._memory.pop(key)
+                self._memory[key] = result
+                return result
+        path = self._disk_path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                result = json.load(f)
+        except (OSError, ValueError):
+            return None
+        self._remember(key, result)
+        return result
+
+    def put(self, key, result):
+        self._remember(key, result)
+        path = self._disk_path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(result, f, default=_json_default)
+        os.replace(tmp_path, path)
+
+    def get_or_transcribe(self, key, transcribe_fn):
+        result = self.get(key)
+        if result is None:
+            result = transcribe_fn()
+            self.put(key, result)
+        return result
+
+    def _remember(self, key, result):
+        with self._lock:
+            self._memory.pop(key, None)
+            self._memory[key] = result
+            while len(self._memory) > self.max_memory_entries:
+                self._memory.pop(next(iter(self._memory)))
+
+
+def _json_default(value):
+    # Whisper returns numpy scalars in a few segment fields
+    if hasattr(value, 'tolist'):
+        return value.tolist()
+    return str(value)
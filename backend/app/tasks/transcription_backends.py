@@ -0,0 +1,152 @@
+import os
+
+# Decode settings bundled per speed profile. Every backend accepts these
+# keys and translates them to its own engine's arguments.
+SPEED_PROFILES = {
+    "accurate": {
+        "beam_size": 5,
+        "best_of": 5,
+        "temperature": (0.0, 0.2, 0.4, 0.6, 0.8, 1.0),
+        "language": None,
+        "condition_on_previous_text": True,
+    },
+    # Same settings as whisper's transcribe() defaults
+    "balanced": {
+        "beam_size": None,
+        "best_of": 5,
+        "temperature": (0.0, 0.2, 0.4, 0.6, 0.8, 1.0),
+        "language": None,
+        "condition_on_previous_text": True,
+    },
+    "fast": {
+        "beam_size": None,
+        "best_of": 1,
+        "temperature": 0.0,
+        # Auto-detected unless a deployment pins one (e.g. "en"): pinning
+        # skips detection but mistranscribes every other language
+        "language": os.getenv("WHISPER_PINNED_LANGUAGE") or None,
+        "condition_on_previous_text": False,
+    },
+}
+
+
+def normalize_segments(segments):
+    return [
+        {"id": i, "start": float(seg["start"]), "end": float(seg["end"]), "text": seg["text"]}
+        for i, seg in enumerate(segments)
+    ]
+
+
+class TranscriptionBackend:
+    name = None
+
+    def __init__(self, model_size="base"):
+        self.model_size = model_size
+
+    def transcribe(self, audio, **options):
+        # Returns {"text", "segments": [{"id", "start", "end", "text"}], "language"}
+        raise NotImplementedError
+
+    def set_threads(self, threads):
+        # Intra-op threads, sized by the worker's CPU budget
+        import torch
+        torch.set_num_threads(threads)
+
+
+class WhisperBackend(TranscriptionBackend):
+    name = "whisper"
+
+    def __init__(self, model_size="base"):
+        super().__init__(model_size)
+        self.model = self.load_model()
+
+    def load_model(self):
+        import whisper
+        return whisper.load_model(self.model_size, device="cpu")
+
+    def transcribe(self, audio, **options):
+        options = {k: v for k, v in options.items() if v is not None}
+        result = self.model.transcribe(audio, fp16=False, **options)
+        return {
+            "text": result["text"],
+            "segments": normalize_segments(result["segments"]),
+            "language": result.get("language")
+        }
+
+
+class QuantizedWhisperBackend(WhisperBackend):
+    name = "whisper-int8"
+
+    def load_model(self):
+        # Dynamic int8 quantisation of the Linear layers, which dominate CPU
+        # decode time; weights stay fp32 on disk.
+        import torch
+        model = super().load_model()
+        plain_linears(model)
+        return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def plain_linears(model):
+    # whisper builds its layers from whisper.model.Linear, a subclass that
+    # quantize_dynamic skips because it matches module types exactly. On
+    # CPU in fp32 the subclass computes the same as nn.Linear, so swap each
+    # one for a plain nn.Linear sharing its parameters.
+    import torch
+    for parent in list(model.modules()):
+        for name, child in list(parent.named_children()):
+            if isinstance(child, torch.nn.Linear) and type(child) is not torch.nn.Linear:
+                linear = torch.nn.Linear(child.in_features, child.out_features, bias=child.bias is not None)
+                linear.weight = child.weight
+                linear.bias = child.bias
+                setattr(parent, name, linear)
+    return model
+
+
+class FasterWhisperBackend(TranscriptionBackend):
+    name = "faster-whisper"
+
+    def __init__(self, model_size="base", compute_type="int8"):
+        super().__init__(model_size)
+        from faster_whisper import WhisperModel
+        self.model = WhisperModel(model_size, device="cpu", compute_type=compute_type)
+
+    def set_threads(self, threads):
+        # CTranslate2 fixes its thread pool when the model loads
+        pass
+
+    def transcribe(self, audio, **options):
+        temperature = options.get("temperature", 0.0)
+        segments, info = self.model.transcribe(
+            audio,
+            beam_size=options.get("beam_size") or 1,
+            best_of=options.get("best_of") or 1,
+            temperature=list(temperature) if isinstance(temperature, (list, tuple)) else temperature,
+            language=options.get("language"),
+            condition_on_previous_text=options.get("condition_on_previous_text", True)
+        )
+        segments = normalize_segments(
+            {"start": seg.start, "end": seg.end, "text": seg.text} for seg in segments
+        )
+        return {
+            "text": "".join(seg["text"] for seg in segments),
+            "segments": segments,
+            "language": info.language
+        }
+
+
+BACKENDS = {
+    backend.name: backend
+    for backend in (WhisperBackend, QuantizedWhisperBackend, FasterWhisperBackend)
+}
+
+
+def create_backend(name, model_size="base"):
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown transcription backend '{name}'. Available: {sorted(BACKENDS)}")
+    return BACKENDS[name](model_size)
+
+
+def decode_options_for(profile, **overrides):
+    if profile not in SPEED_PROFILES:
+        raise ValueError(f"Unknown speed profile '{profile}'. Available: {sorted(SPEED_PROFILES)}")
+    return {**SPEED_PROFILES[profile], **overrides}
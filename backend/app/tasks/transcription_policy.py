@@ -0,0 +1,74 @@
+import json
+import os
+
+# Most accurate first. rtf is the single-job real-time factor. These are
+# estimates, not measurements: run benchmarks/transcription_rtf.py with
+# --ladder on the worker hardware and put its output in TRANSCRIPTION_LADDER.
+# The whisper-int8 rungs scale the base/balanced estimate by the forward-pass
+# ratios from benchmarks/quantized_decode.py (1 thread, 100 decoder steps):
+# base runs 1.35x faster in int8, but tiny only 1.07x, as its time goes to
+# the fp32 vocabulary projection; tiny fp32 costs 0.60x of base fp32.
+MODEL_LADDER = [
+    {"model_size": "small", "backend": "whisper", "profile": "accurate", "rtf": 1.20},
+    {"model_size": "small", "backend": "whisper", "profile": "balanced", "rtf": 0.80},
+    {"model_size": "base", "backend": "whisper", "profile": "balanced", "rtf": 0.35},
+    {"model_size": "base", "backend": "whisper-int8", "profile": "fast", "rtf": 0.26},
+    {"model_size": "tiny", "backend": "whisper-int8", "profile": "fast", "rtf": 0.20},
+]
+
+DEFAULT_LATENCY_TARGET = float(os.getenv("DEFAULT_LATENCY_TARGET_SECONDS", "1800"))
+
+
+def tenant_latency_target(tenant_id=None):
+    # TENANT_LATENCY_TARGETS is a JSON object of tenant id -> seconds
+    targets = json.loads(os.getenv("TENANT_LATENCY_TARGETS", "{}"))
+    return float(targets.get(tenant_id, DEFAULT_LATENCY_TARGET)) if tenant_id else DEFAULT_LATENCY_TARGET
+
+
+def celery_queue_depth(celery_app, queue="celery"):
+    try:
+        with celery_app.connection_or_acquire() as conn:
+            return conn.default_channel.queue_declare(queue=queue, passive=True).message_count
+    except Exception:
+        # An unreachable broker shouldn't fail the job; assume no backlog
+        return 0
+
+
+class TranscriptionPolicy:
+    def __init__(self, ladder=None, worker_slots=None, avg_job_seconds=None):
+        # TRANSCRIPTION_LADDER (JSON list of rungs) overrides the built-in ladder,
+        # e.g. to pin a single backend/profile on a given fleet
+        self.ladder = ladder or json.loads(os.getenv("TRANSCRIPTION_LADDER", "null")) or MODEL_LADDER
+        self.worker_slots = worker_slots or int(os.getenv("TRANSCRIPTION_WORKER_SLOTS", "4"))
+        self.avg_job_seconds = avg_job_seconds or float(os.getenv("AVG_JOB_SECONDS", "600"))
+
+    def estimated_wait(self, queue_depth):
+        return queue_depth * self.avg_job_seconds / self.worker_slots
+
+    def choose(self, duration, queue_depth=0, latency_target=DEFAULT_LATENCY_TARGET):
+        # Pick the most accurate rung whose transcription fits in what is
+        # left of the latency target after the expected queue wait. When
+        # nothing fits, fall back to the fastest rung, so a growing backlog
+        # makes every job cheaper.
+        wait = self.estimated_wait(queue_depth)
+        budget = latency_target - wait
+        for rung in self.ladder:
+            estimate = duration * rung["rtf"]
+            if estimate <= budget:
+                reason = "fits latency target"
+                break
+        else:
+            rung = self.ladder[-1]
+            estimate = duration * rung["rtf"]
+            reason = "over budget, using fastest profile"
+        return {
+            "model_size": rung["model_size"],
+            "backend": rung["backend"],
+            "profile": rung["profile"],
+            "estimated_seconds": round(estimate, 1),
+            "estimated_wait_seconds": round(wait, 1),
+            "duration": duration,
+            "queue_depth": queue_depth,
+            "latency_target": latency_target,
+            "reason": reason
+        }
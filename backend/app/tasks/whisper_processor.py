@@ -1,80 +1,91 @@
-import whisper
 import os
 from datetime import timedelta
+from app.tasks.transcript_cache import TranscriptCache
+from app.tasks.audio_ingest import load_pcm
+from app.tasks.highlight_selector import select_highlights
+from app.tasks.segment_scoring import get_scorer
+from app.tasks.audio_features import blend_audio_scores
+from app.tasks.transcription_backends import create_backend, decode_options_for
+from app.tasks.chunked_transcriber import ChunkedTranscriber
+from app.tasks.media_probe import get_media_info
 
 class WhisperProcessor:
-    def __init__(self, model_size="base"):
-        print(f"Loading Whisper {model_size} model...")
-        self.model = whisper.load_model(model_size)
-        print("Whisper loaded successfully!")
+    def __init__(self, model_size="base", backend="whisper", profile="balanced", cache=None,
+                 chunked=False, chunk_seconds=600, max_workers=None, max_memory_mb=None,
+                 **decode_options):
+        self.model_size = model_size
+        self.backend_name = backend
+        # Default speed profile; transcribe() can pick another per call, as
+        # the profile only changes decode options, not the loaded model
+        self.profile = profile
+        self.decode_overrides = decode_options
+        self.cache = cache or TranscriptCache()
+        self.chunker = ChunkedTranscriber(
+            model_size, backend=backend, chunk_seconds=chunk_seconds,
+            max_workers=max_workers, max_memory_mb=max_memory_mb
+        ) if chunked else None
+        self._backend = None
     
-    def transcribe(self, video_path):
-        result = self.model.transcribe(video_path)
-        return result
+    @property
+    def backend(self):
+        # Loaded on first use so chunked runs don't hold a copy in the parent
+        if self._backend is None:
+            print(f"Loading {self.backend_name} {self.model_size} model...")
+            self._backend = create_backend(self.backend_name, self.model_size)
+            print("Whisper loaded successfully!")
+        return self._backend
     
-    def extract_highlights(self, video_path, min_duration=60, max_duration=120):
-        result = self.transcribe(video_path)
+    def transcribe(self, video_path, pcm_path=None, threads=None, profile=None):
+        # The cache key is the source content, so transcripts made from the
+        # shared PCM artifact and from the container are interchangeable.
+        model_key = f"{self.backend_name}:{self.model_size}"
+        decode_options = decode_options_for(profile or self.profile, **self.decode_overrides)
+        duration = get_media_info(video_path).duration if self.chunker else None
+        if self.chunker and self.chunker.should_chunk(duration):
+            options = {**decode_options, "chunk_seconds": self.chunker.chunk_seconds}
+            key = self.cache.make_key(video_path, model_key, options)
+            return self.cache.get_or_transcribe(
+                key, lambda: self.chunker.transcribe(video_path, duration, pcm_path=pcm_path, cpu_budget=threads,
+                                                     load_backend=lambda: self.backend, **decode_options)
+            )
+        key = self.cache.make_key(video_path, model_key, decode_options)
+        audio = load_pcm(pcm_path, mode='c') if pcm_path else video_path
+        return self.cache.get_or_transcribe(key, lambda: self._transcribe_in_process(audio, decode_options, threads))
+    
+    def _transcribe_in_process(self, audio, decode_options, threads=None):
+        if threads:
+            self.backend.set_threads(threads)
+        return self.backend.transcribe(audio, **decode_options)
+    
+    def extract_highlights(self, video_path, min_duration=60, max_duration=120, transcript=None, max_clips=5,
+                           tenant_id=None, audio_features=None, audio_weight=10.0):
+        result = transcript or self.transcribe(video_path)
         segments = result["segments"]
         
-        scored_segments = []
-        for seg in segments:
-            score = 0
-            text = seg["text"].lower()
-            duration = seg["end"] - seg["start"]
-            if duration < 5:
+        scored_segments = get_scorer(tenant_id).score_segments(segments)
+        if audio_features is not None:
+            scored_segments = blend_audio_scores(scored_segments, audio_features, weight=audio_weight)
+        return select_highlights(scored_segments, min_duration=min_duration,
+                                 max_duration=max_duration, max_clips=max_clips)
+    
+    def segments_in_range(self, transcript, start, end):
+        # Segments overlapping [start, end], re-timed relative to start
+        segments = []
+        for seg in transcript["segments"]:
+            if seg["end"] <= start or seg["start"] >= end:
                 continue
-            keywords = ["amazing", "wow", "important", "key", "secret", 
-                       "breakthrough", "incredible", "game changer"]
-            for kw in keywords:
-                if kw in text:
-                    score += 10
-            if "?" in text:
-                score += 15
-            if "!" in text:
-                score += 10
-            score += min(duration / 5, 20)
-            scored_segments.append({
-                "start": seg["start"],
-                "end": seg["end"],
-                "text": seg["text"],
-                "score": score,
-                "duration": duration
+            segments.append({
+                **seg,
+                "start": max(seg["start"], start) - start,
+                "end": min(seg["end"], end) - start
             })
-        
-        scored_segments.sort(key=lambda x: x["score"], reverse=True)
-        clips = []
-        used_times = set()
-        for seg in scored_segments:
-            time_range = range(int(seg["start"]), int(seg["end"]) + 1)
-            if any(t in used_times for t in time_range):
-                continue
-            clip_start = seg["start"]
-            clip_end = seg["end"]
-            clip_texts = [seg["text"]]
-            for other in scored_segments:
-                if other["start"] > clip_end and other["start"] - clip_end < 10:
-                    clip_end = other["end"]
-                    clip_texts.append(other["text"])
-                    for t in range(int(other["start"]), int(other["end"]) + 1):
-                        used_times.add(t)
-            clip_duration = clip_end - clip_start
-            if clip_duration >= min_duration:
-                clips.append({
-                    "start": clip_start,
-                    "end": clip_end,
-                    "duration": clip_duration,
-                    "text": " ".join(clip_texts),
-                    "score": seg["score"]
-                })
-                for t in range(int(clip_start), int(clip_end) + 1):
-                    used_times.add(t)
-            if len(clips) >= 5:
-                break
-        return clips
+        return segments
     
-    def generate_srt(self, video_path, output_path):
-        result = self.transcribe(video_path)
+    def generate_srt(self, video_path, output_path, transcript=None, start=None, end=None):
+        result = transcript or self.transcribe(video_path)
         segments = result["segments"]
+        if start is not None or end is not None:
+            segments = self.segments_in_range(result, start or 0, end if end is not None else float('inf'))
         with open(output_path, 'w', encoding='utf-8') as srt_file:
             for i, seg in enumerate(segments, start=1):
                 start_time = str(timedelta(seconds=seg["start"]))
@@ -84,3 +95,4 @@ class WhisperProcessor:
                 srt_file.write(f"{i}\n")
                 srt_file.write(f"{start_time} --> {end_time}\n")
                 srt_file.write(f"{seg['text'].strip()}\n\n")
+        return output_path
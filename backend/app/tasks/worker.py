@@ -1,52 +1,352 @@
 from app.celery_app import celery
-from app.tasks.whisper_processor import WhisperProcessor
-from app.tasks.thumbnail_generator import ThumbnailGenerator
-from app.tasks.clip_processor import ClipProcessor
-from app.tasks.title_generator import TitleGenerator
-from app.tasks.voiceover_styles import AdvancedVoiceoverGenerator
-from app.tasks.thumbnail_styles import ThumbnailStylist
-from app.tasks.clip_lengths import MultiLengthClipProcessor
+from app.tasks.signatures import PROCESS_VIDEO, RENDER_FINALS, enqueue_render_finals
+from app.tasks.transcription_policy import celery_queue_depth, tenant_latency_target
+from app.tasks.media_probe import get_media_info
+from app.tasks.media_executor import get_media_executor
+from app.tasks.ffmpeg_progress import ProgressTracker, record_speed_samples
+from app.tasks.asset_manifest import AssetManifest
+from app.tasks.process_supervisor import get_supervisor
+from celery.exceptions import SoftTimeLimitExceeded
+from celery.signals import worker_process_init
 import os
+import signal
 import json
+import time
 
-# Initialize processors
-whisper = WhisperProcessor(model_size="base")
-thumbnail_gen = ThumbnailGenerator()
-clip_processor = ClipProcessor(output_dir="./clips")
-title_gen = TitleGenerator()
-advanced_voiceover = AdvancedVoiceoverGenerator()
-thumbnail_stylist = ThumbnailStylist()
-multi_length_clips = MultiLengthClipProcessor()
+_processors = None
 
-@celery.task(bind=True)
-def process_video(self, video_path: str):
+def get_processors():
+    # Built inside worker processes only; the API enqueues by task name via
+    # app.tasks.signatures and never imports torch, Whisper or OpenCV.
+    global _processors
+    if _processors is None:
+        from app.tasks.transcription_policy import TranscriptionPolicy
+        from app.tasks.thumbnail_generator import ThumbnailGenerator
+        from app.tasks.clip_processor import ClipProcessor
+        from app.tasks.title_generator import TitleGenerator
+        from app.tasks.voiceover_styles import AdvancedVoiceoverGenerator
+        from app.tasks.thumbnail_styles import ThumbnailStylist
+        from app.tasks.clip_lengths import MultiLengthClipProcessor
+        from app.tasks.audio_ingest import AudioIngest
+        from app.tasks.analysis_proxy import AnalysisProxy
+        from app.tasks.render_planner import RenderPlanner
+        from app.tasks.artifact_cache import get_artifact_cache
+        artifact_cache = get_artifact_cache() if os.getenv("ARTIFACT_CACHE_ENABLED", "1") == "1" else None
+        _processors = {
+            'transcription_policy': TranscriptionPolicy(),
+            'thumbnail_gen': ThumbnailGenerator(cache=artifact_cache),
+            'clip_processor': ClipProcessor(output_dir="./clips", cache=artifact_cache),
+            'title_gen': TitleGenerator(),
+            'advanced_voiceover': AdvancedVoiceoverGenerator(),
+            'thumbnail_stylist': ThumbnailStylist(),
+            'multi_length_clips': MultiLengthClipProcessor(stream_copy=os.getenv("CLIP_STREAM_COPY", "0") == "1"),
+            'audio_ingest': AudioIngest(output_dir="./audio"),
+            'analysis_proxy': AnalysisProxy(output_dir="./proxies") if os.getenv("ANALYSIS_PROXY", "1") == "1" else None,
+            'render_planner': RenderPlanner(),
+            'artifact_cache': artifact_cache,
+        }
+    return _processors
+
+_whisper_processors = {}
+
+def get_whisper(model_size, backend):
+    # At most one loaded model per backend: picking another size drops the
+    # previous one, so a backlog spike that walks down the ladder can't leave
+    # every rung resident in this process. The speed profile is passed to
+    # transcribe() per call and shares the model.
+    processor = _whisper_processors.get(backend)
+    if processor is None or processor.model_size != model_size:
+        from app.tasks.whisper_processor import WhisperProcessor
+        _whisper_processors.pop(backend, None)
+        processor = WhisperProcessor(
+            model_size=model_size,
+            backend=backend,
+            chunked=True,
+            chunk_seconds=int(os.getenv("WHISPER_CHUNK_SECONDS", "600"))
+        )
+        _whisper_processors[backend] = processor
+    return processor
+
+@worker_process_init.connect
+def _warm_processors(**kwargs):
+    get_processors()
+    supervisor = get_supervisor()
+    supervisor.reap_orphans()
+    # A revoke with terminate=True SIGTERMs this process; take the ffmpeg
+    # trees down with it instead of leaving them running
+    previous = signal.getsignal(signal.SIGTERM)
+
+    def _terminate(signum, frame):
+        supervisor.cancel('terminated')
+        if callable(previous):
+            previous(signum, frame)
+        else:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            os.kill(os.getpid(), signal.SIGTERM)
+
+    signal.signal(signal.SIGTERM, _terminate)
+
+def render_final_assets(video_path, video_id, clip_data, aac_path=None, report=None):
+    # Main clips, web copies and every multi-length cut are planned together
+    # so overlapping ranges with the same encode settings are encoded once
+    processors = get_processors()
+    clip_processor = processors['clip_processor']
+    multi_length_clips = processors['multi_length_clips']
+    media = get_media_info(video_path)
+    length_specs, copied_lengths = multi_length_clips.plan_lengths(video_path, clip_data, video_id,
+                                                                   audio_path=aac_path)
+    render_planner = processors['render_planner']
+    render_progress = ProgressTracker(report=report)
+    rendered, render_plan = render_planner.execute(
+        video_path,
+        clip_processor.output_specs(clip_data, video_id, media) + length_specs,
+        os.path.join("./clips", video_id),
+        audio_path=aac_path,
+        progress=render_progress,
+        cache=processors['artifact_cache']
+    )
+    if render_progress.speed_samples:
+        record_speed_samples(render_progress.speed_samples)
+    render_plan['encode_speed'] = render_progress.speed_stats()
+    clip_results = clip_processor.collect_results(clip_data, rendered, media)
+    failed = [clip for clip, result in zip(clip_data, clip_results) if not result['success']]
+    if failed:
+        # A failed cluster takes every output sharing its decode down with
+        # it; the per-clip path retries the main clips on their own
+        retried = iter(clip_processor.extract_multiple_clips(video_path, failed, video_id, audio_path=aac_path))
+        clip_results = [next(retried) if not result['success'] else result for result in clip_results]
+    failed_lengths = [spec for spec in length_specs if not rendered[spec.key]['success']]
+    if failed_lengths:
+        # ...and each multi-length cut is re-encoded from its own decode
+        retried_lengths, _ = render_planner.execute(
+            video_path, failed_lengths, os.path.join("./clips", video_id),
+            audio_path=aac_path, cache=processors['artifact_cache'], isolate=True
+        )
+        rendered.update(retried_lengths)
+        render_plan['retried_outputs'] = len(failed_lengths)
+    multi_length_results = multi_length_clips.collect_results(clip_data, rendered, copied_lengths, media)
+    return clip_results, multi_length_results, render_plan
+
+def final_asset_entries(clip_results, multi_length_results):
+    assets = {}
+    for result in clip_results:
+        if result['success']:
+            assets[f"clip_{result['clip_id']:03d}"] = {
+                'tier': 'final', 'path': result['path'], 'web_path': result['web_path']
+            }
+    for clip_multi in multi_length_results:
+        for length_type, output in clip_multi['lengths'].items():
+            assets[f"clip_{clip_multi['clip_id']:03d}_{length_type}"] = {'tier': 'final', 'path': output['path']}
+    return assets
+
+@celery.task(bind=True, name=RENDER_FINALS)
+def render_finals(self, video_path: str, video_id: str, clip_data: list, aac_path: str = None):
+    get_supervisor().reset()
+    # Progress is reported from render threads, where self.request is empty
+    task_id = self.request.id
+    manifest = AssetManifest.for_video(video_id)
+    try:
+        clip_results, multi_length_results, render_plan = render_final_assets(
+            video_path, video_id, clip_data, aac_path,
+            report=lambda snapshot: self.update_state(
+                task_id=task_id, state='PROCESSING',
+                meta={'stage': 'rendering final clips', 'progress': snapshot}
+            )
+        )
+        manifest.update(final_asset_entries(clip_results, multi_length_results))
+        # Outputs that still failed after the retries won't get a final;
+        # clients stop polling for them
+        assets = manifest.fail_unfinished("final render failed")
+        preview_specs = get_processors()['clip_processor'].preview_specs(clip_data, video_id,
+                                                                         get_media_info(video_path))
+        for spec, result in zip(preview_specs, clip_results):
+            if result['success'] and os.path.exists(spec.path):
+                os.remove(spec.path)
+        return {
+            "status": "completed",
+            "video_id": video_id,
+            "assets": assets,
+            "clips": clip_results,
+            "multi_length": multi_length_results,
+            "render_plan": render_plan,
+            "media_supervisor": get_supervisor().metrics()
+        }
+    except Exception as e:
+        import traceback
+        if isinstance(e, SoftTimeLimitExceeded):
+            get_supervisor().cancel('soft_time_limit')
+        try:
+            manifest.fail_unfinished(str(e))
+        except OSError:
+            pass
+        return {
+            "status": "failed",
+            "video_id": video_id,
+            "error": str(e),
+            "traceback": traceback.format_exc(),
+            "message": f"❌ Final render failed: {str(e)}"
+        }
+
+@celery.task(bind=True, name=PROCESS_VIDEO)
+def process_video(self, video_path: str, tenant_id: str = None):
+    get_supervisor().reset()
+    task_id = self.request.id
     try:
+        processors = get_processors()
+        thumbnail_gen = processors['thumbnail_gen']
+        clip_processor = processors['clip_processor']
+        title_gen = processors['title_gen']
+        advanced_voiceover = processors['advanced_voiceover']
+        thumbnail_stylist = processors['thumbnail_stylist']
+        audio_ingest = processors['audio_ingest']
+        analysis_proxy = processors['analysis_proxy']
+        transcription_policy = processors['transcription_policy']
+        render_planner = processors['render_planner']
+        artifact_cache = processors['artifact_cache']
         video_id = os.path.basename(video_path).split('.')[0]
+        # Probed at upload; every stage reads this one cached MediaInfo
+        media = get_media_info(video_path)
+        
+        if not media.has_audio:
+            # The API rejects these; a task enqueued some other way fails here
+            # instead of inside Whisper
+            raise ValueError("Video has no audio track to transcribe")
+        
+        # === STAGE 0: AUDIO INGEST ===
+        self.update_state(state='PROCESSING', meta={'stage': 'extracting audio'})
+        audio = audio_ingest.prepare(video_path, video_id)
+        pcm_path = audio['pcm_path']
+        aac_path = audio['aac_path']
         
         # === STAGE 1: WHISPER ANALYSIS ===
         self.update_state(state='PROCESSING', meta={'stage': 'analyzing with Whisper AI'})
-        highlights = whisper.extract_highlights(video_path, min_duration=60, max_duration=120)
+        duration = media.duration
+        transcription = transcription_policy.choose(
+            duration,
+            queue_depth=celery_queue_depth(celery),
+            latency_target=tenant_latency_target(tenant_id)
+        )
+        whisper = get_whisper(transcription['model_size'], transcription['backend'])
+        transcribe_started = time.time()
+        media_executor = get_media_executor()
+        # Transcription takes the whole CPU budget; its torch threads are sized
+        # to it, and ffmpeg jobs queued meanwhile wait rather than oversubscribe
+        with media_executor.reserve(media_executor.cpu_budget) as threads:
+            transcript = whisper.transcribe(video_path, pcm_path=pcm_path, threads=threads,
+                                            profile=transcription['profile'])
+        transcription['elapsed_seconds'] = round(time.time() - transcribe_started, 1)
+        # Encoded in the background while previews and captions are made; the
+        # thumbnails are the first stage to need it
+        proxy_job = media_executor.spawn(analysis_proxy.prepare, video_path, video_id) if analysis_proxy else None
+        from app.tasks.audio_features import load_or_compute_features
+        audio_features = load_or_compute_features(pcm_path)
+        highlights = whisper.extract_highlights(video_path, min_duration=60, max_duration=120, transcript=transcript,
+                                                max_clips=int(os.getenv("HIGHLIGHT_MAX_CLIPS", "5")),
+                                                tenant_id=tenant_id, audio_features=audio_features)
+        # Reuses the measurement taken at ingest; no audio is read again
+        from app.tasks.loudness import load_or_measure, range_loudness
+        loudness_energies, _ = load_or_measure(pcm_path)
+        highlight_loudness = [range_loudness(loudness_energies, h['start'], h['end']) for h in highlights]
+        
+        clip_data = [{'id': i+1, 'start_time': h['start'], 'end_time': h['end'], 'text_snippet': h['text'], 'ai_score': h['score']}
+                     for i, h in enumerate(highlights)]
+        manifest = AssetManifest.for_video(video_id)
+        progressive = os.getenv("PROGRESSIVE_RENDER", "1") == "1"
+        if progressive:
+            # === STAGE 1b: PREVIEWS ===
+            self.update_state(state='PROCESSING', meta={'stage': 'rendering previews'})
+            preview_rendered, _ = render_planner.execute(
+                video_path,
+                clip_processor.preview_specs(clip_data, video_id, media),
+                os.path.join("./clips", video_id),
+                audio_path=aac_path,
+                progress=ProgressTracker(report=lambda snapshot: self.update_state(
+                    task_id=task_id, state='PROCESSING',
+                    meta={'stage': 'rendering previews', 'progress': snapshot}
+                )),
+                cache=artifact_cache
+            )
+            preview_results = clip_processor.collect_results(clip_data, preview_rendered, media)
+            # Publishing previews only makes sense if every clip has one;
+            # otherwise the finals are rendered inline below instead
+            progressive = all(result['success'] for result in preview_results)
+            if not progressive:
+                for result in preview_results:
+                    if result['success'] and os.path.exists(result['path']):
+                        os.remove(result['path'])
+        if progressive:
+            preview_assets = {
+                f"clip_{clip['id']:03d}_{length_type}": {'tier': 'pending', 'path': None}
+                for clip in clip_data for length_type in ('teaser', 'standard', 'explainer')
+            }
+            for result in preview_results:
+                if result['success']:
+                    preview_assets[f"clip_{result['clip_id']:03d}"] = {
+                        'tier': 'preview', 'path': result['path'], 'web_path': result['web_path']
+                    }
+            assets = manifest.update(preview_assets)
+            self.update_state(state='PROCESSING', meta={'stage': 'previews ready', 'assets': assets})
         
         # === STAGE 2: CAPTIONS ===
         self.update_state(state='PROCESSING', meta={'stage': 'generating captions'})
         captions_dir = "./captions"
         os.makedirs(captions_dir, exist_ok=True)
         srt_path = os.path.join(captions_dir, f"{video_id}.srt")
-        whisper.generate_srt(video_path, srt_path)
+        srt_profile = {key: transcription[key] for key in ('model_size', 'backend', 'profile')}
+        
+        def write_srt(path, start=None, end=None):
+            create = lambda: {'path': whisper.generate_srt(video_path, path, transcript=transcript,
+                                                           start=start, end=end)}
+            if artifact_cache is None:
+                return create()
+            key = artifact_cache.make_key(video_path, 'srt', start, end, srt_profile)
+            return artifact_cache.get_or_create(key, {'captions.srt': path}, create)
+        
+        write_srt(srt_path)
+        clip_captions_dir = os.path.join(captions_dir, video_id)
+        os.makedirs(clip_captions_dir, exist_ok=True)
+        clip_captions = []
+        for i, highlight in enumerate(highlights):
+            clip_srt_path = os.path.join(clip_captions_dir, f"clip_{i+1:03d}.srt")
+            write_srt(clip_srt_path, start=highlight['start'], end=highlight['end'])
+            clip_captions.append(clip_srt_path)
         
         # === STAGE 3: BASIC THUMBNAILS ===
         self.update_state(state='PROCESSING', meta={'stage': 'generating thumbnails'})
         thumbnails_dir = f"./thumbnails/{video_id}"
-        clip_thumbnails = thumbnail_gen.generate_clip_thumbnails(video_path, highlights, thumbnails_dir)
+        proxy_path = proxy_job.result() if proxy_job else None
+        clip_thumbnails = thumbnail_gen.generate_clip_thumbnails(video_path, highlights, thumbnails_dir,
+                                                                 proxy_path=proxy_path)
         
         # === STAGE 4: EXTRACT VIDEO CLIPS ===
-        self.update_state(state='PROCESSING', meta={'stage': 'extracting video clips'})
-        clip_data = [{'id': i+1, 'start_time': h['start'], 'end_time': h['end'], 'text_snippet': h['text'], 'ai_score': h['score']}
-                     for i, h in enumerate(highlights)]
-        clip_results = clip_processor.extract_multiple_clips(video_path, clip_data, video_id)
+        stage_meta = {}
+        if progressive:
+            # Finals render in the background once no analysis job is queued
+            # and replace the previews in the asset manifest as they land
+            render_finals_task = enqueue_render_finals(video_path, video_id, clip_data, aac_path)
+            # Clip-render progress is reported on that task; every later stage
+            # carries its id so the UI can follow it right away
+            stage_meta['render_finals_task_id'] = render_finals_task.id
+            self.update_state(state='PROCESSING', meta={**stage_meta, 'stage': 'final renders queued'})
+            clip_results = preview_results
+            # The multi-length cuts come from render_finals too; their entries
+            # are read from the manifest when the result is put together
+            multi_length_results = None
+            render_plan = None
+        else:
+            self.update_state(state='PROCESSING', meta={'stage': 'extracting video clips'})
+            render_finals_task = None
+            clip_results, multi_length_results, render_plan = render_final_assets(
+                video_path, video_id, clip_data, aac_path,
+                report=lambda snapshot: self.update_state(
+                    task_id=task_id, state='PROCESSING',
+                    meta={'stage': 'extracting video clips', 'progress': snapshot}
+                )
+            )
+            manifest.update(final_asset_entries(clip_results, multi_length_results))
         
         # === STAGE 5: GENERATE AI TITLES ===
-        self.update_state(state='PROCESSING', meta={'stage': 'generating AI titles'})
+        self.update_state(state='PROCESSING', meta={**stage_meta, 'stage': 'generating AI titles'})
         clip_titles = []
         for i, (highlight, clip_file) in enumerate(zip(highlights, clip_results)):
             if clip_file['success']:
@@ -61,12 +361,8 @@ def process_video(self, video_path: str):
                     'hashtags': hashtags
                 })
         
-        # === STAGE 6: MULTI‑LENGTH CLIPS ===
-        self.update_state(state='PROCESSING', meta={'stage': 'creating multiple clip lengths'})
-        multi_length_results = multi_length_clips.extract_all_lengths(video_path, clip_data, video_id)
-        
         # === STAGE 7: STYLED VOICEOVERS (for top 2 clips, 2 styles each) ===
-        self.update_state(state='PROCESSING', meta={'stage': 'generating advanced voiceovers'})
+        self.update_state(state='PROCESSING', meta={**stage_meta, 'stage': 'generating advanced voiceovers'})
         voiceover_results = []
         voiceover_styles = ["solo", "dual_host", "interview", "debate", "storytelling"]
         voiceovers_dir = f"./voiceovers/{video_id}"
@@ -79,31 +375,53 @@ def process_video(self, video_path: str):
                     voiceover_results.append({'clip_id': i+1, 'style': style, 'audio_path': audio_path, 'script': result['script']})
         
         # === STAGE 8: STYLED THUMBNAILS (for top 3 clips, 3 styles each) ===
-        self.update_state(state='PROCESSING', meta={'stage': 'generating AI thumbnails'})
+        self.update_state(state='PROCESSING', meta={**stage_meta, 'stage': 'generating AI thumbnails'})
         thumbnail_styles = ["cinematic", "anime", "watercolor", "retro_print", "whiteboard", "clickbait"]
         styled_thumbnails = []
-        for i, highlight in enumerate(highlights[:3]):
-            for style in thumbnail_styles[:3]:
-                thumb_path = os.path.join(thumbnails_dir, f"clip_{i+1}_{style}.jpg")
-                success = thumbnail_stylist.generate_ai_thumbnail(highlight['text'], style, thumb_path)
-                if success:
-                    title = clip_titles[i]['best_title'] if i < len(clip_titles) else f"Clip {i+1}"
-                    thumbnail_stylist.add_text_overlay(thumb_path, title)
-                    styled_thumbnails.append({
-                        'clip_id': i+1,
-                        'style': style,
-                        'path': thumb_path,
-                        'web_path': thumb_path.replace('.jpg', '_web.jpg')
-                    })
+        styled_jobs = [
+            (i, style, os.path.join(thumbnails_dir, f"clip_{i+1}_{style}.jpg"))
+            for i in range(len(highlights[:3]))
+            for style in thumbnail_styles[:3]
+        ]
+        # Every clip x style request is in flight at once; results keep job order
+        styled_results = thumbnail_stylist.generate_ai_thumbnails([
+            (highlights[i]['text'], style, thumb_path) for i, style, thumb_path in styled_jobs
+        ])
+        for (i, style, thumb_path), success in zip(styled_jobs, styled_results):
+            if success:
+                title = clip_titles[i]['best_title'] if i < len(clip_titles) else f"Clip {i+1}"
+                thumbnail_stylist.add_text_overlay(thumb_path, title)
+                styled_thumbnails.append({
+                    'clip_id': i+1,
+                    'style': style,
+                    'path': thumb_path,
+                    'web_path': thumb_path.replace('.jpg', '_web.jpg')
+                })
         
         # === STAGE 9: COMBINE RESULTS ===
-        self.update_state(state='PROCESSING', meta={'stage': 'finalizing results'})
+        self.update_state(state='PROCESSING', meta={**stage_meta, 'stage': 'finalizing results'})
+        # render_finals may already have swapped some previews for finals
+        # (and deleted the previews), so each clip's file comes from the manifest
+        assets = manifest.load()
         clips = []
         for i, (highlight, thumb, clip_file, title_data) in enumerate(zip(highlights, clip_thumbnails, clip_results, clip_titles)):
             if clip_file['success']:
-                clip_multi = next((m for m in multi_length_results if m['clip_id'] == i+1), None)
+                if multi_length_results is None:
+                    # Rendered by render_finals_task_id; each cut reports its
+                    # current tier, 'pending' until that task lands it
+                    clip_lengths = {}
+                    for length_type in ('teaser', 'standard', 'explainer'):
+                        entry = assets.get(f"clip_{i+1:03d}_{length_type}")
+                        if entry:
+                            clip_lengths[length_type] = entry
+                else:
+                    clip_multi = next((m for m in multi_length_results if m['clip_id'] == i+1), None)
+                    clip_lengths = clip_multi['lengths'] if clip_multi else {}
                 clip_voiceovers = [vo for vo in voiceover_results if vo['clip_id'] == i+1]
                 clip_styled_thumbs = [st for st in styled_thumbnails if st['clip_id'] == i+1]
+                clip_asset = assets.get(f"clip_{i+1:03d}") or {
+                    'tier': 'final', 'path': clip_file['path'], 'web_path': clip_file['web_path']
+                }
                 clip_info = {
                     "id": i+1,
                     "start_time": highlight["start"],
@@ -121,13 +439,16 @@ def process_video(self, video_path: str):
                         "time": thumb['time'],
                         "has_faces": thumb['has_faces']
                     },
+                    "captions_file": clip_captions[i],
+                    "source_loudness_lufs": highlight_loudness[i],
                     "styled_thumbnails": clip_styled_thumbs,
                     "voiceover_options": clip_voiceovers,
-                    "multi_length": clip_multi['lengths'] if clip_multi else {},
+                    "multi_length": clip_lengths,
                     "video_file": {
-                        "path": clip_file['path'],
-                        "web_path": clip_file['web_path'],
-                        "size": os.path.getsize(clip_file['path']) if os.path.exists(clip_file['path']) else 0
+                        "tier": clip_asset['tier'],
+                        "path": clip_asset['path'],
+                        "web_path": clip_asset.get('web_path'),
+                        "size": os.path.getsize(clip_asset['path']) if os.path.exists(clip_asset['path']) else 0
                     }
                 }
                 clips.append(clip_info)
@@ -137,6 +458,14 @@ def process_video(self, video_path: str):
             "video_id": video_id,
             "video_path": video_path,
             "captions_file": srt_path,
+            "transcription": transcription,
+            "loudness": audio['loudness'],
+            "render_plan": render_plan,
+            "render_finals_task_id": render_finals_task.id if render_finals_task else None,
+            "assets": assets,
+            "media_executor": media_executor.metrics(),
+            "media_supervisor": get_supervisor().metrics(),
+            "artifact_cache": artifact_cache.stats() if artifact_cache else None,
             "thumbnails_dir": thumbnails_dir,
             "voiceovers_dir": voiceovers_dir,
             "clips_dir": f"./clips/{video_id}",
@@ -153,6 +482,8 @@ def process_video(self, video_path: str):
         }
     except Exception as e:
         import traceback
+        if isinstance(e, SoftTimeLimitExceeded):
+            get_supervisor().cancel('soft_time_limit')
         return {
             "status": "failed",
             "error": str(e),
@@ -1,7 +1,7 @@
 from fastapi import APIRouter, UploadFile, File, HTTPException
 import uuid
 import os
-from app.tasks.worker import process_video
+from app.tasks.signatures import enqueue_process_video
 import aiofiles
 
 router = APIRouter()
@@ -44,7 +44,7 @@ async def upload_video(file: UploadFile = File(...)):
         await f.write(content)
     
     # Start async processing
-    task = process_video.delay(filepath)
+    task = enqueue_process_video(filepath)
     
     return {
         "video_id": video_id,
@@ -1,6 +1,6 @@
 from fastapi import FastAPI, File, UploadFile, HTTPException
 from fastapi.responses import JSONResponse
-from app.tasks.worker import process_video
+from app.tasks.signatures import enqueue_process_video
 import uuid
 import os
 import aiofiles
@@ -32,7 +32,7 @@ async def upload_video(file: UploadFile = File(...)):
         await f.write(content)
     
     # Start processing task
-    task = process_video.delay(file_path)
+    task = enqueue_process_video(file_path)
     
     return {
         "file_id": file_id,
@@ -0,0 +1,67 @@
+"""Benchmark AI thumbnail generation with the offline stub provider.
+
+Generates --clips x --styles styled thumbnails the way Stage 8 used to, one
+generate_ai_thumbnail call after another, and then through
+ThumbnailStylist.generate_ai_thumbnails, which runs every job at once under
+the per-provider limit. The stub sleeps for fixed describe/generate/download
+latencies instead of calling a network API, so the wall times isolate the
+scheduling. Both runs must produce the same results in the same order.
+
+    python -m benchmarks.ai_thumbnails --clips 3 --styles 3 --limit 4
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+from app.tasks.thumbnail_styles import StubImageProvider, ThumbnailStylist
+
+STYLES = ["cinematic", "anime", "watercolor", "retro_print", "whiteboard", "clickbait"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clips", type=int, default=3)
+    parser.add_argument("--styles", type=int, default=3)
+    parser.add_argument("--limit", type=int, default=4, help="concurrent requests allowed to the provider")
+    parser.add_argument("--describe-latency", type=float, default=0.3)
+    parser.add_argument("--generate-latency", type=float, default=1.5)
+    parser.add_argument("--download-latency", type=float, default=0.2)
+    args = parser.parse_args()
+
+    provider = StubImageProvider(args.describe_latency, args.generate_latency, args.download_latency)
+    stylist = ThumbnailStylist(providers=[provider], concurrency={provider.name: args.limit})
+    workdir = tempfile.mkdtemp(prefix="clipforge-bench-")
+    try:
+        def jobs(tag):
+            return [
+                (f"highlight {i} transcript", style, os.path.join(workdir, f"{tag}_clip_{i+1}_{style}.jpg"))
+                for i in range(args.clips)
+                for style in STYLES[:args.styles]
+            ]
+
+        started = time.perf_counter()
+        sequential = [stylist.generate_ai_thumbnail(*job) for job in jobs("sequential")]
+        sequential_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        concurrent = stylist.generate_ai_thumbnails(jobs("concurrent"))
+        concurrent_seconds = time.perf_counter() - started
+
+        same_images = all(
+            open(a, 'rb').read() == open(b, 'rb').read()
+            for (_, _, a), (_, _, b) in zip(jobs("sequential"), jobs("concurrent"))
+            if os.path.exists(a)
+        )
+        print(f"{len(sequential)} thumbnails, provider limit {args.limit}")
+        print(f"{'sequential':<12} {sequential_seconds:6.2f}s")
+        print(f"{'concurrent':<12} {concurrent_seconds:6.2f}s")
+        print(f"speedup: {sequential_seconds / concurrent_seconds:.1f}x, "
+              f"identical results: {sequential == concurrent and same_images}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
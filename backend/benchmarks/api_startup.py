@@ -0,0 +1,58 @@
+"""Measure API cold-start time and peak RSS, and check that heavy ML
+modules are not imported.
+
+Run from the backend directory:
+
+    python -m benchmarks.api_startup --runs 5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+HEAVY_MODULES = ["torch", "whisper", "cv2"]
+
+PROBE = """
+import importlib, json, resource, sys, time
+start = time.perf_counter()
+importlib.import_module({module!r})
+elapsed = time.perf_counter() - start
+print(json.dumps({{
+    "seconds": elapsed,
+    "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "loaded": [m for m in {heavy!r} if m in sys.modules],
+}}))
+"""
+
+
+def measure(module, app_root):
+    code = PROBE.format(module=module, heavy=HEAVY_MODULES)
+    out = subprocess.run(
+        [sys.executable, "-c", code], cwd=app_root, check=True,
+        capture_output=True, text=True
+    ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--app-root", default=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    samples = [measure(args.module, args.app_root) for _ in range(args.runs)]
+    seconds = [s["seconds"] for s in samples]
+    rss = [s["max_rss_mb"] for s in samples]
+    loaded = sorted({m for s in samples for m in s["loaded"]})
+    print(f"module:        {args.module}")
+    print(f"import time:   median {statistics.median(seconds):.3f}s  max {max(seconds):.3f}s")
+    print(f"peak RSS:      median {statistics.median(rss):.1f} MB  max {max(rss):.1f} MB")
+    print(f"heavy modules: {', '.join(loaded) if loaded else 'none'}")
+    sys.exit(1 if loaded else 0)
+
+
+if __name__ == "__main__":
+    main()
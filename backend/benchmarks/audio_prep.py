@@ -0,0 +1,99 @@
+"""Compare audio CPU time for per-output AAC encodes and the shared audio track.
+
+Generates a synthetic source (or uses --source) and produces the audio of
+every rendition of --clips highlights (main, web, standard, teaser and
+explainer) both ways: one AAC encode per output, as every clip and length
+variant used to do, and one loudness-normalised AudioIngest encode of the
+whole source followed by a stream copy per output. Audio-only outputs
+isolate the audio cost from the video encode. CPU time is the user+sys time
+of child processes, which is where ffmpeg runs.
+
+    python -m benchmarks.audio_prep --duration 600 --clips 5
+"""
+import argparse
+import os
+import resource
+import shutil
+import subprocess
+import tempfile
+import time
+
+from app.tasks.audio_ingest import AudioIngest
+
+
+# (offset into the highlight, length) of each rendition, as rendered by
+# ClipProcessor and MultiLengthClipProcessor for a 60 s highlight
+RENDITIONS = [(0, 60), (0, 60), (0, 60), (22.5, 15), (-30, 150)]
+
+
+def make_source(path, duration):
+    subprocess.run([
+        'ffmpeg', '-nostdin', '-y',
+        '-f', 'lavfi', '-i', f'testsrc2=size=640x360:rate=30:duration={duration}',
+        '-f', 'lavfi', '-i', f'anoisesrc=color=pink:amplitude=0.2:sample_rate=48000:duration={duration}',
+        '-c:v', 'libx264', '-preset', 'ultrafast', '-g', '60',
+        '-c:a', 'aac', '-ac', '2', '-shortest', path
+    ], check=True, capture_output=True)
+
+
+def child_cpu_seconds():
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+def measure(fn):
+    cpu_before = child_cpu_seconds()
+    wall_before = time.perf_counter()
+    fn()
+    return child_cpu_seconds() - cpu_before, time.perf_counter() - wall_before
+
+
+def cut(input_path, start, duration, output_path, codec):
+    subprocess.run([
+        'ffmpeg', '-nostdin', '-ss', f'{start:.3f}', '-t', f'{duration:.3f}', '-i', input_path,
+        '-vn', *codec, '-y', output_path
+    ], check=True, capture_output=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--source")
+    parser.add_argument("--duration", type=int, default=600)
+    parser.add_argument("--clips", type=int, default=5)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="clipforge-bench-")
+    try:
+        source = args.source
+        if not source:
+            source = os.path.join(workdir, "source.mp4")
+            make_source(source, args.duration)
+        spacing = args.duration / args.clips
+        ranges = [
+            (max(0, min(i * spacing + offset, args.duration - length)), length)
+            for i in range(args.clips)
+            for offset, length in RENDITIONS
+        ]
+
+        def per_output():
+            for n, (start, duration) in enumerate(ranges):
+                cut(source, start, duration, os.path.join(workdir, f"enc_{n}.m4a"), ['-c:a', 'aac', '-b:a', '128k'])
+
+        def shared_track():
+            # The ingest also writes the 16 kHz PCM; that decode is needed for
+            # transcription either way, so it is counted here as overhead
+            audio = AudioIngest(output_dir=workdir).prepare(source, "bench")
+            for n, (start, duration) in enumerate(ranges):
+                cut(audio['aac_path'], start, duration, os.path.join(workdir, f"copy_{n}.m4a"), ['-c:a', 'copy'])
+
+        results = [("per-output AAC encode", *measure(per_output)), ("encode once + copy", *measure(shared_track))]
+        for label, cpu, wall in results:
+            print(f"{label:<22} cpu {cpu:7.2f}s  wall {wall:6.2f}s  outputs {len(ranges)}")
+        saved = results[0][1] - results[1][1]
+        print(f"audio CPU saved per job: {saved:.2f}s ({100 * saved / results[0][1]:.0f}%)")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
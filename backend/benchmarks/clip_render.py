@@ -0,0 +1,128 @@
+"""Compare total ffmpeg CPU time for the per-clip and planned clip renderers.
+
+Generates a synthetic 1080p source (or uses --source) and renders the same
+highlights, main clip and vertical web copy, through
+ClipProcessor.extract_multiple_clips (one encode per clip, then a web
+re-encode of it) and through RenderPlanner.execute on
+ClipProcessor.output_specs, the path render_final_assets takes. CPU time is
+the user+sys time of child processes, which is where ffmpeg runs.
+
+A third run adds every multi-length cut (teaser, standard, explainer) to the
+planned outputs, as render_final_assets does, and reports the peak RSS of
+the largest ffmpeg process so far, so an unbounded shared decode shows up.
+A fourth renders the same outputs isolated, one decode and encode each,
+which is what the planner saves against.
+
+    python -m benchmarks.clip_render --duration 600 --clips 5
+    python -m benchmarks.clip_render --runs lengths lengths-isolated
+"""
+import argparse
+import os
+import resource
+import shutil
+import subprocess
+import tempfile
+import time
+
+from app.tasks.clip_lengths import MultiLengthClipProcessor
+from app.tasks.clip_processor import ClipProcessor
+from app.tasks.media_probe import get_media_info
+from app.tasks.render_planner import RenderPlanner
+
+
+def make_source(path, duration, size='1920x1080'):
+    subprocess.run([
+        'ffmpeg', '-nostdin', '-y',
+        '-f', 'lavfi', '-i', f'testsrc2=size={size}:rate=30:duration={duration}',
+        '-f', 'lavfi', '-i', f'sine=frequency=440:duration={duration}',
+        '-c:v', 'libx264', '-preset', 'ultrafast', '-g', '60',
+        '-c:a', 'aac', '-shortest', path
+    ], check=True, capture_output=True)
+
+
+def child_cpu_seconds():
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+def per_clip(processor, source, clips):
+    return processor.extract_multiple_clips(source, clips, "bench")
+
+
+def planned(processor, source, clips):
+    media = get_media_info(source)
+    rendered, _ = RenderPlanner().execute(
+        source, processor.output_specs(clips, "bench", media), os.path.join(processor.output_dir, "bench")
+    )
+    return processor.collect_results(clips, rendered, media)
+
+
+def planned_with_lengths(processor, source, clips, isolate=False):
+    media = get_media_info(source)
+    lengths = MultiLengthClipProcessor(output_dir=processor.output_dir)
+    length_specs, copied = lengths.plan_lengths(source, clips, "bench")
+    rendered, _ = RenderPlanner().execute(
+        source, processor.output_specs(clips, "bench", media) + length_specs,
+        os.path.join(processor.output_dir, "bench"), isolate=isolate
+    )
+    results = processor.collect_results(clips, rendered, media)
+    # One entry per clip: ok only when the main clip and all three cuts rendered
+    for result, clip_lengths in zip(results, lengths.collect_results(clips, rendered, copied, media)):
+        result['success'] = result['success'] and len(clip_lengths['lengths']) == 3
+    return results
+
+
+def isolated_with_lengths(processor, source, clips):
+    return planned_with_lengths(processor, source, clips, isolate=True)
+
+
+RUNS = {
+    "per-clip": ("per-clip + web re-encode", per_clip),
+    "planned": ("render planner", planned),
+    "lengths": ("planner + length cuts", planned_with_lengths),
+    "lengths-isolated": ("length cuts, isolated", isolated_with_lengths),
+}
+
+
+def run(render, processor, source, clips):
+    cpu_before = child_cpu_seconds()
+    wall_before = time.perf_counter()
+    results = render(processor, source, clips)
+    wall = time.perf_counter() - wall_before
+    cpu = child_cpu_seconds() - cpu_before
+    ok = sum(1 for r in results if r['success'])
+    peak_mb = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+    return cpu, wall, ok, peak_mb
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--source")
+    parser.add_argument("--duration", type=int, default=600)
+    parser.add_argument("--clips", type=int, default=5)
+    parser.add_argument("--size", default="1920x1080", help="synthetic source size")
+    parser.add_argument("--runs", nargs="+", choices=sorted(RUNS), default=list(RUNS))
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="clipforge-bench-")
+    try:
+        source = args.source
+        if not source:
+            source = os.path.join(workdir, "source.mp4")
+            make_source(source, args.duration, args.size)
+        spacing = max(args.duration // args.clips, 60)
+        clips = [
+            {'id': i + 1, 'start_time': i * spacing, 'end_time': i * spacing + 60}
+            for i in range(args.clips)
+        ]
+        processor = ClipProcessor(output_dir=workdir)
+        for label, render in (RUNS[name] for name in args.runs):
+            cpu, wall, ok, peak_mb = run(render, processor, source, clips)
+            print(f"{label:<26} cpu {cpu:8.1f}s  wall {wall:7.1f}s  clips ok {ok}/{len(clips)}  "
+                  f"peak ffmpeg rss {peak_mb:7.0f} MB")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Benchmark highlight selection on synthetic transcripts.
+
+Compares the previous greedy selector with the weighted-interval-scheduling
+selector in app.tasks.highlight_selector, on wall time and on the total
+segment score covered by the chosen clips.
+
+    python -m benchmarks.highlight_selection --segments 10000
+"""
+import argparse
+import random
+import time
+
+from app.tasks.highlight_selector import select_highlights
+
+
+def synthetic_segments(n, seed=0):
+    rng = random.Random(seed)
+    segments = []
+    t = 0.0
+    for i in range(n):
+        duration = rng.uniform(5, 20)
+        segments.append({
+            "start": t,
+            "end": t + duration,
+            "text": f"segment {i}",
+            "score": rng.uniform(0, 40),
+            "duration": duration
+        })
+        t += duration + rng.choice([0.2, 0.5, 1.0, 2.0, 12.0])
+    return segments
+
+
+def legacy_select(scored_segments, min_duration=60, max_clips=5):
+    # The selector extract_highlights used before weighted interval scheduling
+    scored_segments = sorted(scored_segments, key=lambda x: x["score"], reverse=True)
+    clips = []
+    used_times = set()
+    for seg in scored_segments:
+        time_range = range(int(seg["start"]), int(seg["end"]) + 1)
+        if any(t in used_times for t in time_range):
+            continue
+        clip_start = seg["start"]
+        clip_end = seg["end"]
+        clip_texts = [seg["text"]]
+        for other in scored_segments:
+            if other["start"] > clip_end and other["start"] - clip_end < 10:
+                clip_end = other["end"]
+                clip_texts.append(other["text"])
+                for t in range(int(other["start"]), int(other["end"]) + 1):
+                    used_times.add(t)
+        if clip_end - clip_start >= min_duration:
+            clips.append({"start": clip_start, "end": clip_end, "score": seg["score"]})
+            for t in range(int(clip_start), int(clip_end) + 1):
+                used_times.add(t)
+        if len(clips) >= max_clips:
+            break
+    return clips
+
+
+def covered_score(segments, clips):
+    return sum(
+        s["score"] for s in segments
+        if any(c["start"] <= s["start"] and s["end"] <= c["end"] for c in clips)
+    )
+
+
+def timed(fn, repeat):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--segments", type=int, default=10000)
+    parser.add_argument("--clips", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    segments = synthetic_segments(args.segments)
+    legacy_time, legacy = timed(lambda: legacy_select(segments, max_clips=args.clips), args.repeat)
+    wis_time, chosen = timed(lambda: select_highlights(segments, max_clips=args.clips), args.repeat)
+    print(f"segments: {args.segments}  clips: {args.clips}")
+    print(f"legacy greedy:  {legacy_time * 1000:9.1f} ms  covered score {covered_score(segments, legacy):8.1f}")
+    print(f"interval sched: {wis_time * 1000:9.1f} ms  covered score {covered_score(segments, chosen):8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Compare fp32 and int8 whisper forward passes without checkpoints.
+
+Builds each model size from its published dimensions with random weights,
+quantizes a copy the way the whisper-int8 backend does, and times one
+30 s encoder pass plus greedy decoder steps with the key/value cache.
+Compute cost does not depend on weight values, so the fp32/int8 ratio is
+the speedup the backend gives on this machine. It is not an RTF: use
+transcription_rtf.py with real audio and checkpoints for that.
+
+    python -m benchmarks.quantized_decode --model-sizes tiny base --steps 100
+"""
+import argparse
+import time
+
+import torch
+from whisper.model import ModelDimensions, Whisper
+
+from app.tasks.transcription_backends import plain_linears
+
+# From the released checkpoints' "dims"
+DIMS = {
+    "tiny": (384, 6, 4),
+    "base": (512, 8, 6),
+    "small": (768, 12, 12),
+}
+
+
+def build(size):
+    state, heads, layers = DIMS[size]
+    model = Whisper(ModelDimensions(
+        n_mels=80, n_audio_ctx=1500, n_audio_state=state, n_audio_head=heads, n_audio_layer=layers,
+        n_vocab=51865, n_text_ctx=448, n_text_state=state, n_text_head=heads, n_text_layer=layers,
+    ))
+    # Left uninitialised by whisper until weights are loaded
+    torch.nn.init.normal_(model.decoder.positional_embedding, std=0.01)
+    return model.eval()
+
+
+@torch.no_grad()
+def time_decode(model, steps, runs):
+    mel = torch.randn(1, 80, 3000)
+    best_encode = best_decode = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        audio_features = model.encoder(mel)
+        encoded = time.perf_counter()
+        cache, hooks = model.install_kv_cache_hooks()
+        tokens = torch.tensor([[50258]])
+        for i in range(steps):
+            logits = model.decoder(tokens if i == 0 else tokens[:, -1:], audio_features, kv_cache=cache)
+            tokens = torch.cat([tokens, logits[:, -1:].argmax(-1)], dim=-1)
+        for hook in hooks:
+            hook.remove()
+        best_encode = min(best_encode, encoded - start)
+        best_decode = min(best_decode, time.perf_counter() - encoded)
+    return best_encode, best_decode
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model-sizes", nargs="+", default=["tiny", "base"], choices=sorted(DIMS))
+    parser.add_argument("--steps", type=int, default=100, help="decoder tokens per 30 s window")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--threads", type=int, default=torch.get_num_threads())
+    args = parser.parse_args()
+
+    torch.manual_seed(0)
+    torch.set_num_threads(args.threads)
+    print(f"threads: {args.threads}  decoder steps: {args.steps}")
+    print(f"{'model':<8}{'weights':<9}{'encode s':>10}{'decode s':>10}{'total s':>9}{'speedup':>9}")
+    for size in args.model_sizes:
+        model = build(size)
+        fp32 = time_decode(model, args.steps, args.runs)
+        quantized = torch.quantization.quantize_dynamic(plain_linears(model), {torch.nn.Linear}, dtype=torch.qint8)
+        int8 = time_decode(quantized, args.steps, args.runs)
+        for label, (encode, decode) in (("fp32", fp32), ("int8", int8)):
+            print(f"{size:<8}{label:<9}{encode:>10.2f}{decode:>10.2f}{encode + decode:>9.2f}"
+                  f"{sum(fp32) / (encode + decode):>8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""Benchmark segment scoring and check it against the substring scan.
+
+Scores synthetic transcripts with the per-segment loop extract_highlights
+used before SegmentScorer (every keyword tested with `in` on every segment)
+and with SegmentScorer. The keyword dictionary overlaps on purpose ("key",
+"key point", "point", "game changer"), and the scores must be identical:
+the script exits non-zero on any difference. --keywords pads the
+dictionary with random words to show how each side scales with its size.
+
+    python -m benchmarks.segment_scoring --segments 20000
+    python -m benchmarks.segment_scoring --segments 5000 --keywords 400
+"""
+import argparse
+import random
+import sys
+import time
+
+import numpy as np
+
+from app.tasks.segment_scoring import DEFAULT_WEIGHTS, SegmentScorer
+
+KEYWORDS = {
+    "amazing": 10, "wow": 10, "important": 10, "key": 10, "secret": 10, "breakthrough": 10,
+    "incredible": 10, "game changer": 10, "key point": 5, "point": 3, "game": 2, "changer": 4,
+}
+
+
+def synthetic_segments(n, seed=0, keyword_share=0.05):
+    rng = random.Random(seed)
+    filler = ["".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(2, 9)))
+              for _ in range(300)] + ["pointless", "keys", "gamer"]
+    segments = [
+        # Overlapping matches, case and punctuation
+        {"start": 0.0, "end": 10.0, "text": "the key point is"},
+        {"start": 10.0, "end": 16.0, "text": "A GAME CHANGER? Key, key pointless!"},
+    ]
+    t = 16.0
+    for _ in range(n):
+        duration = rng.uniform(2, 20)
+        words = [rng.choice(list(KEYWORDS)) if rng.random() < keyword_share else rng.choice(filler)
+                 for _ in range(rng.randint(3, 25))]
+        segments.append({
+            "start": t,
+            "end": t + duration,
+            "text": " ".join(words) + rng.choice([".", "?", "!", ""])
+        })
+        t += duration
+    return segments
+
+
+def padded_keywords(count, seed=1):
+    rng = random.Random(seed)
+    keywords = dict(KEYWORDS)
+    while len(keywords) < count:
+        word = "".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(4, 10)))
+        keywords[word] = rng.randint(1, 10)
+    return keywords
+
+
+def legacy_scores(segments, keywords, weights):
+    scores = []
+    for seg in segments:
+        text = seg["text"].lower()
+        duration = seg["end"] - seg["start"]
+        score = sum(w for kw, w in keywords.items() if kw in text)
+        if "?" in text:
+            score += weights["question"]
+        if "!" in text:
+            score += weights["exclamation"]
+        score += min(duration / weights["duration_divisor"], weights["duration_cap"])
+        scores.append(score)
+    return np.array(scores)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--segments", type=int, default=20000)
+    parser.add_argument("--keyword-share", type=float, default=0.05, help="fraction of words that are keywords")
+    parser.add_argument("--keywords", type=int, default=len(KEYWORDS), help="dictionary size, padded with random words")
+    args = parser.parse_args()
+
+    keywords = padded_keywords(args.keywords)
+    segments = synthetic_segments(args.segments, keyword_share=args.keyword_share)
+    scorer = SegmentScorer(keywords)
+
+    started = time.perf_counter()
+    expected = legacy_scores(segments, keywords, DEFAULT_WEIGHTS)
+    legacy = time.perf_counter() - started
+
+    started = time.perf_counter()
+    scores, _ = scorer.score(segments)
+    vectorized = time.perf_counter() - started
+
+    mismatches = np.flatnonzero(~np.isclose(scores, expected))
+    print(f"{len(segments)} segments, {len(keywords)} keywords")
+    print(f"{'substring scan':<16} {legacy * 1000:8.1f} ms")
+    print(f"{'SegmentScorer':<16} {vectorized * 1000:8.1f} ms")
+    print(f"speedup: {legacy / vectorized:.1f}x, identical scores: {not len(mismatches)}")
+    for i in mismatches[:5]:
+        print(f"  {segments[i]['text']!r}: expected {expected[i]:.2f}, got {scores[i]:.2f}")
+    if len(mismatches):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
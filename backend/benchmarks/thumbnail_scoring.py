@@ -0,0 +1,96 @@
+"""Benchmark thumbnail frame scoring throughput.
+
+Scores the same frames with the previous full-resolution score_frame (two
+grayscale conversions, Haar cascade and a float64 Laplacian on the whole
+frame, one frame at a time) and with ThumbnailGenerator's pipeline (one
+conversion at THUMBNAIL_SCORE_WIDTH, scored on a thread pool). Frames are
+synthetic 1080p images unless --source points at a video, in which case
+frames are read from it with OpenCV.
+
+    python -m benchmarks.thumbnail_scoring --frames 200 --threads 4
+"""
+import argparse
+import time
+
+import cv2
+import numpy as np
+
+from app.tasks.thumbnail_generator import ThumbnailGenerator
+
+
+def synthetic_frames(n, width, height, seed=0):
+    rng = np.random.default_rng(seed)
+    frames = []
+    for _ in range(n):
+        frame = rng.integers(40, 200, (height, width, 3), dtype=np.uint8)
+        frame = cv2.GaussianBlur(frame, (0, 0), 3)
+        for _ in range(6):
+            x, y = int(rng.integers(0, width - 200)), int(rng.integers(0, height - 200))
+            color = tuple(int(c) for c in rng.integers(0, 255, 3))
+            cv2.rectangle(frame, (x, y), (x + int(rng.integers(40, 200)), y + int(rng.integers(40, 200))), color, -1)
+        frames.append(frame)
+    return frames
+
+
+def video_frames(path, n):
+    cap = cv2.VideoCapture(path)
+    frames = []
+    while len(frames) < n:
+        ok, frame = cap.read()
+        if not ok:
+            break
+        frames.append(frame)
+    cap.release()
+    return frames
+
+
+def legacy_score(cascade, frame):
+    # score_frame as it was before the downscaled pipeline
+    score = 0
+    h, w = frame.shape[:2]
+    faces = cascade.detectMultiScale(
+        cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY), scaleFactor=1.1, minNeighbors=5, minSize=(30,30)
+    )
+    if len(faces) > 0:
+        score += 50
+        for (x, y, fw, fh) in faces:
+            score += (fw * fh) / (w * h) * 30
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    score += min(cv2.Laplacian(gray, cv2.CV_64F).var() / 10, 20)
+    if 50 < np.mean(gray) < 200:
+        score += 10
+    return score
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--source")
+    parser.add_argument("--frames", type=int, default=200)
+    parser.add_argument("--width", type=int, default=1920)
+    parser.add_argument("--height", type=int, default=1080)
+    parser.add_argument("--threads", type=int, default=4)
+    args = parser.parse_args()
+
+    frames = video_frames(args.source, args.frames) if args.source else \
+        synthetic_frames(args.frames, args.width, args.height)
+    generator = ThumbnailGenerator()
+    cascade = generator.face_cascade
+
+    started = time.perf_counter()
+    for frame in frames:
+        legacy_score(cascade, frame)
+    legacy = time.perf_counter() - started
+
+    started = time.perf_counter()
+    generator.score_frames(frames, threads=args.threads)
+    pipelined = time.perf_counter() - started
+
+    height, width = frames[0].shape[:2]
+    print(f"{len(frames)} frames at {width}x{height}")
+    print(f"{'full-res, serial':<28} {len(frames) / legacy:8.1f} frames/s")
+    print(f"{f'downscaled, {args.threads} threads':<28} {len(frames) / pipelined:8.1f} frames/s")
+    print(f"speedup: {legacy / pipelined:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Report the real-time factor of each transcription backend and profile.
+
+RTF is wall-clock transcription time divided by audio duration; below 1.0
+is faster than real time. Model loading is timed separately.
+
+    python -m benchmarks.transcription_rtf sample.mp4 --model-size base
+    python -m benchmarks.transcription_rtf sample.mp4 --backends whisper whisper-int8 --profiles fast
+
+Use quantized_decode.py for the int8 speedup when no checkpoint or audio
+is at hand.
+
+With --ladder, also prints MODEL_LADDER's rungs for --model-size with the
+measured RTFs, as JSON for TRANSCRIPTION_LADDER. Merge the output of one
+run per model size to cover the whole ladder.
+"""
+import argparse
+import json
+import subprocess
+import time
+
+import numpy as np
+
+from app.tasks.audio_ingest import SAMPLE_RATE
+from app.tasks.transcription_backends import BACKENDS, SPEED_PROFILES, create_backend, decode_options_for
+from app.tasks.transcription_policy import MODEL_LADDER
+
+
+def load_audio(path, seconds=None):
+    cmd = ['ffmpeg', '-nostdin', '-i', path, '-vn', '-ac', '1', '-ar', str(SAMPLE_RATE)]
+    if seconds:
+        cmd += ['-t', str(seconds)]
+    cmd += ['-f', 'f32le', '-']
+    out = subprocess.run(cmd, check=True, capture_output=True).stdout
+    return np.frombuffer(out, np.float32).copy()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("media")
+    parser.add_argument("--model-size", default="base")
+    parser.add_argument("--backends", nargs="+", default=sorted(BACKENDS))
+    parser.add_argument("--profiles", nargs="+", default=sorted(SPEED_PROFILES))
+    parser.add_argument("--seconds", type=float, default=120, help="audio to transcribe per run")
+    parser.add_argument("--ladder", action="store_true", help="print measured ladder rungs as JSON")
+    args = parser.parse_args()
+
+    audio = load_audio(args.media, args.seconds)
+    duration = len(audio) / SAMPLE_RATE
+    print(f"audio: {duration:.1f}s  model: {args.model_size}")
+    print(f"{'backend':<16}{'profile':<10}{'load s':>8}{'decode s':>10}{'RTF':>8}{'segments':>10}")
+    measured = {}
+    for name in args.backends:
+        start = time.perf_counter()
+        try:
+            backend = create_backend(name, args.model_size)
+        except ImportError as e:
+            print(f"{name:<16}{'-':<10}  skipped ({e})")
+            continue
+        load_seconds = time.perf_counter() - start
+        # Warm up kernels and caches on a short slice before timing
+        backend.transcribe(audio[:SAMPLE_RATE * 5], **decode_options_for("fast"))
+        for profile in args.profiles:
+            start = time.perf_counter()
+            result = backend.transcribe(audio, **decode_options_for(profile))
+            elapsed = time.perf_counter() - start
+            print(f"{name:<16}{profile:<10}{load_seconds:>8.1f}{elapsed:>10.1f}"
+                  f"{elapsed / duration:>8.3f}{len(result['segments']):>10}")
+            measured[(name, profile)] = round(elapsed / duration, 3)
+
+    if args.ladder:
+        rungs = [
+            {**rung, "rtf": measured[(rung["backend"], rung["profile"])]}
+            for rung in MODEL_LADDER
+            if rung["model_size"] == args.model_size and (rung["backend"], rung["profile"]) in measured
+        ]
+        print(json.dumps(rungs))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+import os
+
+import pytest
+
+from app.tasks.artifact_cache import ArtifactCache, LocalArtifactBackend
+from app.tasks.render_planner import EncodeProfile
+
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / "source.mp4"
+    path.write_bytes(b"source video")
+    return str(path)
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ArtifactCache(LocalArtifactBackend(str(tmp_path / "artifacts")), quota_bytes=1024 ** 3)
+
+
+def write(path, data):
+    with open(path, 'wb') as f:
+        f.write(data)
+    return str(path)
+
+
+def read(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def test_make_key_is_stable_and_content_addressed(cache, source, tmp_path):
+    profile = EncodeProfile(width=720, height=1280)
+    key = cache.make_key(source, 'render', 5.0, 65.0, profile)
+    assert key == cache.make_key(source, 'render', 5.0004, 65.0, EncodeProfile(width=720, height=1280))
+
+    copy = write(tmp_path / "renamed.mp4", read(source))
+    assert cache.make_key(copy, 'render', 5.0, 65.0, profile) == key
+    assert cache.make_key(source, 'render', 5.0, 65.0, EncodeProfile(width=720, height=1281)) != key
+    assert cache.make_key(source, 'render', 5.0, 66.0, profile) != key
+    assert cache.make_key(source, 'thumbnail', 5.0, 65.0, profile) != key
+    other = write(tmp_path / "other.mp4", b"another video")
+    assert cache.make_key(other, 'render', 5.0, 65.0, profile) != key
+
+
+def test_fetch_after_store_restores_a_copy(cache, source, tmp_path):
+    key = cache.make_key(source, 'render')
+    output = write(tmp_path / "clip.mp4", b"encoded clip")
+    assert cache.fetch(key, {'output.mp4': output}) is None
+
+    cache.store(key, {'output.mp4': output}, {'duration': 60})
+    restored = str(tmp_path / "restored.mp4")
+    assert cache.fetch(key, {'output.mp4': restored}) == {'duration': 60}
+    assert read(restored) == b"encoded clip"
+    assert os.stat(restored).st_ino != os.stat(output).st_ino
+
+    # Rewriting the output in place, as ffmpeg -y does, leaves the entry intact
+    write(output, b"overwritten")
+    cache.fetch(key, {'output.mp4': restored})
+    assert read(restored) == b"encoded clip"
+    assert cache.stats() == {'hits': 2, 'misses': 1}
+
+
+def test_fetch_of_an_entry_missing_a_file_is_a_miss(cache, source, tmp_path):
+    key = cache.make_key(source, 'render')
+    cache.store(key, {'output.mp4': write(tmp_path / "clip.mp4", b"clip")})
+    assert cache.fetch(key, {'captions.srt': str(tmp_path / "captions.srt")}) is None
+
+
+def test_failed_creates_are_not_cached(cache, source, tmp_path):
+    key = cache.make_key(source, 'thumbnail')
+    dest = str(tmp_path / "thumb.jpg")
+    calls = []
+
+    def fail():
+        calls.append('fail')
+        write(dest, b"partial")
+        return None
+
+    def succeed():
+        calls.append('succeed')
+        write(dest, b"thumbnail")
+        return {'score': 1}
+
+    assert cache.get_or_create(key, {'thumb.jpg': dest}, fail) is None
+    assert cache.get_or_create(key, {'thumb.jpg': dest}, succeed) == {'score': 1}
+    assert cache.get_or_create(key, {'thumb.jpg': dest}, succeed) == {'score': 1}
+    assert calls == ['fail', 'succeed']
+    assert read(dest) == b"thumbnail"
+
+
+def test_evict_drops_least_recently_used_entries_over_quota(tmp_path, source):
+    backend = LocalArtifactBackend(str(tmp_path / "artifacts"))
+    cache = ArtifactCache(backend, quota_bytes=2500, evict_interval=3600)
+    keys = [cache.make_key(source, 'render', n) for n in range(4)]
+    for n, key in enumerate(keys):
+        backend.store(key, {'output.mp4': write(tmp_path / f"clip{n}.mp4", b"x" * 1000)}, {})
+        entry = backend._entry_dir(key)
+        os.utime(entry, (1000 + n, 1000 + n))
+    # Using the oldest entry makes it the most recently used
+    cache.fetch(keys[0], {'output.mp4': str(tmp_path / "restored.mp4")})
+
+    assert cache.evict(force=True) == 2
+    assert {key for key, _, _ in backend.entries()} == {keys[0], keys[3]}
+    # Throttled to one pass per evict_interval unless forced
+    backend.store(keys[1], {'output.mp4': str(tmp_path / "clip1.mp4")}, {})
+    assert cache.evict() == 0
+    assert cache.evict(force=True) == 1
@@ -0,0 +1,65 @@
+import multiprocessing
+
+import pytest
+
+from app.tasks.asset_manifest import AssetManifest
+
+
+@pytest.fixture
+def manifest(tmp_path):
+    return AssetManifest.for_video("video", clips_dir=str(tmp_path))
+
+
+def test_a_late_preview_never_replaces_a_final(manifest):
+    manifest.update({"clip_001": {"tier": "final", "path": "clip_001.mp4"}})
+    assets = manifest.update({"clip_001": {"tier": "preview", "path": "clip_001_preview.mp4"},
+                              "clip_002": {"tier": "preview", "path": "clip_002_preview.mp4"}})
+
+    assert assets["clip_001"]["tier"] == "final"
+    assert assets["clip_001"]["path"] == "clip_001.mp4"
+    assert assets["clip_002"]["tier"] == "preview"
+    assert manifest.load() == assets
+
+
+def test_a_final_replaces_its_preview(manifest):
+    manifest.update({"clip_001": {"tier": "preview", "path": "clip_001_preview.mp4"}})
+    assets = manifest.update({"clip_001": {"tier": "final", "path": "clip_001.mp4"}})
+    assert assets["clip_001"]["path"] == "clip_001.mp4"
+
+
+def test_fail_unfinished_keeps_preview_paths_and_finals(manifest):
+    manifest.update({
+        "clip_001": {"tier": "final", "path": "clip_001.mp4"},
+        "clip_002": {"tier": "preview", "path": "clip_002_preview.mp4"},
+        "clip_003": {"tier": "pending", "path": None},
+    })
+    assets = manifest.fail_unfinished("final render failed")
+
+    assert assets["clip_001"]["tier"] == "final" and "error" not in assets["clip_001"]
+    assert assets["clip_002"] == {**assets["clip_002"], "tier": "failed", "path": "clip_002_preview.mp4",
+                                  "error": "final render failed"}
+    assert assets["clip_003"]["tier"] == "failed"
+    # A preview arriving after the failure doesn't resurrect it
+    assets = manifest.update({"clip_003": {"tier": "preview", "path": "clip_003_preview.mp4"}})
+    assert assets["clip_003"]["tier"] == "failed"
+
+
+def _update_many(path, prefix, count):
+    manifest = AssetManifest(path)
+    for n in range(count):
+        manifest.update({f"{prefix}_{n:03d}": {"tier": "preview", "path": f"{prefix}_{n:03d}.mp4"}})
+
+
+def test_concurrent_updates_from_two_processes_keep_every_entry(manifest):
+    context = multiprocessing.get_context("spawn")
+    workers = [context.Process(target=_update_many, args=(manifest.path, prefix, 100))
+               for prefix in ("process_video", "render_finals")]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(timeout=60)
+        assert worker.exitcode == 0
+
+    assets = manifest.load()
+    assert len(assets) == 200
+    assert {name.rsplit("_", 1)[0] for name in assets} == {"process_video", "render_finals"}
@@ -0,0 +1,108 @@
+import random
+
+import numpy as np
+import pytest
+
+from app.tasks import chunked_transcriber
+from app.tasks.chunked_transcriber import ChunkedTranscriber, plan_windows, stitch_segments
+
+
+def keep_ranges(windows):
+    return [(w["keep_from"], w["keep_to"]) for w in windows]
+
+
+def test_short_audio_is_one_window():
+    assert plan_windows(800.0, [], chunk_seconds=600) == [
+        {"start": 0.0, "end": 800.0, "keep_from": 0.0, "keep_to": 800.0}
+    ]
+
+
+def test_cuts_snap_to_nearest_silence():
+    silences = [(100.0, 102.0), (590.0, 594.0), (640.0, 650.0), (1195.0, 1199.0)]
+    windows = plan_windows(1500.0, silences, chunk_seconds=600, overlap=2.0, search=30.0)
+    assert keep_ranges(windows) == [(0.0, 592.0), (592.0, 1197.0), (1197.0, 1500.0)]
+    assert [(w["start"], w["end"]) for w in windows] == [(0.0, 594.0), (590.0, 1199.0), (1195.0, 1500.0)]
+
+
+def test_cuts_fall_back_to_target_without_nearby_silence():
+    windows = plan_windows(1000.0, [(300.0, 301.0), (680.0, 690.0)], chunk_seconds=600, search=30.0)
+    assert keep_ranges(windows) == [(0.0, 600.0), (600.0, 1000.0)]
+
+
+def test_windows_cover_the_whole_duration():
+    rng = random.Random(0)
+    for _ in range(200):
+        duration = rng.uniform(1.0, 5000.0)
+        silences = sorted((s, s + rng.uniform(0.4, 3.0)) for s in
+                          (rng.uniform(0.0, duration) for _ in range(rng.randint(0, 30))))
+        windows = plan_windows(duration, silences, chunk_seconds=600, overlap=2.0, search=30.0)
+
+        ranges = keep_ranges(windows)
+        assert ranges[0][0] == 0.0 and ranges[-1][1] == duration
+        assert all(a[1] == b[0] for a, b in zip(ranges, ranges[1:]))
+        assert all(lo < hi <= lo + 630.0 for lo, hi in ranges[:-1])
+        assert ranges[-1][1] - ranges[-1][0] <= 900.0
+        for w in windows:
+            assert w["start"] == max(0.0, w["keep_from"] - 2.0)
+            assert w["end"] == min(duration, w["keep_to"] + 2.0)
+
+
+def seg(start, end, text):
+    return {"id": 0, "start": start, "end": end, "text": text}
+
+
+def test_stitch_drops_overlap_duplicates_and_renumbers():
+    first = {"start": 0.0, "end": 12.0, "keep_from": 0.0, "keep_to": 10.0}
+    second = {"start": 8.0, "end": 20.0, "keep_from": 10.0, "keep_to": 20.0}
+    stitched = stitch_segments([
+        (first, [seg(0.0, 4.0, "a"), seg(8.0, 9.5, "b"), seg(9.0, 12.0, "c")]),
+        (second, [seg(8.05, 9.5, "b"), seg(9.1, 12.0, "c"), seg(12.0, 15.0, "d")]),
+    ])
+    assert [s["text"] for s in stitched] == ["a", "b", "c", "d"]
+    assert [s["id"] for s in stitched] == [0, 1, 2, 3]
+    # "c" straddles the cut, so it comes from the second window
+    assert (stitched[2]["start"], stitched[2]["end"]) == (9.5, 12.0)
+
+
+def test_stitch_timestamps_never_go_backwards():
+    first = {"start": 0.0, "end": 12.0, "keep_from": 0.0, "keep_to": 10.0}
+    second = {"start": 8.0, "end": 20.0, "keep_from": 10.0, "keep_to": 20.0}
+    stitched = stitch_segments([
+        (first, [seg(0.0, 9.0, "a")]),
+        (second, [seg(12.0, 14.0, "c"), seg(8.5, 11.0, "b")]),
+    ])
+    assert [s["text"] for s in stitched] == ["a", "b", "c"]
+    assert stitched[1]["start"] == 9.0
+    assert all(a["end"] <= b["start"] and b["start"] <= b["end"] for a, b in zip(stitched, stitched[1:]))
+
+
+class FakeBackend:
+    def __init__(self):
+        self.calls = []
+
+    def transcribe(self, audio, **options):
+        self.calls.append((len(audio), options))
+        return {"segments": [seg(0.0, 1.0, " hi")], "language": "en"}
+
+
+def test_without_a_pool_windows_decode_on_the_callers_backend(tmp_path, monkeypatch):
+    pcm_path = str(tmp_path / "audio.f32")
+    np.zeros(16000 * 40, dtype=np.float32).tofile(pcm_path)
+    backend = FakeBackend()
+    loads = []
+    monkeypatch.setattr(chunked_transcriber, "window_pool", lambda *args: None)
+    monkeypatch.setattr(chunked_transcriber, "create_backend", lambda *args: pytest.fail("loaded a second model"))
+
+    def load_backend():
+        loads.append(backend)
+        return backend
+    result = ChunkedTranscriber(chunk_seconds=10, max_memory_mb=4096).transcribe(
+        "source.mp4", 40.0, pcm_path=pcm_path, cpu_budget=2, load_backend=load_backend, beam_size=1
+    )
+
+    assert result["chunks"] == len(backend.calls) > 1
+    assert loads == [backend]
+    assert all(options == {"beam_size": 1} for _, options in backend.calls)
+    assert len(result["segments"]) == result["chunks"]
+    assert result["language"] == "en"
+    assert chunked_transcriber._worker_backend is None
@@ -0,0 +1,46 @@
+import shutil
+import subprocess
+
+import pytest
+
+from app.tasks.clip_lengths import MultiLengthClipProcessor
+from app.tasks.media_probe import get_media_info
+
+pytestmark = pytest.mark.skipif(shutil.which('ffmpeg') is None or shutil.which('ffprobe') is None,
+                                reason="needs ffmpeg")
+
+FPS = 24000 / 1001
+
+
+@pytest.fixture(scope="module")
+def video(tmp_path_factory):
+    # Keyframes every 100 frames, so the second lands off the millisecond grid (4.170833 s)
+    path = str(tmp_path_factory.mktemp("lengths") / "source.mp4")
+    subprocess.run([
+        'ffmpeg', '-nostdin', '-v', 'error', '-f', 'lavfi', '-i', 'testsrc2=size=160x90:rate=24000/1001:duration=20',
+        '-c:v', 'libx264', '-g', '100', '-keyint_min', '100', '-sc_threshold', '0', path
+    ], check=True)
+    return path
+
+
+def video_packets(path):
+    result = subprocess.run([
+        'ffprobe', '-v', 'error', '-select_streams', 'v:0', '-count_packets',
+        '-show_entries', 'stream=nb_read_packets', '-of', 'csv=p=0', path
+    ], check=True, capture_output=True, text=True)
+    return int(result.stdout.strip())
+
+
+def test_stream_copy_starts_at_the_keyframe_without_the_previous_gop(video, tmp_path):
+    keyframes = get_media_info(video).keyframe_index()
+    assert keyframes.times[1] == pytest.approx(100 / FPS, abs=1e-6)
+    output = str(tmp_path / "standard.mp4")
+    processor = MultiLengthClipProcessor(output_dir=str(tmp_path), stream_copy=True)
+
+    result = processor.extract_standard(video, keyframes.times[1], keyframes.times[1] + 5, output,
+                                        keyframes=keyframes)
+
+    assert result["success"] and result["stream_copy"]
+    # Five seconds of packets, give or take the few a copy keeps past the
+    # cut for reordering; the previous GOP would add another 100
+    assert abs(video_packets(output) - 5 * FPS) <= 5
@@ -0,0 +1,33 @@
+import shutil
+import subprocess
+
+import pytest
+
+from app.tasks.frame_sampler import FrameSampler
+
+pytestmark = pytest.mark.skipif(shutil.which('ffmpeg') is None or shutil.which('ffprobe') is None,
+                                reason="needs ffmpeg")
+
+
+@pytest.fixture(scope="module")
+def video(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("sampler") / "source.mp4")
+    subprocess.run([
+        'ffmpeg', '-nostdin', '-v', 'error', '-f', 'lavfi', '-i', 'testsrc2=size=128x72:rate=30:duration=4',
+        '-c:v', 'libx264', '-bf', '2', path
+    ], check=True)
+    return path
+
+
+@pytest.mark.parametrize("skip_nonref", [True, False])
+def test_sample_calls_back_once_per_grid_point_in_order(video, skip_nonref):
+    seen = []
+    sampler = FrameSampler(width=64, skip_nonref=skip_nonref)
+    count = sampler.sample(video, [2.0, 0.5, 0.52, 3.0], lambda time, frame: seen.append((time, frame.shape)))
+    assert count == 3
+    assert seen == [(0.5, (36, 64, 3)), (2.0, (36, 64, 3)), (3.0, (36, 64, 3))]
+
+
+def test_read_frame_returns_a_copy_at_full_resolution(video):
+    frame = FrameSampler().read_frame(video, 1.0)
+    assert frame.shape == (72, 128, 3)
@@ -0,0 +1,62 @@
+import itertools
+import random
+
+import pytest
+
+from app.tasks.highlight_selector import schedule, select_highlights
+
+
+def random_candidates(rng, m):
+    candidates = []
+    for _ in range(m):
+        start = rng.randint(0, 20)
+        # Integer weights keep the comparison with brute force exact
+        candidates.append({"start": start, "end": start + rng.randint(1, 8), "weight": rng.randint(1, 10)})
+    return candidates
+
+
+def compatible(chosen):
+    ordered = sorted(chosen, key=lambda c: c["start"])
+    return all(a["end"] <= b["start"] for a, b in zip(ordered, ordered[1:]))
+
+
+def brute_force(candidates, max_clips=None):
+    limit = len(candidates) if max_clips is None else min(max_clips, len(candidates))
+    return max(
+        sum(c["weight"] for c in chosen)
+        for r in range(limit + 1)
+        for chosen in itertools.combinations(candidates, r)
+        if compatible(chosen)
+    )
+
+
+@pytest.mark.parametrize("max_clips", [None, 1, 2, 3])
+def test_schedule_matches_exhaustive_search(max_clips):
+    rng = random.Random(max_clips or 0)
+    for _ in range(200):
+        candidates = random_candidates(rng, rng.randint(1, 8))
+        chosen = schedule(candidates, max_clips)
+
+        assert all(any(c is cand for cand in candidates) for c in chosen)
+        assert compatible(chosen)
+        if max_clips is not None:
+            assert len(chosen) <= max_clips
+        assert sum(c["weight"] for c in chosen) == brute_force(candidates, max_clips)
+
+
+def test_schedule_without_candidates():
+    assert schedule([]) == []
+    assert schedule([], max_clips=3) == []
+
+
+def test_select_highlights_returns_disjoint_clips_best_first():
+    segments = [
+        {"start": 10.0 * i, "end": 10.0 * i + 9.0, "text": f"s{i}", "score": float(i % 4)}
+        for i in range(30)
+    ]
+    clips = select_highlights(segments, min_duration=30, max_duration=60, max_clips=3)
+
+    assert 0 < len(clips) <= 3
+    assert compatible(clips)
+    assert all(30 <= clip["duration"] <= 60 for clip in clips)
+    assert [clip["score"] for clip in clips] == sorted((clip["score"] for clip in clips), reverse=True)
@@ -0,0 +1,45 @@
+import shutil
+import subprocess
+
+import pytest
+
+from app.tasks.media_probe import MediaInfo, _stream_info, probe_media, scan_keyframes
+
+needs_ffmpeg = pytest.mark.skipif(shutil.which('ffmpeg') is None or shutil.which('ffprobe') is None,
+                                  reason="needs ffmpeg")
+
+
+def test_cover_art_is_not_the_video_stream():
+    cover = _stream_info({'index': 0, 'codec_type': 'video', 'codec_name': 'mjpeg', 'width': 64, 'height': 64,
+                          'avg_frame_rate': '90000/1', 'disposition': {'attached_pic': 1}})
+    video = _stream_info({'index': 1, 'codec_type': 'video', 'codec_name': 'h264', 'width': 1920, 'height': 1080,
+                          'avg_frame_rate': '30/1', 'disposition': {'attached_pic': 0}})
+    audio = _stream_info({'index': 2, 'codec_type': 'audio', 'codec_name': 'aac'})
+
+    assert cover.attached_pic and not video.attached_pic
+    assert MediaInfo('a.mp4', 0, 0.0, 10.0, streams=(cover, video, audio)).video is video
+    only_cover = MediaInfo('a.mp3', 0, 0.0, 10.0, streams=(audio, cover))
+    assert only_cover.video is None and only_cover.fps is None and only_cover.frame_count == 0
+
+
+def make_cover(tmp_path):
+    cover = str(tmp_path / "cover.png")
+    subprocess.run(['ffmpeg', '-nostdin', '-v', 'error', '-f', 'lavfi', '-i', 'color=red:size=64x64',
+                    '-frames:v', '1', cover], check=True)
+    return cover
+
+
+@needs_ffmpeg
+def test_audio_with_cover_art_probes_without_video(tmp_path):
+    path = str(tmp_path / "song.mp3")
+    subprocess.run([
+        'ffmpeg', '-nostdin', '-v', 'error', '-f', 'lavfi', '-i', 'sine=duration=2', '-i', make_cover(tmp_path),
+        '-map', '0:a', '-map', '1:v', '-c:v', 'mjpeg', '-disposition:v', 'attached_pic', path
+    ], check=True)
+    media = probe_media(path)
+
+    assert media.has_audio
+    assert media.video is None
+    assert any(s.attached_pic for s in media.streams)
+    # The cover's single packet is a keyframe, but not of a video track
+    assert scan_keyframes(path) == ()
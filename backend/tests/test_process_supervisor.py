@@ -0,0 +1,215 @@
+import io
+import json
+import os
+import shutil
+import signal
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+from app.tasks import process_supervisor
+from app.tasks.media_probe import probe_media
+from app.tasks.process_supervisor import ProcessSupervisor, SupervisedProcessError, _read_lines, _start_time
+
+
+@pytest.fixture
+def supervisor(tmp_path):
+    return ProcessSupervisor(run_dir=str(tmp_path / "run"))
+
+
+def python(code):
+    return [sys.executable, '-c', code]
+
+
+def test_captured_stdout_keeps_long_lines_whole(supervisor):
+    code = "import json, sys; sys.stdout.write(json.dumps({'format': {'tags': {'comment': 'x' * 200000}}}))"
+    result = supervisor.run(python(code), capture_stdout=True)
+    assert json.loads(result.stdout)['format']['tags']['comment'] == 'x' * 200_000
+
+
+def test_captured_stdout_is_byte_for_byte(supervisor):
+    result = supervisor.run(python("import sys; sys.stdout.write('a\\r\\nb\\n\\nc')"), capture_stdout=True)
+    assert result.stdout == b'a\r\nb\n\nc'
+
+
+@pytest.mark.skipif(shutil.which('ffmpeg') is None or shutil.which('ffprobe') is None, reason="needs ffmpeg")
+def test_probe_media_reads_files_with_long_tags(tmp_path):
+    path = str(tmp_path / "tagged.mp4")
+    metadata = tmp_path / "metadata.txt"
+    metadata.write_text(f";FFMETADATA1\ncomment={'y' * 200_000}\n")
+    subprocess.run([
+        'ffmpeg', '-nostdin', '-v', 'error', '-f', 'lavfi', '-i', 'testsrc2=size=64x64:duration=1',
+        '-i', str(metadata), '-map_metadata', '1', '-c:v', 'libx264', path
+    ], check=True)
+    media = probe_media(path)
+    assert media.video is not None
+    assert media.duration == pytest.approx(1.0, abs=0.1)
+
+
+def test_read_lines_splits_on_carriage_returns_and_newlines():
+    lines = []
+    _read_lines(io.BytesIO(b"frame=1\rframe=2\r\nerror\n\nlast"), lines.append)
+    assert lines == [b"frame=1", b"frame=2", b"error", b"last"]
+
+
+def test_read_lines_truncates_only_when_asked():
+    line = b"".join(b"%06d" % n for n in range(40_000))
+    whole, capped = [], []
+    _read_lines(io.BytesIO(line + b"\nshort\n"), whole.append)
+    _read_lines(io.BytesIO(line + b"\nshort\n"), capped.append, max_line=4096)
+    assert whole == [line, b"short"]
+    # The tail carried between reads is capped, so a line keeps at most
+    # max_line bytes plus the chunk that ends it
+    assert line.endswith(capped[0]) and 4096 <= len(capped[0]) <= 4096 + 65536
+    assert capped[1] == b"short"
+
+
+def test_failed_command_keeps_the_stderr_tail(tmp_path):
+    supervisor = ProcessSupervisor(run_dir=str(tmp_path / "run"), stderr_lines=2)
+    code = "import sys; sys.stderr.write('one\\ntwo\\nthree\\n'); sys.exit(3)"
+    with pytest.raises(SupervisedProcessError) as error:
+        supervisor.run(python(code))
+    assert error.value.reason == 'exit'
+    assert error.value.returncode == 3
+    assert error.value.stderr == b"two\nthree"
+    assert supervisor.metrics()['failed'] == 1
+    assert os.listdir(supervisor.run_dir) == []
+
+
+def gone(pid, timeout=5.0):
+    # Killed processes reparented to a non-reaping init linger as zombies
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with open(f"/proc/{pid}/stat") as f:
+                if f.read().rsplit(')', 1)[1].split()[0] == 'Z':
+                    return True
+        except OSError:
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def test_timeout_kills_the_whole_process_group(supervisor):
+    pids = []
+    code = ("import subprocess, time; p = subprocess.Popen(['sleep', '30']); "
+            "print(p.pid, flush=True); time.sleep(30)")
+    started = time.time()
+    with pytest.raises(SupervisedProcessError) as error:
+        supervisor.run(python(code), timeout=1.0, on_stdout_line=lambda line: pids.append(int(line)))
+    assert error.value.reason == 'timeout'
+    assert time.time() - started < 10
+    assert gone(pids[0])
+    assert supervisor.metrics()['timeouts'] == 1
+    assert supervisor.metrics()['active'] == 0
+
+
+def test_cancel_kills_running_processes_until_reset(supervisor):
+    errors = []
+
+    def run():
+        try:
+            supervisor.run(['sleep', '30'])
+        except SupervisedProcessError as e:
+            errors.append(e)
+    thread = threading.Thread(target=run)
+    thread.start()
+    deadline = time.time() + 5
+    while supervisor.metrics()['active'] == 0 and time.time() < deadline:
+        time.sleep(0.01)
+    supervisor.cancel()
+    thread.join(timeout=10)
+
+    assert [e.reason for e in errors] == ['cancelled']
+    with pytest.raises(SupervisedProcessError) as error:
+        supervisor.run(['true'])
+    assert error.value.reason == 'cancelled'
+    supervisor.reset()
+    assert supervisor.run(['true']).returncode == 0
+
+
+
+def spawned(monkeypatch, after_spawn=None):
+    # Records every process the supervisor starts, optionally running
+    # after_spawn(proc) right after Popen returns
+    procs = []
+    popen = subprocess.Popen
+
+    def record(*args, **kwargs):
+        proc = popen(*args, **kwargs)
+        procs.append(proc)
+        if after_spawn:
+            after_spawn(proc)
+        return proc
+    monkeypatch.setattr(process_supervisor.subprocess, 'Popen', record)
+    return procs
+
+
+def test_cancel_between_the_check_and_registration_kills_the_group(supervisor, monkeypatch):
+    procs = spawned(monkeypatch, lambda proc: supervisor.cancel())
+    started = time.time()
+    with pytest.raises(SupervisedProcessError) as error:
+        supervisor.run(['sleep', '30'])
+    assert error.value.reason == 'cancelled'
+    assert time.time() - started < 10
+    assert procs[0].returncode is not None and procs[0].returncode < 0
+    assert supervisor.metrics()['active'] == 0
+
+
+def test_a_failed_pid_file_write_kills_the_group(supervisor, monkeypatch):
+    procs = spawned(monkeypatch)
+    shutil.rmtree(supervisor.run_dir)
+    with pytest.raises(OSError):
+        supervisor.run(['sleep', '30'])
+    assert procs[0].returncode is not None and procs[0].returncode < 0
+    assert supervisor.metrics()['active'] == 0
+
+def dead_pid():
+    proc = subprocess.Popen(['true'])
+    proc.wait()
+    return proc.pid
+
+
+def orphan_group(supervisor, recorded_start=None):
+    # A sleep in its own group, recorded as if by a worker that has exited
+    proc = subprocess.Popen(['sleep', '30'], start_new_session=True)
+    with open(os.path.join(supervisor.run_dir, f"{dead_pid()}.{proc.pid}"), 'w') as f:
+        f.write(recorded_start or _start_time(proc.pid))
+    return proc
+
+
+def test_reap_orphans_kills_groups_of_dead_workers(supervisor):
+    proc = orphan_group(supervisor)
+    supervisor.reap_orphans()
+    assert proc.wait(timeout=5) == -signal.SIGKILL
+    assert supervisor.metrics()['orphans_reaped'] == 1
+    assert os.listdir(supervisor.run_dir) == []
+
+
+def test_reap_orphans_spares_a_reused_pid(supervisor):
+    proc = orphan_group(supervisor, recorded_start='1')
+    try:
+        supervisor.reap_orphans()
+        assert proc.poll() is None
+        assert supervisor.metrics()['orphans_reaped'] == 0
+        assert os.listdir(supervisor.run_dir) == []
+    finally:
+        proc.kill()
+        proc.wait()
+
+
+def test_reap_orphans_leaves_live_workers_alone(supervisor):
+    proc = subprocess.Popen(['sleep', '30'], start_new_session=True)
+    record = os.path.join(supervisor.run_dir, f"{os.getpid()}.{proc.pid}")
+    with open(record, 'w') as f:
+        f.write(_start_time(proc.pid))
+    try:
+        supervisor.reap_orphans()
+        assert proc.poll() is None
+        assert os.path.exists(record)
+    finally:
+        proc.kill()
+        proc.wait()
@@ -0,0 +1,135 @@
+import shutil
+import subprocess
+
+import pytest
+
+from app.tasks import clip_lengths
+from app.tasks.clip_lengths import EXPLAINER_PROFILE, MultiLengthClipProcessor
+from app.tasks.clip_processor import ClipProcessor
+from app.tasks.media_executor import MediaExecutor
+from app.tasks.media_probe import MediaInfo
+from app.tasks.render_planner import DECODE_SKEW_SECONDS, EncodeProfile, OutputSpec, RenderPlanner, _merge_ranges
+
+PROFILE = EncodeProfile(video_bitrate='2000k')
+OTHER = EncodeProfile(width=720, height=1280)
+
+
+def spec(key, start, end, profile=PROFILE):
+    return OutputSpec((key, 1), f"/tmp/{key}.mp4", start, end, profile)
+
+
+def bounded(clusters):
+    for cluster_start, cluster_end, jobs in clusters:
+        assert cluster_start == min(job.start for job in jobs)
+        assert cluster_end == max(job.end for job in jobs)
+        if len(jobs) > 1:
+            first = jobs[0]
+            assert all(job.profile.shared_decode for job in jobs)
+            assert all(abs(job.start - first.start) <= DECODE_SKEW_SECONDS for job in jobs)
+            assert all(abs(job.end - first.end) <= DECODE_SKEW_SECONDS for job in jobs)
+    return True
+
+
+@pytest.fixture
+def planner():
+    return RenderPlanner(executor=MediaExecutor(cpu_budget=4))
+
+
+def test_merge_ranges_chains_overlaps_without_joins():
+    groups = _merge_ranges([(0, 10), (5, 20), (15, 30), (40, 50)], lambda r: r[0], lambda r: r[1])
+    assert [(start, end) for start, end, _ in groups] == [(0, 30), (40, 50)]
+
+
+def test_merge_ranges_joins_stops_the_chain():
+    groups = _merge_ranges([(0, 10), (5, 20), (15, 30)], lambda r: r[0], lambda r: r[1],
+                           lambda group, item: item[0] - group[0] < 10)
+    assert [(start, end, len(items)) for start, end, items in groups] == [(0, 20, 2), (15, 30, 1)]
+
+
+def test_identical_specs_share_one_encode(planner):
+    clusters = planner.plan([spec('a', 5, 65), spec('b', 5, 65), spec('web', 5, 65, OTHER)])
+    assert len(clusters) == 1
+    _, _, jobs = clusters[0]
+    assert sorted(len(job.outputs) for job in jobs) == [1, 2]
+
+
+def test_nested_ranges_get_their_own_decode(planner):
+    clusters = planner.plan([spec('main', 5, 65), spec('teaser', 27.5, 42.5, OTHER)])
+    assert [(start, end) for start, end, _ in clusters] == [(5, 65), (27.5, 42.5)]
+    assert bounded(clusters)
+
+
+def test_explainers_never_share_a_decode(planner):
+    explainer = EncodeProfile(video_bitrate='2500k', shared_decode=False)
+    clusters = planner.plan([spec('main', 5, 65), spec('explainer', 5, 65, explainer)])
+    assert len(clusters) == 2
+    assert all(len(jobs) == 1 for _, _, jobs in clusters)
+
+
+def test_isolate_gives_every_output_its_own_cluster(planner):
+    specs = [spec('a', 5, 65), spec('b', 5, 65)]
+    clusters = planner.plan(specs, isolate=True)
+    assert [jobs[0].outputs for _, _, jobs in clusters] == [[specs[0]], [specs[1]]]
+
+
+def test_length_cuts_of_neighbouring_clips_stay_in_bounded_clusters(planner, tmp_path, monkeypatch):
+    media = MediaInfo(path=str(tmp_path / "source.mp4"), size=0, mtime=0.0, duration=150.0)
+    monkeypatch.setattr(clip_lengths, 'get_media_info', lambda path: media)
+    clips = [{'id': 1, 'start_time': 5, 'end_time': 65}, {'id': 2, 'start_time': 80, 'end_time': 140}]
+    length_specs, copied = MultiLengthClipProcessor(output_dir=str(tmp_path)).plan_lengths(media.path, clips, "v")
+    specs = ClipProcessor(output_dir=str(tmp_path)).output_specs(clips, "v", media) + length_specs
+
+    clusters = planner.plan(specs)
+
+    assert copied == {}
+    assert bounded(clusters)
+    planned = [spec for _, _, jobs in clusters for job in jobs for spec in job.outputs]
+    assert sorted(s.key for s in planned) == sorted(s.key for s in specs)
+    for _, _, jobs in clusters:
+        clip_ids = {s.key[-1] for job in jobs for s in job.outputs}
+        if any(job.profile == EXPLAINER_PROFILE for job in jobs):
+            assert len(jobs) == 1
+        else:
+            assert len(clip_ids) == 1
+    assert all(end - start <= 60 + DECODE_SKEW_SECONDS
+               for start, end, jobs in clusters if jobs[0].profile != EXPLAINER_PROFILE)
+
+
+@pytest.mark.parametrize("cpu_budget", [1, 2, 3])
+def test_clusters_never_hold_more_encodes_than_the_budget(cpu_budget):
+    planner = RenderPlanner(executor=MediaExecutor(cpu_budget=cpu_budget))
+    profiles = [EncodeProfile(video_bitrate=f'{1000 + n}k') for n in range(7)]
+    clusters = planner.plan([spec(f'out{n}', 5, 65, profile) for n, profile in enumerate(profiles)])
+
+    assert all(len(jobs) <= cpu_budget for _, _, jobs in clusters)
+    assert sum(len(jobs) for _, _, jobs in clusters) == 7
+    with planner.executor.reserve(planner.executor.job_threads * len(clusters[0][2])) as granted:
+        assert granted // len(clusters[0][2]) >= 1
+
+
+def video_packets(path):
+    result = subprocess.run([
+        'ffprobe', '-v', 'error', '-select_streams', 'v:0', '-count_packets',
+        '-show_entries', 'stream=nb_read_packets', '-of', 'csv=p=0', path
+    ], check=True, capture_output=True, text=True)
+    return int(result.stdout.strip())
+
+
+@pytest.mark.skipif(shutil.which('ffmpeg') is None or shutil.which('ffprobe') is None, reason="needs ffmpeg")
+def test_trims_off_the_frame_grid_copy_only_their_own_frames(planner, tmp_path):
+    source = str(tmp_path / "source.mp4")
+    subprocess.run([
+        'ffmpeg', '-nostdin', '-v', 'error', '-f', 'lavfi', '-i', 'testsrc2=size=160x90:rate=30:duration=8',
+        '-f', 'lavfi', '-i', 'sine=duration=8', '-c:v', 'libx264', '-g', '300', '-c:a', 'aac', '-shortest', source
+    ], check=True)
+    # Same profile, so the 1.017 s trim is stream-copied from the whole clip's encode
+    whole = OutputSpec(('clip', 1), str(tmp_path / "whole.mp4"), 0.0, 6.0, PROFILE)
+    part = OutputSpec(('part', 1), str(tmp_path / "part.mp4"), 1.017, 3.017, PROFILE)
+
+    results, report = planner.execute(source, [whole, part], str(tmp_path))
+
+    assert all(result['success'] for result in results.values())
+    assert report['encode_jobs'] == 1
+    # Two seconds of 30 fps frames; starting at the previous keyframe would
+    # carry the second before as well
+    assert abs(video_packets(part.path) - 60) <= 3
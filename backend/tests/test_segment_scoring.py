@@ -0,0 +1,86 @@
+import json
+import random
+
+import pytest
+
+from app.tasks import segment_scoring
+from app.tasks.segment_scoring import SegmentScorer, get_scorer
+
+OVERLAPPING = {"key": 2, "key point": 5, "point": 3, "game changer": 7, "changer": 1}
+
+
+def seg(text, start=0.0, end=1.0):
+    return {"start": start, "end": end, "text": text}
+
+
+def substring_score(text, keywords):
+    # The per-segment scan the automaton replaced: each keyword once if present
+    text = text.replace("\n", " ").lower()
+    return sum(w for kw, w in keywords.items() if kw.lower() in text)
+
+
+def test_overlapping_keywords_each_count_once_per_segment():
+    scorer = SegmentScorer(OVERLAPPING)
+    segments = [
+        seg("The key point is the key point"),
+        seg("a real Game Changer"),
+        seg("pointless keys"),
+        seg("nothing here"),
+    ]
+    scores = scorer.features(segments)["keyword_score"]
+    assert list(scores) == [10.0, 8.0, 5.0, 0.0]
+
+
+def test_matches_do_not_span_segments():
+    scorer = SegmentScorer(OVERLAPPING)
+    scores = scorer.features([seg("what a game"), seg("changer indeed")])["keyword_score"]
+    assert list(scores) == [0.0, 1.0]
+
+
+def test_keyword_scores_match_substring_scan():
+    rng = random.Random(0)
+    vocabulary = ["key", "point", "game", "changer", "keypoint", "the", "Key", "POINT", "\n", "!"]
+    scorer = SegmentScorer(OVERLAPPING)
+    for _ in range(50):
+        segments = [
+            seg(" ".join(rng.choice(vocabulary) for _ in range(rng.randint(0, 12))))
+            for _ in range(rng.randint(1, 10))
+        ]
+        scores = scorer.features(segments)["keyword_score"]
+        assert list(scores) == [substring_score(s["text"], OVERLAPPING) for s in segments]
+
+
+def test_score_combines_features_and_drops_short_segments():
+    scorer = SegmentScorer({"wow": 10})
+    kept = scorer.score_segments([
+        seg("wow, really?", 0.0, 50.0),
+        seg("wow!", 50.0, 60.0),
+        seg("too short", 60.0, 62.0),
+    ])
+    assert [s["score"] for s in kept] == [10 + 15 + 10, 10 + 10 + 2]
+    assert [s["duration"] for s in kept] == [50.0, 10.0]
+
+
+@pytest.fixture
+def tenant_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv("KEYWORD_WEIGHTS_DIR", str(tmp_path))
+    monkeypatch.setattr(segment_scoring, "_scorers", {})
+    return tmp_path
+
+
+def test_tenant_weights_are_loaded_and_cached(tenant_dir):
+    (tenant_dir / "acme.json").write_text(json.dumps({
+        "keywords": {"Launch": 30, "launch date": 5},
+        "weights": {"question": 1, "min_duration": 1}
+    }))
+    scorer = get_scorer("acme")
+    assert get_scorer("acme") is scorer
+
+    kept = scorer.score_segments([seg("the launch date?", 0.0, 2.0), seg("wow", 2.0, 4.0)])
+    assert [s["score"] for s in kept] == [30 + 5 + 1 + 0.4, 0.4]
+
+
+def test_unknown_tenant_gets_defaults(tenant_dir):
+    scorer = get_scorer("nobody")
+    assert scorer.weights == segment_scoring.DEFAULT_WEIGHTS
+    assert list(scorer.features([seg("wow, a game changer")])["keyword_score"]) == [20.0]
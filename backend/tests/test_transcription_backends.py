@@ -0,0 +1,32 @@
+import torch
+import whisper
+from whisper.model import ModelDimensions, Whisper
+
+from app.tasks.transcription_backends import QuantizedWhisperBackend
+
+TINY_DIMS = ModelDimensions(
+    n_mels=80, n_audio_ctx=16, n_audio_state=32, n_audio_head=2, n_audio_layer=1,
+    n_vocab=64, n_text_ctx=8, n_text_state=32, n_text_head=2, n_text_layer=1,
+)
+
+
+def random_whisper(*args, **kwargs):
+    torch.manual_seed(0)
+    model = Whisper(TINY_DIMS)
+    # Left uninitialised by whisper until weights are loaded
+    torch.nn.init.normal_(model.decoder.positional_embedding)
+    return model
+
+
+def test_int8_backend_quantizes_every_linear(monkeypatch):
+    monkeypatch.setattr(whisper, "load_model", random_whisper)
+    model = QuantizedWhisperBackend("tiny").model
+
+    modules = list(model.modules())
+    quantized = [m for m in modules if isinstance(m, torch.ao.nn.quantized.dynamic.Linear)]
+    assert quantized
+    assert not [m for m in modules if isinstance(m, torch.nn.Linear)]
+
+    mel = torch.zeros(1, TINY_DIMS.n_mels, TINY_DIMS.n_audio_ctx * 2)
+    tokens = torch.zeros(1, 4, dtype=torch.long)
+    assert model(mel, tokens).shape == (1, 4, TINY_DIMS.n_vocab)